@@ -1,9 +1,14 @@
 from fastapi import FastAPI
 
+from .routers.delete import DeleteRouter
 from .routers.generate import GenerateRouter
 from .routers.health import HealthRouter
+from .routers.ingest import IngestRouter
+from .routers.metrics import MetricsRouter
+from .routers.search import SearchRouter
 from .routers.watcher import WatcherRouter
 from ..container import Container
+from ..services.document.document_service import DocumentService
 
 
 class Api(FastAPI):
@@ -15,9 +20,23 @@ class Api(FastAPI):
 
         self.include_routers()
 
+        self.add_event_handler("startup", self._warm_up)
+        self.add_event_handler("shutdown", self._container.dispose)
+
+    async def _warm_up(self):
+        try:
+            await self._container.resolve(DocumentService).initialize()
+        except Exception as e:
+            # Not fatal, the document service retries lazily on first use
+            print(f"Could not load document hash index at startup: {e}")
+
     def include_routers(self):
         self.include_router(GenerateRouter(self._container), prefix="/generate")
         self.include_router(HealthRouter(self._container))
+        self.include_router(MetricsRouter(self._container))
+        self.include_router(IngestRouter(self._container), prefix="/ingest")
+        self.include_router(SearchRouter(self._container), prefix="/search")
+        self.include_router(DeleteRouter(self._container), prefix="/delete")
         self.include_router(WatcherRouter(self._container), prefix="/watch")
 
     @staticmethod
@@ -25,5 +44,5 @@ class Api(FastAPI):
         return {
             "message": "RAG MVP Backend",
             "version": "0.1.0",
-            "endpoints": ["/health", "/docs", "/ingest", "/search", "/generate"]
+            "endpoints": ["/health", "/metrics", "/docs", "/ingest", "/search", "/delete", "/generate"]
         }
@@ -0,0 +1,38 @@
+from typing import List
+
+from fastapi import APIRouter
+from pydantic import BaseModel
+
+from ...container import Container
+from ...services.ingestion.ingestion_job import IngestionJob
+from ...services.ingestion.ingestion_service import IngestionService
+
+
+class DeleteBatchRequest(BaseModel):
+    source_paths: List[str]
+
+
+class DeleteRouter(APIRouter):
+    """
+    Deletes are queued as ingestion jobs, so they run after any insert or reingest of the same
+    document that was submitted before them. Poll /ingest/jobs/{job_id} for their outcome.
+    """
+
+    def __init__(self, container: Container, **kwargs):
+        super().__init__(**kwargs)
+        self._container = container
+
+        self.delete("/by-path")(self.delete_by_path)
+        self.post("/batch")(self.delete_batch)
+
+    async def delete_by_path(self, source_path: str):
+        job = await self._container.resolve(IngestionService).submit(IngestionJob("delete", source_path))
+        return {"status": "queued", "source_path": source_path, "job_id": job.id}
+
+    async def delete_batch(self, request: DeleteBatchRequest):
+        ingestion_service = self._container.resolve(IngestionService)
+        jobs = []
+        for source_path in request.source_paths:
+            job = await ingestion_service.submit(IngestionJob("delete", source_path))
+            jobs.append({"source_path": source_path, "job_id": job.id})
+        return {"status": "queued", "count": len(jobs), "jobs": jobs}
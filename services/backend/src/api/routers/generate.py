@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from fastapi import APIRouter
 # Import Pydantic's BaseModel
 from pydantic import BaseModel
@@ -11,6 +13,10 @@ from ...workflows.workflow_controller import call_workflow
 class GenerateRequest(BaseModel):
     query: str
     workflow_name: str = "default"
+    # None uses the RETRIEVAL_MODE default, other values are rejected with a 422
+    retrieval_mode: Optional[Literal["hybrid", "hyde"]] = None
+    # Milliseconds to wait for query expansion in "hyde" mode, None uses QUERY_EXPANSION_BUDGET_MS
+    expansion_budget_ms: Optional[float] = None
     # We can add other optional fields here later if needed
 
 
@@ -36,6 +42,8 @@ class GenerateRouter(APIRouter):
         response = await call_workflow(
             self._container, 
             request.query, 
-            workflow_name=request.workflow_name
+            workflow_name=request.workflow_name,
+            retrieval_mode=request.retrieval_mode,
+            expansion_budget_ms=request.expansion_budget_ms
         )
         return response
\ No newline at end of file
@@ -0,0 +1,96 @@
+import hashlib
+import mimetypes
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+
+from ...container import Container
+from ...services.ingestion.ingestion_job import IngestionJob
+from ...services.ingestion.ingestion_service import IngestionService
+
+# Uploads are copied here and removed once their ingestion job has finished
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", tempfile.gettempdir())
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class IngestRouter(APIRouter):
+    def __init__(self, container: Container, **kwargs):
+        super().__init__(**kwargs)
+        self._container = container
+
+        self.post("/file")(self.ingest_file)
+        self.post("/batch")(self.ingest_batch)
+        self.get("/jobs/{job_id}")(self.get_job)
+
+    async def ingest_file(self, file: UploadFile = File(...), source_path: Optional[str] = Form(None)):
+        job = await self._submit_upload(file, source_path)
+        return job.to_dict()
+
+    async def ingest_batch(self, files: List[UploadFile] = File(...),
+                           source_paths: Optional[List[str]] = Form(None)):
+        """
+        Queues every uploaded file as its own ingestion job. The jobs run concurrently on the
+        ingestion workers; poll /ingest/jobs/{job_id} for their outcome.
+
+        Args:
+            files: The uploaded documents.
+            source_paths: Optional identifiers, one per file in the same order. Defaults to an identifier
+                derived from the content hash and the filename, see _submit_upload.
+        """
+        if source_paths and len(source_paths) != len(files):
+            raise HTTPException(status_code=400, detail="source_paths must have one entry per file")
+
+        jobs = []
+        for i, file in enumerate(files):
+            job = await self._submit_upload(file, source_paths[i] if source_paths else None)
+            jobs.append({"filename": file.filename, "identifier": job.identifier, "job_id": job.id})
+        return {"jobs": jobs}
+
+    def get_job(self, job_id: str):
+        ingestion_service = self._container.resolve(IngestionService)
+        job = ingestion_service.get_job(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Ingestion job {job_id} not found")
+        return job.to_dict()
+
+    async def _submit_upload(self, file: UploadFile, source_path: Optional[str]) -> IngestionJob:
+        """
+        Spools the upload and queues its insert. Without source_path the identifier is
+        "upload/<content hash prefix>/<filename>": a bare filename would let unrelated uploads that
+        share a name (e.g. report.pdf) re-ingest over each other, and the filename stays last so
+        the parser still sees its extension.
+        """
+        if not source_path and not file.filename:
+            raise HTTPException(status_code=400, detail="Uploaded file needs a filename or source_path")
+        content_type = file.content_type or mimetypes.guess_type(source_path or file.filename)[0] \
+            or "application/octet-stream"
+
+        spool_path, size, content_hash = await IngestRouter._spool(file)
+        identifier = source_path or f"upload/{content_hash[:16]}/{os.path.basename(file.filename)}"
+        job = IngestionJob("insert", identifier, path=spool_path, content_type=content_type, size=size,
+                           remove_file_when_done=True)
+        try:
+            # Waits while the ingestion queue is full, pushing back on the uploader
+            return await self._container.resolve(IngestionService).submit(job)
+        except BaseException:
+            Path(spool_path).unlink(missing_ok=True)
+            raise
+        finally:
+            await file.close()
+
+    @staticmethod
+    async def _spool(file: UploadFile) -> tuple[str, int, str]:
+        """Copies the upload to the spool directory, returns its path, size and sha256 hex digest."""
+        os.makedirs(INGEST_SPOOL_DIR, exist_ok=True)
+        fd, spool_path = tempfile.mkstemp(dir=INGEST_SPOOL_DIR, suffix=Path(file.filename or "").suffix)
+        size = 0
+        content_hash = hashlib.sha256()
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                spool.write(chunk)
+                content_hash.update(chunk)
+                size += len(chunk)
+        return spool_path, size, content_hash.hexdigest()
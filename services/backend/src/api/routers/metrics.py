@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from ...container import Container
+from ...services.document.document_service import DocumentService
+from ...services.external.embedding_service import EmbeddingService
+from ...services.external.ollama_service import OllamaService
+from ...services.external.unstructured_service import UnstructuredService
+from ...services.semantic_cache.semantic_cache_service import SemanticCacheService
+
+
+class MetricsRouter(APIRouter):
+    def __init__(self, container: Container, **kwargs):
+        super().__init__(**kwargs)
+        self._container = container
+
+        self.get("/metrics")(self.get_metrics)
+
+    def get_metrics(self):
+        return {
+            "documents": self._container.resolve(DocumentService).get_metrics(),
+            "embeddings": self._container.resolve(EmbeddingService).get_metrics(),
+            "ollama": self._container.resolve(OllamaService).get_metrics(),
+            "unstructured": self._container.resolve(UnstructuredService).get_metrics(),
+            "semantic_cache": self._container.resolve(SemanticCacheService).get_metrics()
+        }
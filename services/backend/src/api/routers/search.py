@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from ...container import Container
+from ...services.document.document_service import DocumentService
+
+# Upper bound of queries per batch search request
+MAX_BATCH_QUERIES = 1000
+
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str]
+    limit: int = 5
+    # Payload fields to return per hit, None returns hash and text_content, [] only scores
+    payload_fields: Optional[List[str]] = None
+
+
+class SearchRouter(APIRouter):
+    def __init__(self, container: Container, **kwargs):
+        super().__init__(**kwargs)
+        self._container = container
+
+        self.get("")(self.search)
+        self.post("/batch")(self.search_batch)
+
+    async def search(self, query: str, limit: int = 5):
+        document_service = self._container.resolve(DocumentService)
+        results = await document_service.search(query, limit=limit)
+        return {
+            "query": query,
+            "results": [
+                {
+                    "identifier": result.document_data.identifier,
+                    "hash": result.document_data.hash,
+                    "text_content": result.document_data.text_content,
+                    "score": result.score
+                }
+                for result in results
+            ]
+        }
+
+    async def search_batch(self, request: SearchBatchRequest):
+        if len(request.queries) > MAX_BATCH_QUERIES:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+        document_service = self._container.resolve(DocumentService)
+        results = await document_service.search_batch(request.queries, limit=request.limit,
+                                                      payload_fields=request.payload_fields)
+        return {
+            "results": [
+                {"query": query, "hits": [hit.to_dict() for hit in hits]}
+                for query, hits in zip(request.queries, results)
+            ]
+        }
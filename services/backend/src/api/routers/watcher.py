@@ -1,3 +1,5 @@
+from typing import Optional
+
 from fastapi import APIRouter
 
 from ...container import Container
@@ -13,13 +15,13 @@ class WatcherRouter(APIRouter):
         self.post("/stop")(self.stop_watching_endpoint)
         self.get("/status")(self.get_status)
 
-    def start_watching(self, directory: str):
+    async def start_watching(self, directory: str):
         watcher_service = self._container.resolve(WatcherService)
         return watcher_service.start_watching(directory)
 
-    def stop_watching_endpoint(self):
+    async def stop_watching_endpoint(self, directory: Optional[str] = None):
         watcher_service = self._container.resolve(WatcherService)
-        return watcher_service.stop_watching()
+        return await watcher_service.stop_watching(directory)
 
     def get_status(self):
         watcher_service = self._container.resolve(WatcherService)
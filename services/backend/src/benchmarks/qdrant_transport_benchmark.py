@@ -0,0 +1,103 @@
+"""
+Measures upsert, search and scroll throughput of the REST and gRPC transports against a Qdrant
+instance, using a temporary collection of random vectors with chunk-sized payloads.
+
+Usage, with Qdrant reachable through QDRANT_HOST / QDRANT_PORT / QDRANT_GRPC_PORT:
+    python -m src.benchmarks.qdrant_transport_benchmark --points 5000 --searches 500 --concurrency 8
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import PointStruct, VectorParams, Distance
+
+from ..services.external.qdrant_service import DOCUMENTS_COLLECTION, EMBEDDING_VECTOR_SIZE, build_client_options
+
+BENCHMARK_COLLECTION = f"{DOCUMENTS_COLLECTION}_benchmark_transport"
+UPSERT_BATCH_SIZE = 64
+SCROLL_PAGE_SIZE = 256
+SEARCH_LIMIT = 20
+
+
+def _random_vector() -> list:
+    return [random.uniform(-1, 1) for _ in range(EMBEDDING_VECTOR_SIZE)]
+
+
+def _random_point(point_id: int) -> PointStruct:
+    return PointStruct(id=point_id, vector=_random_vector(), payload={
+        "identifier": f"/benchmark/document-{point_id // 50}.txt",
+        "chunk_sequence": point_id % 50,
+        "text_content": " ".join(random.choice("abcdefghij") * 6 for _ in range(200)),
+    })
+
+
+async def _benchmark_transport(prefer_grpc: bool, point_count: int, search_count: int, concurrency: int) -> dict:
+    client = AsyncQdrantClient(**build_client_options(prefer_grpc=prefer_grpc))
+    try:
+        if await client.collection_exists(BENCHMARK_COLLECTION):
+            await client.delete_collection(BENCHMARK_COLLECTION)
+        await client.create_collection(
+            BENCHMARK_COLLECTION,
+            vectors_config=VectorParams(size=EMBEDDING_VECTOR_SIZE, distance=Distance.COSINE)
+        )
+
+        points = [_random_point(point_id) for point_id in range(point_count)]
+        started = time.perf_counter()
+        for start in range(0, point_count, UPSERT_BATCH_SIZE):
+            await client.upsert(BENCHMARK_COLLECTION, points=points[start:start + UPSERT_BATCH_SIZE], wait=True)
+        upsert_seconds = time.perf_counter() - started
+
+        queries = [_random_vector() for _ in range(search_count)]
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def search(query):
+            async with semaphore:
+                await client.query_points(BENCHMARK_COLLECTION, query=query, limit=SEARCH_LIMIT, with_payload=True)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(search(query) for query in queries))
+        search_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        offset = None
+        while True:
+            _, offset = await client.scroll(BENCHMARK_COLLECTION, limit=SCROLL_PAGE_SIZE, offset=offset,
+                                            with_payload=True, with_vectors=True)
+            if offset is None:
+                break
+        scroll_seconds = time.perf_counter() - started
+
+        await client.delete_collection(BENCHMARK_COLLECTION)
+    finally:
+        await client.close()
+
+    return {
+        "upsert_points_per_s": point_count / upsert_seconds,
+        "searches_per_s": search_count / search_seconds,
+        "scroll_points_per_s": point_count / scroll_seconds,
+    }
+
+
+async def run_benchmark(point_count: int, search_count: int, concurrency: int) -> dict:
+    return {
+        transport: await _benchmark_transport(transport == "grpc", point_count, search_count, concurrency)
+        for transport in ("rest", "grpc")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=5000, help="Number of points to upsert and scroll")
+    parser.add_argument("--searches", type=int, default=500, help="Number of searches")
+    parser.add_argument("--concurrency", type=int, default=8, help="Searches in flight at the same time")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.points, args.searches, args.concurrency))
+    for transport, metrics in results.items():
+        print(f"{transport:>4}: " + ", ".join(f"{name}={value:.1f}" for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
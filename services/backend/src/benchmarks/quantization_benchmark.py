@@ -0,0 +1,127 @@
+"""
+Reports the memory and recall trade-off of the dense vector quantization modes.
+
+A sample of the stored vectors is copied into one temporary collection per mode (none, scalar,
+binary). Held-out stored vectors are used as queries, recall@k is measured against an exact
+search of the unquantized collection with the same search params the backend would use.
+
+Usage, from the backend container:
+    python -m src.benchmarks.quantization_benchmark --points 20000 --queries 200 --limit 20
+    QDRANT_SEARCH_OVERSAMPLING=4 python -m src.benchmarks.quantization_benchmark --vectors-on-disk
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Tuple
+
+from qdrant_client.models import PointStruct, SearchParams, CollectionStatus
+
+from ..services.external.qdrant_service import QdrantService, DOCUMENTS_COLLECTION, DENSE_VECTOR_NAME, \
+    EMBEDDING_VECTOR_SIZE, QUANTIZATION_MODES, build_search_params
+
+BENCHMARK_COLLECTION_PREFIX = f"{DOCUMENTS_COLLECTION}_benchmark_"
+INDEXING_TIMEOUT_SECONDS = 600
+
+
+def estimate_vector_ram_bytes(points: int, quantization: str, vectors_on_disk: bool) -> int:
+    """Approximate RAM held by the dense vectors, HNSW graph and payloads not included."""
+    original = 0 if vectors_on_disk else points * EMBEDDING_VECTOR_SIZE * 4
+    quantized = {"none": 0, "scalar": EMBEDDING_VECTOR_SIZE, "binary": EMBEDDING_VECTOR_SIZE // 8}[quantization]
+    return original + points * quantized
+
+
+async def _sample_vectors(client, count: int) -> list:
+    vectors = []
+    offset = None
+    while len(vectors) < count:
+        page, offset = await client.scroll(collection_name=DOCUMENTS_COLLECTION, with_payload=False,
+                                           with_vectors=True, limit=min(256, count - len(vectors)),
+                                           offset=offset)
+        for record in page:
+            vector = record.vector
+            vectors.append(vector[DENSE_VECTOR_NAME] if isinstance(vector, dict) else vector)
+        if offset is None:
+            break
+    return vectors
+
+
+async def _wait_until_indexed(client, collection_name: str):
+    deadline = time.monotonic() + INDEXING_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        info = await client.get_collection(collection_name)
+        if info.status == CollectionStatus.GREEN:
+            return
+        await asyncio.sleep(1)
+    raise TimeoutError(f"{collection_name} was not indexed within {INDEXING_TIMEOUT_SECONDS}s")
+
+
+async def _search_all(client, collection_name: str, queries: list, limit: int, search_params) -> Tuple[list, list]:
+    results = []
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        response = await client.query_points(collection_name=collection_name, query=query, limit=limit,
+                                             search_params=search_params, with_payload=False)
+        latencies.append(time.perf_counter() - started)
+        results.append({point.id for point in response.points})
+    return results, latencies
+
+
+async def run_benchmark(point_count: int, query_count: int, limit: int, vectors_on_disk: bool) -> dict:
+    qdrant_service = QdrantService()
+    client = await qdrant_service.get_client()
+    results = {}
+    try:
+        vectors = await _sample_vectors(client, point_count + query_count)
+        if len(vectors) <= query_count:
+            raise RuntimeError(f"{DOCUMENTS_COLLECTION} holds too few points for {query_count} queries")
+        queries, corpus = vectors[:query_count], vectors[query_count:]
+        print(f"Benchmarking {len(corpus)} points with {len(queries)} queries, limit {limit}")
+
+        for mode in QUANTIZATION_MODES:
+            collection_name = BENCHMARK_COLLECTION_PREFIX + mode
+            if await client.collection_exists(collection_name):
+                await client.delete_collection(collection_name)
+            await qdrant_service.create_documents_collection(collection_name, quantization=mode,
+                                                             vectors_on_disk=vectors_on_disk)
+            for start in range(0, len(corpus), 256):
+                await client.upsert(collection_name=collection_name, wait=True, points=[
+                    PointStruct(id=start + offset, vector={DENSE_VECTOR_NAME: vector})
+                    for offset, vector in enumerate(corpus[start:start + 256])
+                ])
+            await _wait_until_indexed(client, collection_name)
+
+        exact, _ = await _search_all(client, BENCHMARK_COLLECTION_PREFIX + "none", queries, limit,
+                                     SearchParams(exact=True))
+        for mode in QUANTIZATION_MODES:
+            found, latencies = await _search_all(client, BENCHMARK_COLLECTION_PREFIX + mode, queries, limit,
+                                                 build_search_params(mode))
+            results[mode] = {
+                "vector_ram_mb": estimate_vector_ram_bytes(len(corpus), mode, vectors_on_disk) / 2 ** 20,
+                f"recall@{limit}": statistics.mean(len(f & e) / len(e) for f, e in zip(found, exact) if e),
+                "p50_ms": statistics.median(latencies) * 1000,
+            }
+    finally:
+        for mode in QUANTIZATION_MODES:
+            if await client.collection_exists(BENCHMARK_COLLECTION_PREFIX + mode):
+                await client.delete_collection(BENCHMARK_COLLECTION_PREFIX + mode)
+        await qdrant_service.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10000, help="Number of stored vectors to copy")
+    parser.add_argument("--queries", type=int, default=100, help="Number of held-out vectors used as queries")
+    parser.add_argument("--limit", type=int, default=20, help="Results per query (k of recall@k)")
+    parser.add_argument("--vectors-on-disk", action="store_true", help="Keep the original vectors on disk")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.points, args.queries, args.limit, args.vectors_on_disk))
+    for mode, metrics in results.items():
+        print(f"{mode:>6}: " + ", ".join(f"{name}={value:.3f}" for name, value in metrics.items()))
+
+
+if __name__ == "__main__":
+    main()
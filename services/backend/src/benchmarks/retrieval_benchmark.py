@@ -0,0 +1,89 @@
+"""
+Compares latency and recall of the hybrid (dense + BM25, no LLM), HyDE and speculative
+(raw-query search while expanding, merged) retrieval paths against the running services.
+
+Usage, from the backend container:
+    python -m src.benchmarks.retrieval_benchmark queries.jsonl --runs 3 --budget-ms 800
+
+Every line of the queries file is {"query": "...", "relevant": ["<document identifier>", ...]}.
+Set EMBEDDING_CACHE_ENABLED=false to measure cold question embeddings.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Optional
+
+from ..container import Container
+from ..services.service_module import ServiceModule
+from ..workflows.default.workflow import retrieve_hybrid_context, retrieve_hyde_context, \
+    retrieve_speculative_context, TOP_K_DOCS
+
+
+MODES = ("hybrid", "hyde", "speculative")
+
+
+async def _retrieve(container: Container, mode: str, query: str, budget_ms: Optional[float]) -> dict:
+    if mode == "hybrid":
+        return await retrieve_hybrid_context(container, query)
+    if mode == "speculative":
+        context_obj, _ = await retrieve_speculative_context(container, query, budget_ms=budget_ms)
+        return context_obj
+    context_obj, _ = await retrieve_hyde_context(container, query)
+    return context_obj
+
+
+def _percentile(values: list, percentile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(percentile * (len(ordered) - 1))))]
+
+
+async def run_benchmark(queries: list, runs: int, budget_ms: Optional[float] = None) -> dict:
+    container = Container()
+    container.load_module(ServiceModule)
+    results = {}
+    try:
+        for mode in MODES:
+            latencies = []
+            recalls = []
+            for _ in range(runs):
+                for entry in queries:
+                    started = time.perf_counter()
+                    context_obj = await _retrieve(container, mode, entry["query"], budget_ms)
+                    latencies.append(time.perf_counter() - started)
+                    relevant = set(entry["relevant"])
+                    if relevant:
+                        recalls.append(len(relevant & set(context_obj)) / len(relevant))
+            results[mode] = {
+                "queries": len(latencies),
+                "p50_ms": _percentile(latencies, 0.5) * 1000,
+                "p95_ms": _percentile(latencies, 0.95) * 1000,
+                "mean_ms": statistics.mean(latencies) * 1000,
+                f"recall@{TOP_K_DOCS}": statistics.mean(recalls) if recalls else None,
+            }
+    finally:
+        await container.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", help="JSONL file of {query, relevant} objects")
+    parser.add_argument("--runs", type=int, default=1, help="Number of passes over the queries per mode")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Query expansion budget of the speculative mode")
+    args = parser.parse_args()
+
+    with open(args.queries, encoding="utf-8") as file:
+        queries = [json.loads(line) for line in file if line.strip()]
+
+    results = asyncio.run(run_benchmark(queries, args.runs, args.budget_ms))
+    for mode, metrics in results.items():
+        print(f"{mode:>11}: " + ", ".join(
+            f"{name}={value:.3f}" if isinstance(value, float) else f"{name}={value}"
+            for name, value in metrics.items()
+        ))
+
+
+if __name__ == "__main__":
+    main()
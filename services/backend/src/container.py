@@ -50,6 +50,20 @@ class Container:
 
         return cls(**dependencies)
 
+    async def dispose(self):
+        """Dispose all created singletons that expose a dispose() hook, in reverse registration order."""
+        for cls, registration in reversed(list(self._registrations.items())):
+            instance = registration['instance']
+            if instance is None or not hasattr(instance, "dispose"):
+                continue
+            try:
+                result = instance.dispose()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"Error disposing {cls.__name__}: {e}")
+            registration['instance'] = None
+
     def load_module(self, module_type: Type["Module"]):
         """Load a module class (not instance) that registers services."""
         module = module_type()  # Instantiate the module type
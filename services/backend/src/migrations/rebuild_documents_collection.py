@@ -0,0 +1,125 @@
+"""
+Rebuilds the documents collection with the storage settings of the current environment
+(QDRANT_QUANTIZATION, QDRANT_VECTORS_ON_DISK, QDRANT_HNSW_ON_DISK) and adds the BM25 sparse
+vectors to points written before hybrid retrieval existed.
+
+Existing sparse vectors are copied as they are. Missing ones are encoded from the payload text or,
+when CHUNK_TEXT_STORE_PATH is set, from the chunk text store; a point whose text cannot be found
+aborts the rebuild rather than being written without its sparse vector.
+
+Points are copied to a staging collection, the documents collection is recreated and the points
+are copied back with their IDs, dense vectors and payloads, so nothing is re-embedded. Stop the
+backend (or at least ingestion) while it runs. If it is interrupted after the documents
+collection was dropped, rerun it with --resume to restore from the staging collection.
+
+Usage, from the backend container:
+    QDRANT_QUANTIZATION=scalar QDRANT_VECTORS_ON_DISK=true python -m src.migrations.rebuild_documents_collection
+"""
+import argparse
+import asyncio
+from typing import List, Optional
+
+from qdrant_client.models import PointStruct
+
+from ..services.document.chunk_text_store import ChunkTextStore
+from ..services.document.document_service import CHUNK_TEXT_STORE_PATH
+from ..services.document.sparse_encoder import encode_document
+from ..services.external.qdrant_service import QdrantService, DOCUMENTS_COLLECTION, DENSE_VECTOR_NAME, \
+    SPARSE_VECTOR_NAME, QDRANT_QUANTIZATION, QDRANT_VECTORS_ON_DISK, QDRANT_HNSW_ON_DISK
+
+STAGING_COLLECTION = f"{DOCUMENTS_COLLECTION}_rebuild"
+COPY_PAGE_SIZE = 256
+
+
+def rebuild_points(records: List, text_store: Optional[ChunkTextStore]) -> List[PointStruct]:
+    """Points with the dense vector of each record and its existing or a freshly encoded sparse vector."""
+    vectors = [record.vector if isinstance(record.vector, dict) else {DENSE_VECTOR_NAME: record.vector}
+               for record in records]
+    needs_text = [record for record, vector in zip(records, vectors)
+                  if SPARSE_VECTOR_NAME not in vector and record.payload.get("text_content") is None]
+    stored_texts = text_store.get_many(str(record.id) for record in needs_text) if text_store and needs_text else {}
+
+    points = []
+    for record, vector in zip(records, vectors):
+        sparse_vector = vector.get(SPARSE_VECTOR_NAME)
+        if sparse_vector is None:
+            text = record.payload.get("text_content")
+            if text is None:
+                text = stored_texts.get(str(record.id))
+            if text is None:
+                raise RuntimeError(
+                    f"No text for point {record.id} ({record.payload.get('identifier')}): neither the payload "
+                    f"nor the chunk text store holds it, set CHUNK_TEXT_STORE_PATH to the store the backend uses"
+                )
+            sparse_vector = encode_document(text)
+        points.append(PointStruct(
+            id=record.id,
+            vector={DENSE_VECTOR_NAME: vector[DENSE_VECTOR_NAME], SPARSE_VECTOR_NAME: sparse_vector},
+            payload=record.payload
+        ))
+    return points
+
+
+async def copy_points(client, source: str, target: str, text_store: Optional[ChunkTextStore] = None) -> int:
+    copied = 0
+    offset = None
+    while True:
+        page, offset = await client.scroll(
+            collection_name=source, with_payload=True, with_vectors=True,
+            limit=COPY_PAGE_SIZE, offset=offset
+        )
+        if page:
+            await client.upsert(collection_name=target, points=rebuild_points(page, text_store), wait=True)
+            copied += len(page)
+            print(f"Copied {copied} points from {source} to {target}")
+        if offset is None:
+            return copied
+
+
+async def _verify_count(client, collection_name: str, expected: int):
+    count = (await client.count(collection_name=collection_name, exact=True)).count
+    if count != expected:
+        raise RuntimeError(f"{collection_name} holds {count} points, expected {expected}")
+
+
+async def rebuild_documents_collection(resume: bool = False):
+    qdrant_service = QdrantService()
+    client = await qdrant_service.get_client()
+    text_store = ChunkTextStore(CHUNK_TEXT_STORE_PATH) if CHUNK_TEXT_STORE_PATH else None
+    try:
+        if not resume:
+            if await client.collection_exists(STAGING_COLLECTION):
+                await client.delete_collection(STAGING_COLLECTION)
+            await qdrant_service.create_documents_collection(STAGING_COLLECTION)
+            staged = await copy_points(client, DOCUMENTS_COLLECTION, STAGING_COLLECTION, text_store)
+            await _verify_count(client, STAGING_COLLECTION, staged)
+        elif not await client.collection_exists(STAGING_COLLECTION):
+            raise RuntimeError(f"Nothing to resume, {STAGING_COLLECTION} does not exist")
+        else:
+            staged = (await client.count(collection_name=STAGING_COLLECTION, exact=True)).count
+
+        print(f"Recreating {DOCUMENTS_COLLECTION} (quantization={QDRANT_QUANTIZATION}, "
+              f"vectors_on_disk={QDRANT_VECTORS_ON_DISK}, hnsw_on_disk={QDRANT_HNSW_ON_DISK})")
+        await client.delete_collection(DOCUMENTS_COLLECTION)
+        await qdrant_service.create_documents_collection(DOCUMENTS_COLLECTION)
+        restored = await copy_points(client, STAGING_COLLECTION, DOCUMENTS_COLLECTION, text_store)
+        await _verify_count(client, DOCUMENTS_COLLECTION, staged)
+
+        await client.delete_collection(STAGING_COLLECTION)
+        print(f"Rebuilt {DOCUMENTS_COLLECTION} with {restored} points")
+    finally:
+        if text_store is not None:
+            text_store.close()
+        await qdrant_service.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resume", action="store_true",
+                        help=f"Restore {DOCUMENTS_COLLECTION} from an existing {STAGING_COLLECTION} collection")
+    args = parser.parse_args()
+    asyncio.run(rebuild_documents_collection(args.resume))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+from typing import List
+
+# Element categories (as reported by unstructured) that open a new section
+SECTION_BOUNDARY_TYPES = {"Title"}
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate, whitespace separated words are close enough for window sizing."""
+    return len(text.split())
+
+
+def assemble_chunks(elements: List[dict], max_tokens: int, overlap_tokens: int = 0) -> List[dict]:
+    """
+    Merges consecutive parsed elements into token-bounded chunks.
+
+    A title always starts a new chunk and no overlap is carried across it, so chunks never span
+    two sections. Within a section, the trailing elements of the previous chunk (up to
+    overlap_tokens) are repeated at the start of the next one. Elements larger than max_tokens
+    are split into word windows on their own.
+
+    Args:
+        elements: The "chunks" list returned by the unstructured service ({"text", "type"}).
+        max_tokens: Upper bound for the estimated token count of a chunk.
+        overlap_tokens: Estimated tokens of trailing context repeated in the next chunk.
+
+    Returns:
+        A list of {"text", "element_start", "element_end"} dicts, element indices are inclusive.
+    """
+    chunks = []
+    window = []  # (element_index, text, tokens)
+    window_tokens = 0
+
+    def flush(keep_overlap: bool):
+        nonlocal window, window_tokens
+        if not window:
+            return
+        chunks.append({
+            "text": "\n".join(text for _, text, _ in window),
+            "element_start": window[0][0],
+            "element_end": window[-1][0],
+        })
+        carried = []
+        carried_tokens = 0
+        if keep_overlap:
+            for entry in reversed(window[1:]):
+                if carried_tokens + entry[2] > overlap_tokens:
+                    break
+                carried.insert(0, entry)
+                carried_tokens += entry[2]
+        window, window_tokens = carried, carried_tokens
+
+    for index, element in enumerate(elements):
+        text = (element.get("text") or "").strip()
+        if not text:
+            continue
+        tokens = estimate_tokens(text)
+
+        if element.get("type") in SECTION_BOUNDARY_TYPES:
+            flush(keep_overlap=False)
+
+        if tokens > max_tokens:
+            flush(keep_overlap=False)
+            for piece in _split_words(text, max_tokens, overlap_tokens):
+                chunks.append({"text": piece, "element_start": index, "element_end": index})
+            continue
+
+        if window and window_tokens + tokens > max_tokens:
+            flush(keep_overlap=True)
+            # The carried overlap must still leave room for the new element
+            while window and window_tokens + tokens > max_tokens:
+                window_tokens -= window.pop(0)[2]
+
+        window.append((index, text, tokens))
+        window_tokens += tokens
+
+    flush(keep_overlap=False)
+    return chunks
+
+
+def _split_words(text: str, max_tokens: int, overlap_tokens: int) -> List[str]:
+    words = text.split()
+    step = max(1, max_tokens - overlap_tokens)
+    pieces = []
+    for start in range(0, len(words), step):
+        pieces.append(" ".join(words[start:start + max_tokens]))
+        if start + max_tokens >= len(words):
+            break
+    return pieces
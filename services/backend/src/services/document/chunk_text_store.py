@@ -0,0 +1,169 @@
+import mmap
+import os
+import struct
+import uuid
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+# Record header: point ID, identifier length, text length (TOMBSTONE marks a deleted point)
+_HEADER = struct.Struct("<16sHI")
+_TOMBSTONE = 0xFFFFFFFF
+# Compact on open once dead records take more space than live ones (and at least this much)
+COMPACT_MIN_GARBAGE_BYTES = 1024 * 1024
+
+
+class ChunkTextStore:
+    """
+    Append-only, memory-mapped store of chunk texts keyed by point ID.
+
+    Every put appends a record, the latest record of a point wins and deletions append a
+    tombstone. The offsets of the live records are kept in memory and rebuilt by scanning the
+    file on open, dead records are dropped by rewriting the file when they dominate it.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._offsets: Dict[bytes, Tuple[int, int]] = {}  # point ID -> (text offset, text length)
+        self._point_ids_by_identifier: Dict[str, Set[bytes]] = {}
+        self._identifier_by_point_id: Dict[bytes, str] = {}
+        self._live_bytes = 0
+        self._garbage_bytes = 0
+
+        open(path, "ab").close()
+        self._load()
+        if self._garbage_bytes > max(self._live_bytes, COMPACT_MIN_GARBAGE_BYTES):
+            self._compact()
+
+        self._file = open(path, "ab")
+        self._size = self._file.tell()
+        # The append handle is write-only, reads are mapped through their own handle
+        self._reader = open(path, "rb")
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+
+    def put_many(self, entries: Iterable[Tuple[str, str, str]]):
+        """Stores (point ID, document identifier, text) entries, replacing earlier texts of the points."""
+        for point_id, identifier, text in entries:
+            key = uuid.UUID(point_id).bytes
+            identifier_bytes = identifier.encode("utf-8")
+            text_bytes = text.encode("utf-8")
+            self._file.write(_HEADER.pack(key, len(identifier_bytes), len(text_bytes)))
+            self._file.write(identifier_bytes)
+            self._file.write(text_bytes)
+            text_offset = self._size + _HEADER.size + len(identifier_bytes)
+            self._size = text_offset + len(text_bytes)
+            self._set(key, identifier, text_offset, len(text_bytes))
+        self._file.flush()
+
+    def get_many(self, point_ids: Iterable[str]) -> Dict[str, str]:
+        """Returns the stored texts of the given points, points without a text are left out."""
+        texts = {}
+        for point_id in point_ids:
+            location = self._offsets.get(uuid.UUID(str(point_id)).bytes)
+            if location is None:
+                continue
+            offset, length = location
+            texts[str(point_id)] = self._read(offset, length)
+        return texts
+
+    def delete(self, point_ids: Iterable[str]):
+        for point_id in point_ids:
+            key = uuid.UUID(str(point_id)).bytes
+            if key in self._offsets:
+                self._append_tombstone(key)
+        self._file.flush()
+
+    def delete_identifier(self, identifier: str):
+        for key in list(self._point_ids_by_identifier.get(identifier, ())):
+            self._append_tombstone(key)
+        self._file.flush()
+
+    def get_metrics(self) -> dict:
+        return {
+            "points": len(self._offsets),
+            "live_bytes": self._live_bytes,
+            "garbage_bytes": self._garbage_bytes,
+        }
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._reader.close()
+        self._file.close()
+
+    def _read(self, offset: int, length: int) -> str:
+        if self._map is None or offset + length > self._mapped_size:
+            # The file grew since it was mapped
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._reader.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._map)
+        return self._map[offset:offset + length].decode("utf-8")
+
+    def _append_tombstone(self, key: bytes):
+        self._file.write(_HEADER.pack(key, 0, _TOMBSTONE))
+        self._size += _HEADER.size
+        self._remove(key)
+        self._garbage_bytes += _HEADER.size
+
+    def _set(self, key: bytes, identifier: str, text_offset: int, text_length: int):
+        self._remove(key)
+        self._offsets[key] = (text_offset, text_length)
+        self._identifier_by_point_id[key] = identifier
+        self._point_ids_by_identifier.setdefault(identifier, set()).add(key)
+        self._live_bytes += text_length
+
+    def _remove(self, key: bytes):
+        location = self._offsets.pop(key, None)
+        if location is None:
+            return
+        self._live_bytes -= location[1]
+        self._garbage_bytes += location[1]
+        identifier = self._identifier_by_point_id.pop(key)
+        point_ids = self._point_ids_by_identifier[identifier]
+        point_ids.discard(key)
+        if not point_ids:
+            del self._point_ids_by_identifier[identifier]
+
+    def _load(self):
+        with open(self._path, "rb") as file:
+            data = file.read()
+        offset = 0
+        while offset + _HEADER.size <= len(data):
+            key, identifier_length, text_length = _HEADER.unpack_from(data, offset)
+            if text_length == _TOMBSTONE:
+                self._remove(key)
+                self._garbage_bytes += _HEADER.size
+                offset += _HEADER.size
+                continue
+            text_offset = offset + _HEADER.size + identifier_length
+            if text_offset + text_length > len(data):
+                break
+            identifier = data[offset + _HEADER.size:text_offset].decode("utf-8")
+            self._set(key, identifier, text_offset, text_length)
+            offset = text_offset + text_length
+        if offset < len(data):
+            # Drop a record torn by a crash, later appends would be misread after it
+            with open(self._path, "r+b") as file:
+                file.truncate(offset)
+
+    def _compact(self):
+        compacted_path = f"{self._path}.compact"
+        with open(self._path, "rb") as source, open(compacted_path, "wb") as target:
+            for key, (text_offset, text_length) in list(self._offsets.items()):
+                source.seek(text_offset)
+                text_bytes = source.read(text_length)
+                identifier_bytes = self._identifier_by_point_id[key].encode("utf-8")
+                target.write(_HEADER.pack(key, len(identifier_bytes), text_length))
+                target.write(identifier_bytes)
+                target.write(text_bytes)
+        os.replace(compacted_path, self._path)
+        self._offsets.clear()
+        self._identifier_by_point_id.clear()
+        self._point_ids_by_identifier.clear()
+        self._live_bytes = 0
+        self._garbage_bytes = 0
+        self._load()
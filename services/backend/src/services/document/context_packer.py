@@ -0,0 +1,149 @@
+import re
+from typing import List, Optional, Tuple
+
+from .chunk_assembler import estimate_tokens
+
+# Score factor per chunk of distance between a neighbour and the closest hit chunk
+PROXIMITY_DECAY = 0.5
+# Marks skipped chunks between two packed spans of the same document
+GAP_MARKER = "[...]"
+
+_WORD_PATTERN = re.compile(r"\S+")
+
+
+def pack_context(context_obj: dict, token_budget: int) -> Tuple[dict, dict]:
+    """
+    Packs retrieved document windows into a token budget for the final prompt.
+
+    Chunks whose text was already packed (e.g. the same paragraph in two documents) are dropped.
+    Hit chunks rank by their search score, neighbours by the score of the closest hit decayed
+    with their distance. Chunks are taken best first while they fit the budget and are put back
+    in document order. Overlap carried between consecutive chunks is only removed when the
+    preceding chunk is packed too, so a chunk packed on its own keeps its full text.
+
+    Args:
+        context_obj: The result of DocumentService.retrieve_and_enrich_context, best documents first.
+        token_budget: Estimated tokens the packed context may use.
+
+    Returns:
+        The packed context ({identifier: {"text_content", "best_score", "retrieved_chunks",
+        "packed_chunks"}}, documents without packed chunks are left out) and token usage
+        ({"budget", "retrieved", "used", "trimmed"}).
+    """
+    candidates = []
+    packed_texts = set()
+    retrieved_tokens = 0
+    for document_rank, (identifier, document) in enumerate(context_obj.items()):
+        chunks = document.get("chunks") or [{
+            "chunk_sequence": 0, "text_content": document["text_content"],
+            "element_start": None, "element_end": None, "score": document["best_score"]
+        }]
+        hits = [(chunk["chunk_sequence"], chunk["score"]) for chunk in chunks if chunk["score"] is not None]
+        previous = None
+        for chunk in chunks:
+            text = chunk["text_content"]
+            tokens = estimate_tokens(text)
+            retrieved_tokens += tokens
+            # Text of the chunk when its predecessor is packed right before it
+            stripped = None
+            if previous is not None and _overlaps(previous, chunk):
+                stripped = _strip_overlap(previous["text_content"], text)
+            previous = chunk
+
+            normalised = " ".join(text.split())
+            if not normalised or normalised in packed_texts:
+                continue
+            packed_texts.add(normalised)
+            candidates.append(_Candidate(
+                _chunk_score(chunk["chunk_sequence"], hits, document["best_score"]), document_rank,
+                chunk["chunk_sequence"], identifier, text, tokens, stripped
+            ))
+
+    candidates.sort(key=lambda candidate: (-candidate.score, candidate.document_rank, candidate.sequence))
+    used_tokens = 0
+    selected = {}  # identifier -> {chunk sequence: candidate}
+    for candidate in candidates:
+        document_chunks = selected.setdefault(candidate.identifier, {})
+        cost = candidate.packed_tokens(candidate.sequence - 1 in document_chunks)
+        successor = document_chunks.get(candidate.sequence + 1)
+        if successor is not None:
+            # Packing this chunk lets the successor drop its overlap
+            cost -= successor.packed_tokens(False) - successor.packed_tokens(True)
+        if used_tokens + cost > token_budget:
+            continue
+        document_chunks[candidate.sequence] = candidate
+        used_tokens += cost
+
+    packed = {}
+    for identifier, document in context_obj.items():
+        document_chunks = selected.get(identifier)
+        if not document_chunks:
+            continue
+        parts = []
+        last_sequence = None
+        for sequence in sorted(document_chunks):
+            text = document_chunks[sequence].packed_text(sequence - 1 in document_chunks)
+            if last_sequence is not None and sequence != last_sequence + 1:
+                parts.append(GAP_MARKER)
+            if text:
+                parts.append(text)
+            last_sequence = sequence
+        packed[identifier] = {
+            "text_content": "\n".join(parts),
+            "best_score": document["best_score"],
+            "retrieved_chunks": document["retrieved_chunks"],
+            "packed_chunks": len(document_chunks),
+        }
+
+    return packed, {
+        "budget": token_budget,
+        "retrieved": retrieved_tokens,
+        "used": used_tokens,
+        "trimmed": retrieved_tokens - used_tokens,
+    }
+
+
+class _Candidate:
+    __slots__ = ("score", "document_rank", "sequence", "identifier", "text", "tokens", "stripped", "stripped_tokens")
+
+    def __init__(self, score: float, document_rank: int, sequence: int, identifier: str, text: str,
+                 tokens: int, stripped: Optional[str]):
+        self.score = score
+        self.document_rank = document_rank
+        self.sequence = sequence
+        self.identifier = identifier
+        self.text = text
+        self.tokens = tokens
+        self.stripped = stripped
+        self.stripped_tokens = estimate_tokens(stripped) if stripped is not None else tokens
+
+    def packed_text(self, predecessor_packed: bool) -> str:
+        return self.stripped if predecessor_packed and self.stripped is not None else self.text
+
+    def packed_tokens(self, predecessor_packed: bool) -> int:
+        return self.stripped_tokens if predecessor_packed else self.tokens
+
+
+def _chunk_score(sequence: int, hits: List[Tuple[int, float]], best_score: float) -> float:
+    if not hits:
+        return best_score * PROXIMITY_DECAY
+    return max(score * PROXIMITY_DECAY ** abs(sequence - hit_sequence) for hit_sequence, score in hits)
+
+
+def _overlaps(previous: dict, chunk: dict) -> bool:
+    """Consecutive chunks sharing parsed elements repeat the overlap carried by chunk assembly."""
+    previous_end: Optional[int] = previous.get("element_end")
+    start: Optional[int] = chunk.get("element_start")
+    return chunk["chunk_sequence"] == previous["chunk_sequence"] + 1 \
+        and previous_end is not None and start is not None and start <= previous_end
+
+
+def _strip_overlap(previous_text: str, text: str) -> str:
+    """Removes the longest run of leading words of text that ends previous_text."""
+    previous_words = previous_text.split()
+    matches = list(_WORD_PATTERN.finditer(text))
+    words = [match.group() for match in matches]
+    for count in range(min(len(previous_words), len(words)), 0, -1):
+        if words[:count] == previous_words[-count:]:
+            return text[matches[count - 1].end():].lstrip()
+    return text
@@ -0,0 +1,74 @@
+import sys
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+WindowKey = Tuple[str, str, Tuple[int, ...]]
+
+
+class ContextWindowCache:
+    """
+    LRU cache of stitched context windows keyed by (identifier, document hash, sequence set),
+    bounded by the approximate memory held by the cached texts.
+    """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._windows: "OrderedDict[WindowKey, dict]" = OrderedDict()
+        self._sizes: Dict[WindowKey, int] = {}
+        self._keys_by_identifier: Dict[str, Set[WindowKey]] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, identifier: str, document_hash: str, sequences: Iterable[int]) -> Optional[dict]:
+        key = (identifier, document_hash, tuple(sorted(sequences)))
+        window = self._windows.get(key)
+        if window is None:
+            self.misses += 1
+            return None
+        self._windows.move_to_end(key)
+        self.hits += 1
+        return window
+
+    def put(self, identifier: str, document_hash: str, sequences: Iterable[int], window: dict):
+        key = (identifier, document_hash, tuple(sorted(sequences)))
+        size = sys.getsizeof(window["text_content"])
+        if size > self._max_bytes:
+            return
+        self._remove(key)
+        self._windows[key] = window
+        self._sizes[key] = size
+        self._keys_by_identifier.setdefault(identifier, set()).add(key)
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            self._remove(next(iter(self._windows)))
+            self.evictions += 1
+
+    def invalidate(self, identifier: str):
+        for key in list(self._keys_by_identifier.get(identifier, ())):
+            self._remove(key)
+
+    def get_metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._windows),
+            "bytes": self._bytes,
+            "max_bytes": self._max_bytes,
+        }
+
+    def _remove(self, key: WindowKey):
+        if key not in self._windows:
+            return
+        del self._windows[key]
+        self._bytes -= self._sizes.pop(key)
+        identifier_keys = self._keys_by_identifier.get(key[0])
+        if identifier_keys is not None:
+            identifier_keys.discard(key)
+            if not identifier_keys:
+                del self._keys_by_identifier[key[0]]
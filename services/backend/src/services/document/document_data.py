@@ -1,4 +1,6 @@
 class DocumentData:
+    __slots__ = ("identifier", "hash", "text_content")
+
     identifier: str
     hash: str
     text_content: str
@@ -0,0 +1,38 @@
+from typing import Dict, Optional
+
+
+class DocumentHashIndex:
+    """
+    In-process index of the content hash stored for every document identifier.
+    Lets the duplicate check run without a Qdrant round-trip.
+    """
+
+    def __init__(self):
+        self._hash_by_identifier: Dict[str, str] = {}
+        self._identifier_count_by_hash: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._hash_by_identifier)
+
+    def contains_hash(self, document_hash: str) -> bool:
+        return document_hash in self._identifier_count_by_hash
+
+    def get_hash(self, identifier: str) -> Optional[str]:
+        return self._hash_by_identifier.get(identifier)
+
+    def set(self, identifier: str, document_hash: Optional[str]):
+        """Records the hash of a document, None removes the document."""
+        previous_hash = self._hash_by_identifier.pop(identifier, None)
+        if previous_hash is not None:
+            remaining = self._identifier_count_by_hash[previous_hash] - 1
+            if remaining:
+                self._identifier_count_by_hash[previous_hash] = remaining
+            else:
+                del self._identifier_count_by_hash[previous_hash]
+        if document_hash is not None:
+            self._hash_by_identifier[identifier] = document_hash
+            self._identifier_count_by_hash[document_hash] = self._identifier_count_by_hash.get(document_hash, 0) + 1
+
+    def clear(self):
+        self._hash_by_identifier.clear()
+        self._identifier_count_by_hash.clear()
@@ -2,6 +2,8 @@ from .document_data import DocumentData
 
 
 class DocumentResult:
+    __slots__ = ("document_data", "score")
+
     document_data: DocumentData
     score: float
 
@@ -1,17 +1,62 @@
+import asyncio
 import hashlib
 import uuid
 import os
-import json
-from typing import List, Dict, Any
+from array import array
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional
 
-from qdrant_client.models import Filter, FieldCondition, MatchValue, PointStruct, MatchAny, Range, ScoredPoint
+import httpx
+from qdrant_client.models import Filter, FieldCondition, MatchValue, PointStruct, MatchAny, \
+    PointIdsList, SetPayload, SetPayloadOperation, Prefetch, FusionQuery, Fusion, SearchParams, QueryRequest
 
+from .chunk_assembler import assemble_chunks
+from .chunk_text_store import ChunkTextStore
+from .context_window_cache import ContextWindowCache
 from .document_data import DocumentData
+from .document_hash_index import DocumentHashIndex
 from .document_result import DocumentResult
+from .search_hit import SearchHit
+from .sparse_encoder import encode_document, encode_query
 from ..external.embedding_service import EmbeddingService
-from ..external.qdrant_service import QdrantService, DOCUMENTS_COLLECTION, DOCUMENT_IDENTIFIER_FIELD
+from ..external.qdrant_service import QdrantService, DOCUMENTS_COLLECTION, DOCUMENT_IDENTIFIER_FIELD, \
+    DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME
 from ..external.unstructured_service import UnstructuredService
 
+# Number of chunks sent to the embedding service per request
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 32))
+# Maximum number of batches being embedded/upserted at the same time per document
+INGEST_MAX_CONCURRENCY = int(os.getenv("INGEST_MAX_CONCURRENCY", 4))
+# Estimated token budget of one assembled chunk and the overlap carried into the next one
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", 256))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+# Page size used when scrolling the existing points of a document
+SCROLL_PAGE_SIZE = 256
+# Page size used when loading the document hash index at startup
+HASH_INDEX_PAGE_SIZE = 2048
+# Memory budget of the stitched context window cache
+CONTEXT_CACHE_MAX_BYTES = int(os.getenv("CONTEXT_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+# Optional local store of the chunk texts, Qdrant then only keeps vectors and a small payload. It is
+# the only copy of the texts and must live on persistent storage next to the Qdrant data
+CHUNK_TEXT_STORE_PATH = os.getenv("CHUNK_TEXT_STORE_PATH", "")
+# Payload loaded for search candidates, most of them are discarded so their text is not
+SEARCH_PAYLOAD_FIELDS = [DOCUMENT_IDENTIFIER_FIELD, "chunk_sequence", "hash"]
+# Payload loaded for the chunks of the selected context windows
+CONTEXT_PAYLOAD_FIELDS = [DOCUMENT_IDENTIFIER_FIELD, "chunk_sequence", "element_start", "element_end", "text_content"]
+# Minimum BM25 score (IDF weighted, summed over matched query terms) of sparse hybrid hits. A term
+# occurring in 1% of the chunks contributes about 4.6, one in half of them about 0.7
+HYBRID_SPARSE_SCORE_THRESHOLD = float(os.getenv("HYBRID_SPARSE_SCORE_THRESHOLD", 3.0))
+# Queries sent to Qdrant per batched query request
+SEARCH_BATCH_SIZE = 256
+# Payload fields returned by batch search when no projection is requested
+DEFAULT_SEARCH_PAYLOAD_FIELDS = ["hash", "text_content"]
+# Namespace of the deterministic point IDs, changing it orphans every stored point
+POINT_ID_NAMESPACE = uuid.UUID("47f9c0fd-2421-4714-8874-aa3de85fc981")
+
+
+def chunk_point_id(identifier: str, chunk_sequence: int) -> str:
+    """Point ID of a chunk, derived from its document and position so it can be addressed directly."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{identifier}\0{chunk_sequence}"))
+
 
 class DocumentService:
     def __init__(self, qdrant_service: QdrantService, embedding_service: EmbeddingService,
@@ -19,57 +64,313 @@ class DocumentService:
         self._qdrant_service = qdrant_service
         self._embedding_service = embedding_service
         self._unstructured_service = unstructured_service
+        self._hash_index = DocumentHashIndex()
+        self._hash_index_loaded = False
+        self._hash_index_lock = asyncio.Lock()
+        self._context_cache = ContextWindowCache(CONTEXT_CACHE_MAX_BYTES)
+        self._text_store: Optional[ChunkTextStore] = ChunkTextStore(CHUNK_TEXT_STORE_PATH) \
+            if CHUNK_TEXT_STORE_PATH else None
+        self._change_listeners: List[Callable[[str], None]] = []
+
+    def add_change_listener(self, listener: Callable[[str], None]):
+        """
+        Registers a callback invoked with the identifier of every inserted, re-ingested or deleted document,
+        once when the change starts and once more after an ingestion's writes finished.
+        """
+        self._change_listeners.append(listener)
+
+    def _document_changed(self, identifier: str):
+        self._context_cache.invalidate(identifier)
+        for listener in self._change_listeners:
+            listener(identifier)
+
+    async def initialize(self):
+        """Loads the hash of every stored document with a payload-only scroll."""
+        if self._hash_index_loaded:
+            return
+        async with self._hash_index_lock:
+            if self._hash_index_loaded:
+                return
+            qdrant = await self._qdrant_service.get_client()
+            point_count = 0
+            async for page in self._iter_point_pages(qdrant, None, [DOCUMENT_IDENTIFIER_FIELD, "hash"],
+                                                     HASH_INDEX_PAGE_SIZE):
+                for point in page:
+                    self._hash_index.set(point.payload.get(DOCUMENT_IDENTIFIER_FIELD), point.payload.get("hash"))
+                point_count += len(page)
+            self._hash_index_loaded = True
+            print(f"Loaded hash index for {len(self._hash_index)} documents ({point_count} points)")
 
     async def insert_document(self, identifier: str, raw_content: bytes, content_type: str = "text/plain"):
         document_hash = hashlib.sha256(raw_content).hexdigest()
+        await self.initialize()
+        if self._hash_index.contains_hash(document_hash):
+            return False
+        if self._hash_index.get_hash(identifier) is not None:
+            # Same identifier with different content, e.g. a file changed while nobody was watching
+            return await self.reingest_document(identifier, raw_content, content_type)
+
         qdrant = await self._qdrant_service.get_client()
-        query_result = await qdrant.query_points(
-            collection_name=DOCUMENTS_COLLECTION,
-            query_filter=Filter(must=[FieldCondition(key="hash", match=MatchValue(value=document_hash))]),
-            limit=1
-        )
-        if len(query_result.points) > 0:
+        # Claim the hash right away so concurrent inserts of the same content are skipped
+        self._hash_index.set(identifier, document_hash)
+        self._document_changed(identifier)
+        try:
+            filename = os.path.basename(identifier)
+            chunks = await self._parse_chunks(filename, content_type, raw_content)
+            await self._ingest_chunks(qdrant, identifier, document_hash, list(enumerate(chunks)))
+        except BaseException:
+            # Never leave a half-ingested document behind, the hash check would skip it forever
+            self._hash_index.set(identifier, None)
+            await self._delete_by_hash(identifier, document_hash)
+            raise
+        finally:
+            # Queries during the writes may have cached a partial window under the new hash
+            self._document_changed(identifier)
+        return True
+
+    async def reingest_document(self, identifier: str, raw_content: bytes, content_type: str = "text/plain"):
+        """
+        Re-ingests a modified document in place by diffing its chunks against the stored points.
+        Chunks that stayed at their sequence only get their payload updated, chunks that moved
+        are copied to their new point ID with their stored vector, only new or changed chunks are
+        embedded, and points past the new end of the document are deleted.
+        Returns False if the stored document already has the same content.
+        """
+        document_hash = hashlib.sha256(raw_content).hexdigest()
+        await self.initialize()
+        previous_hash = self._hash_index.get_hash(identifier)
+        if previous_hash == document_hash:
             return False
-        
+
+        qdrant = await self._qdrant_service.get_client()
+        existing_points = await self._scroll_document_points(qdrant, identifier, ["chunk_sequence", "chunk_hash"])
+        existing_by_id = {str(point.id): point for point in existing_points}
+        # Any stored point carrying a chunk hash can donate its vector
+        point_id_by_chunk_hash = {}
+        for point in existing_points:
+            chunk_hash = point.payload.get("chunk_hash")
+            if chunk_hash:
+                point_id_by_chunk_hash.setdefault(chunk_hash, str(point.id))
+
         filename = os.path.basename(identifier)
-        parsed_document = await self._unstructured_service.parse_document(filename, content_type, raw_content)
-        chunks = parsed_document.get("chunks", [])
-        embeddings = await self._embedding_service.embed_texts([chunk["text"] for chunk in chunks])
+        chunks = await self._parse_chunks(filename, content_type, raw_content)
 
-        points = []
-        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)): 
-            points.append(
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=embedding,
+        payload_updates = []
+        moved_chunks = []
+        new_chunks = []
+        for sequence, chunk in enumerate(chunks):
+            chunk_hash = DocumentService._hash_chunk(chunk["text"])
+            point_id = chunk_point_id(identifier, sequence)
+            current_point = existing_by_id.get(point_id)
+            if current_point is not None and current_point.payload.get("chunk_hash") == chunk_hash:
+                payload_updates.append(SetPayloadOperation(set_payload=SetPayload(
                     payload={
-                        "identifier": identifier,
                         "hash": document_hash,
-                        "chunk_sequence": i,
-                        "text_content": chunk["text"],
-                    }
-                )
+                        "element_start": chunk["element_start"],
+                        "element_end": chunk["element_end"],
+                    },
+                    points=[point_id]
+                )))
+            elif chunk_hash in point_id_by_chunk_hash:
+                moved_chunks.append((sequence, chunk, point_id_by_chunk_hash[chunk_hash]))
+            else:
+                new_chunks.append((sequence, chunk))
+        current_ids = {chunk_point_id(identifier, sequence) for sequence in range(len(chunks))}
+        stale_ids = [point.id for point in existing_points if str(point.id) not in current_ids]
+
+        print(f"Re-ingesting {identifier}: {len(payload_updates)} chunks kept, {len(moved_chunks)} moved, "
+              f"{len(new_chunks)} embedded, {len(stale_ids)} removed")
+        self._hash_index.set(identifier, document_hash)
+        self._document_changed(identifier)
+        try:
+            # Moved chunks may overwrite each other's source points, read every vector before writing
+            moved_vectors = await self._retrieve_vectors(qdrant, list({source for _, _, source in moved_chunks}))
+            await self._ingest_chunks(qdrant, identifier, document_hash, new_chunks)
+            for start in range(0, len(moved_chunks), INGEST_BATCH_SIZE):
+                batch = moved_chunks[start:start + INGEST_BATCH_SIZE]
+                self._store_texts(identifier, [(sequence, chunk) for sequence, chunk, _ in batch])
+                await qdrant.upsert(collection_name=DOCUMENTS_COLLECTION, points=[
+                    self._build_point(identifier, document_hash, sequence, chunk, moved_vectors[source].tolist())
+                    for sequence, chunk, source in batch
+                ])
+            if payload_updates:
+                await qdrant.batch_update_points(collection_name=DOCUMENTS_COLLECTION,
+                                                 update_operations=payload_updates)
+        except BaseException:
+            # Drop everything tagged with the new hash so the next attempt diffs again
+            self._hash_index.set(identifier, previous_hash)
+            await self._delete_by_hash(identifier, document_hash)
+            raise
+        else:
+            if stale_ids:
+                await qdrant.delete(collection_name=DOCUMENTS_COLLECTION,
+                                    points_selector=PointIdsList(points=stale_ids))
+                if self._text_store is not None:
+                    self._text_store.delete(stale_ids)
+        finally:
+            # Queries during the writes may have cached a partial window under the new hash
+            self._document_changed(identifier)
+        return True
+
+    async def _retrieve_vectors(self, qdrant, point_ids: List[str]) -> Dict[str, array]:
+        vectors = {}
+        for start in range(0, len(point_ids), SCROLL_PAGE_SIZE):
+            records = await qdrant.retrieve(collection_name=DOCUMENTS_COLLECTION,
+                                            ids=point_ids[start:start + SCROLL_PAGE_SIZE],
+                                            with_payload=False, with_vectors=True)
+            for record in records:
+                # Only the dense vector is copied, sparse vectors are cheap to recompute from the text
+                vector = record.vector
+                if isinstance(vector, dict):
+                    vector = vector[DENSE_VECTOR_NAME]
+                # float32 arrays keep large documents from ballooning while they wait to be rewritten
+                vectors[str(record.id)] = array("f", vector)
+        return vectors
+
+    async def _parse_chunks(self, filename: str, content_type: str, raw_content: bytes) -> List[dict]:
+        parsed_document = await self._unstructured_service.parse_document(filename, content_type, raw_content)
+        elements = parsed_document.get("chunks", [])
+        return assemble_chunks(elements, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS)
+
+    async def _scroll_document_points(self, qdrant, identifier: str, payload_fields: List[str]) -> List[Any]:
+        document_filter = Filter(must=[
+            FieldCondition(key=DOCUMENT_IDENTIFIER_FIELD, match=MatchValue(value=identifier))
+        ])
+        points = []
+        async for page in self._iter_point_pages(qdrant, document_filter, payload_fields, SCROLL_PAGE_SIZE):
+            points.extend(page)
+        return points
+
+    @staticmethod
+    async def _iter_point_pages(qdrant, scroll_filter: Optional[Filter], payload_fields: List[str],
+                                page_size: int) -> AsyncIterator[List[Any]]:
+        offset = None
+        while True:
+            page, offset = await qdrant.scroll(
+                collection_name=DOCUMENTS_COLLECTION,
+                scroll_filter=scroll_filter,
+                with_payload=payload_fields, with_vectors=False,
+                limit=page_size, offset=offset
             )
+            yield page
+            if offset is None:
+                return
+
+    async def _ingest_chunks(self, qdrant, identifier: str, document_hash: str, chunks: List[tuple[int, dict]]):
+        """
+        Streams the embeddings of (chunk_sequence, chunk) pairs in micro-batches and upserts every
+        batch as soon as its vectors arrive, while later batches are still being encoded. At most
+        INGEST_MAX_CONCURRENCY upserts are in flight and the stream is not read further until one
+        finishes, so memory stays bounded by INGEST_BATCH_SIZE * INGEST_MAX_CONCURRENCY chunks
+        regardless of the document size.
+        """
+        pending = set()
+        stream = self._embedding_service.embed_stream([chunk["text"] for _, chunk in chunks], INGEST_BATCH_SIZE)
+        try:
+            async for start, embeddings in stream:
+                if len(pending) >= INGEST_MAX_CONCURRENCY:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                batch = chunks[start:start + len(embeddings)]
+                pending.add(asyncio.create_task(
+                    self._upsert_batch(qdrant, identifier, document_hash, batch, embeddings)
+                ))
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                for task in done:
+                    task.result()
+        finally:
+            # On failure, stop the stream and the remaining batches before the caller cleans up
+            await stream.aclose()
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _upsert_batch(self, qdrant, identifier: str, document_hash: str, batch: List[tuple[int, dict]],
+                            embeddings) -> None:
+        # Texts first, a point visible in Qdrant must always find its text
+        self._store_texts(identifier, batch)
+
+        points = [
+            self._build_point(identifier, document_hash, sequence, chunk, embedding)
+            for (sequence, chunk), embedding in zip(batch, embeddings)
+        ]
         await qdrant.upsert(collection_name=DOCUMENTS_COLLECTION, points=points)
-        return True
+
+    def _build_point(self, identifier: str, document_hash: str, sequence: int, chunk: dict,
+                     vector: List[float]) -> PointStruct:
+        if self._qdrant_service.sparse_vectors_enabled:
+            vector = {DENSE_VECTOR_NAME: vector, SPARSE_VECTOR_NAME: encode_document(chunk["text"])}
+        payload = {
+            "identifier": identifier,
+            "hash": document_hash,
+            "chunk_sequence": sequence,
+            "chunk_hash": DocumentService._hash_chunk(chunk["text"]),
+            "element_start": chunk["element_start"],
+            "element_end": chunk["element_end"],
+        }
+        if self._text_store is None:
+            payload["text_content"] = chunk["text"]
+        return PointStruct(id=chunk_point_id(identifier, sequence), vector=vector, payload=payload)
+
+    def _store_texts(self, identifier: str, chunks: List[tuple[int, dict]]):
+        if self._text_store is not None:
+            self._text_store.put_many(
+                (chunk_point_id(identifier, sequence), identifier, chunk["text"]) for sequence, chunk in chunks
+            )
+
+    def _fill_texts(self, points: List[Any]):
+        """Sets text_content from the chunk text store on points whose payload does not carry it."""
+        if self._text_store is None:
+            return
+        missing = [point for point in points if point.payload.get("text_content") is None]
+        texts = self._text_store.get_many(point.id for point in missing)
+        for point in missing:
+            text = texts.get(str(point.id))
+            if text is not None:
+                point.payload["text_content"] = text
+
+    @staticmethod
+    def _hash_chunk(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
     async def retrieve_and_enrich_context(self, 
                                             query_vector: List[float], 
                                             neighbor_count: int, 
                                             score_threshold: float, 
                                             top_k_docs: int,
-                                            retrieval_limit: int = 20) -> Dict[str, Any]:
-        
+                                            retrieval_limit: int = 20,
+                                            query_text: Optional[str] = None,
+                                            rerank_query: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Retrieves the best matching documents and stitches their hit chunks and neighbours into
+        context windows. With query_text, dense and BM25 sparse results are fused with reciprocal
+        rank fusion over the dense hits above score_threshold and the sparse hits above
+        HYBRID_SPARSE_SCORE_THRESHOLD, so an empty result still means nothing relevant was found.
+        best_score is then the fused rank score, it orders documents but is not a cosine similarity. With
+        rerank_query, the hits are re-scored by the cross-encoder before documents are picked.
+        """
         qdrant = await self._qdrant_service.get_client()
 
         # Step 1 & 2: Get all chunks > threshold
-        search_results = await qdrant.search(
-            collection_name=DOCUMENTS_COLLECTION,
-            query_vector=query_vector,
-            limit=retrieval_limit,
-            with_payload=True,
-            score_threshold=score_threshold
-        )
+        if query_text is not None and self._qdrant_service.sparse_vectors_enabled:
+            search_results = await self._hybrid_search(qdrant, query_vector, query_text,
+                                                       score_threshold, retrieval_limit,
+                                                       self._qdrant_service.search_params)
+        else:
+            search_results = await qdrant.search(
+                collection_name=DOCUMENTS_COLLECTION,
+                query_vector=query_vector,
+                limit=retrieval_limit,
+                with_payload=SEARCH_PAYLOAD_FIELDS,
+                score_threshold=score_threshold,
+                search_params=self._qdrant_service.search_params
+            )
+
+        # Step 2b: Reorder the candidates by cross-encoder relevance
+        if rerank_query is not None and search_results:
+            search_results = await self._rerank(qdrant, rerank_query, search_results)
 
         # Step 3: Group by doc_id
         doc_groups = {}
@@ -101,30 +402,48 @@ class DocumentService:
                         sequences_to_fetch.add(i)
             fetch_requests[doc_id] = sorted(list(sequences_to_fetch))
 
-        # Step 6: Retrieve all chunks
-        all_context_points = []
+        # Step 6: Serve cached windows, retrieve the chunks of all other documents by ID in a single request
+        windows = {}
+        uncached_docs = []
         for doc_id, sequences in fetch_requests.items():
-            if not sequences:
-                continue
-            
-            min_seq, max_seq = min(sequences), max(sequences)
-            
-            neighbor_filter = Filter(
-                must=[
-                    FieldCondition(key=DOCUMENT_IDENTIFIER_FIELD, match=MatchValue(value=doc_id)),
-                    FieldCondition(key="chunk_sequence", range=Range(gte=min_seq, lte=max_seq))
-                ]
-            )
+            document_hash = top_groups[doc_id][0].payload.get("hash")
+            window = self._context_cache.get(doc_id, document_hash, sequences)
+            if window is not None:
+                windows[doc_id] = window
+            else:
+                uncached_docs.append(doc_id)
 
-            retrieved_data, _ = await qdrant.scroll(
-                collection_name=DOCUMENTS_COLLECTION,
-                scroll_filter=neighbor_filter, 
-                with_payload=True, with_vectors=False, limit=50
+        # Documents stored before point IDs were derived keep random IDs until they are re-ingested,
+        # their neighbours can only be found by filtering on the chunk sequence
+        legacy_docs = [
+            doc_id for doc_id in uncached_docs
+            if any(str(point.id) != chunk_point_id(doc_id, point.payload.get("chunk_sequence", -1))
+                   for point in top_groups[doc_id])
+        ]
+        point_ids = [
+            chunk_point_id(doc_id, sequence)
+            for doc_id in uncached_docs if doc_id not in legacy_docs
+            for sequence in fetch_requests[doc_id]
+        ]
+        # The hits themselves are always part of the context, even if their ID is not derived
+        point_ids.extend(str(point.id) for doc_id in uncached_docs for point in top_groups[doc_id])
+        point_ids = list(dict.fromkeys(point_ids))
+        all_context_points = []
+        if point_ids:
+            # Text is only loaded here, for the chunks of the selected windows
+            all_context_points = await qdrant.retrieve(
+                collection_name=DOCUMENTS_COLLECTION, ids=point_ids,
+                with_payload=CONTEXT_PAYLOAD_FIELDS, with_vectors=False
             )
-            
-            for point in retrieved_data:
-                if point.payload.get("chunk_sequence") in sequences:
-                    all_context_points.append(point)
+        for doc_id in legacy_docs:
+            neighbour_filter = Filter(must=[
+                FieldCondition(key=DOCUMENT_IDENTIFIER_FIELD, match=MatchValue(value=doc_id)),
+                FieldCondition(key="chunk_sequence", match=MatchAny(any=fetch_requests[doc_id]))
+            ])
+            async for page in self._iter_point_pages(qdrant, neighbour_filter, CONTEXT_PAYLOAD_FIELDS,
+                                                     SCROLL_PAGE_SIZE):
+                all_context_points.extend(page)
+        self._fill_texts(all_context_points)
 
         # Step 7: Process and format
         documents_map = {}
@@ -136,28 +455,99 @@ class DocumentService:
             if doc_id and text:
                 if doc_id not in documents_map:
                     documents_map[doc_id] = {}
-                documents_map[doc_id][sequence] = text
+                documents_map[doc_id][sequence] = point.payload
 
-        # Build the final context object with all the metadata
-        context_obj = {}
         for doc_id, chunk_dict in documents_map.items():
-            # Ensure we only return docs that were in the top_k
-            if doc_id in top_groups:
-                sorted_sequences = sorted(chunk_dict.keys())
-                full_doc_text = "\n".join(chunk_dict[s] for s in sorted_sequences)
-                
+            windows[doc_id] = DocumentService._stitch_window(chunk_dict)
+            document_hash = top_groups[doc_id][0].payload.get("hash")
+            self._context_cache.put(doc_id, document_hash, fetch_requests[doc_id], windows[doc_id])
+
+        # Build the final context object with all the metadata, best documents first
+        context_obj = {}
+        for doc_id in top_groups:
+            if doc_id in windows:
+                window = windows[doc_id]
+                hit_scores = {}
+                for point in top_groups[doc_id]:
+                    sequence = point.payload.get("chunk_sequence", -1)
+                    hit_scores[sequence] = max(point.score, hit_scores.get(sequence, point.score))
                 context_obj[doc_id] = {
-                    "text_content": full_doc_text,
+                    "text_content": window["text_content"],
                     "best_score": doc_best_scores[doc_id],
-                    "retrieved_chunks": len(chunk_dict)
+                    "retrieved_chunks": window["retrieved_chunks"],
+                    # Per chunk view for context packing, score is only set on the hit chunks
+                    "chunks": [
+                        {"chunk_sequence": sequence, "text_content": window["text_content"][start:end],
+                         "element_start": element_start, "element_end": element_end,
+                         "score": hit_scores.get(sequence)}
+                        for sequence, start, end, element_start, element_end in window["chunks"]
+                    ]
                 }
             
         return context_obj
+
+    async def _rerank(self, qdrant, query: str, points: List[Any]) -> List[Any]:
+        # Candidates are searched without their text, the cross-encoder needs it
+        records = await qdrant.retrieve(collection_name=DOCUMENTS_COLLECTION, ids=[point.id for point in points],
+                                        with_payload=["text_content"], with_vectors=False)
+        self._fill_texts(records)
+        texts = {str(record.id): record.payload.get("text_content") or "" for record in records}
+        try:
+            scores = await self._embedding_service.rerank(query, [texts.get(str(point.id), "") for point in points])
+        except httpx.HTTPError as e:
+            # Reranking only sharpens the ranking, keep the search order when it is unavailable
+            print(f"Rerank failed, keeping search order: {e}")
+            return points
+        for point, score in zip(points, scores):
+            point.score = score
+        return sorted(points, key=lambda point: point.score, reverse=True)
+
+    @staticmethod
+    def _stitch_window(chunk_payloads: Dict[int, dict]) -> dict:
+        """
+        Joins the chunks of a document in sequence order. Chunks are kept as character spans
+        into the stitched text, so cached windows hold every text only once.
+        """
+        texts = []
+        chunks = []
+        offset = 0
+        for sequence in sorted(chunk_payloads.keys()):
+            payload = chunk_payloads[sequence]
+            text = payload["text_content"]
+            if texts:
+                offset += 1  # newline separator
+            chunks.append((sequence, offset, offset + len(text),
+                           payload.get("element_start"), payload.get("element_end")))
+            texts.append(text)
+            offset += len(text)
+        return {"text_content": "\n".join(texts), "retrieved_chunks": len(chunks), "chunks": chunks}
+
+    @staticmethod
+    async def _hybrid_search(qdrant, query_vector: List[float], query_text: str, score_threshold: float,
+                             retrieval_limit: int, search_params: Optional[SearchParams]) -> List[Any]:
+        prefetch = [Prefetch(query=query_vector, limit=retrieval_limit, score_threshold=score_threshold,
+                             params=search_params)]
+        sparse_query = encode_query(query_text)
+        if sparse_query.indices:
+            # Without a minimum nearly every query shares some term with some chunk, and fusion
+            # would always return hits, whatever the dense threshold
+            prefetch.append(Prefetch(query=sparse_query, using=SPARSE_VECTOR_NAME, limit=retrieval_limit,
+                                     score_threshold=HYBRID_SPARSE_SCORE_THRESHOLD))
+        response = await qdrant.query_points(
+            collection_name=DOCUMENTS_COLLECTION,
+            prefetch=prefetch,
+            query=FusionQuery(fusion=Fusion.RRF),
+            limit=retrieval_limit,
+            with_payload=SEARCH_PAYLOAD_FIELDS
+        )
+        return response.points
     
     async def search(self, query: str, limit: int = 5) -> List[DocumentResult]:
         query_embedding = (await self._embedding_service.embed_texts([query]))[0]
         qdrant = await self._qdrant_service.get_client()
-        query_result = await qdrant.query_points(DOCUMENTS_COLLECTION, query_embedding, limit=limit)
+        query_result = await qdrant.query_points(DOCUMENTS_COLLECTION, query_embedding, limit=limit,
+                                                 search_params=self._qdrant_service.search_params)
+        self._fill_texts(query_result.points)
         hits = []
         for point in query_result.points:
             identifier = point.payload.get("identifier")
@@ -167,7 +557,80 @@ class DocumentService:
             hits.append(document_result)
         return hits
 
+    async def search_batch(self, queries: List[str], limit: int = 5,
+                           payload_fields: Optional[List[str]] = None) -> List[List[SearchHit]]:
+        """
+        Searches many queries at once: all queries are embedded in one call and sent to Qdrant as
+        batched query requests. Only the payload_fields (default hash and text_content) are loaded,
+        pass an empty list to get identifiers and scores only.
+        Returns the hits of every query, in query order.
+        """
+        if not queries:
+            return []
+        if payload_fields is None:
+            payload_fields = DEFAULT_SEARCH_PAYLOAD_FIELDS
+        selected_fields = list(dict.fromkeys([DOCUMENT_IDENTIFIER_FIELD, "chunk_sequence", *payload_fields]))
+
+        query_embeddings = await self._embedding_service.embed_texts(queries)
+        qdrant = await self._qdrant_service.get_client()
+        responses = []
+        for start in range(0, len(query_embeddings), SEARCH_BATCH_SIZE):
+            responses.extend(await qdrant.query_batch_points(
+                collection_name=DOCUMENTS_COLLECTION,
+                requests=[
+                    QueryRequest(query=embedding, limit=limit, with_payload=selected_fields,
+                                 params=self._qdrant_service.search_params)
+                    for embedding in query_embeddings[start:start + SEARCH_BATCH_SIZE]
+                ]
+            ))
+
+        results = []
+        for response in responses:
+            if "text_content" in payload_fields:
+                self._fill_texts(response.points)
+            hits = []
+            for point in response.points:
+                payload = point.payload or {}
+                projected = {field: payload[field] for field in payload_fields if field in payload}
+                hits.append(SearchHit(payload.get(DOCUMENT_IDENTIFIER_FIELD), payload.get("chunk_sequence"),
+                                      point.score, projected or None))
+            results.append(hits)
+        return results
+
+    async def _delete_by_hash(self, identifier: str, document_hash: str):
+        qdrant = await self._qdrant_service.get_client()
+        await qdrant.delete(
+            collection_name=DOCUMENTS_COLLECTION,
+            points_selector=Filter(
+                must=[
+                    FieldCondition(key="identifier", match=MatchValue(value=identifier)),
+                    FieldCondition(key="hash", match=MatchValue(value=document_hash))
+                ]
+            )
+        )
+
+    def get_metrics(self) -> dict:
+        return {
+            "hash_index": {"loaded": self._hash_index_loaded, "documents": len(self._hash_index)},
+            "context_cache": self._context_cache.get_metrics(),
+            "text_store": self._text_store.get_metrics() if self._text_store is not None else None
+        }
+
+    def dispose(self):
+        if self._text_store is not None:
+            self._text_store.close()
+
     async def delete_by_identifier(self, identifier: str):
+        await self.delete_by_identifiers([identifier])
+
+    async def delete_by_identifiers(self, identifiers: List[str]):
+        """Deletes all points of the given documents with a single filtered delete."""
+        if not identifiers:
+            return
+        await self.initialize()
+        for identifier in identifiers:
+            self._hash_index.set(identifier, None)
+            self._document_changed(identifier)
         qdrant = await self._qdrant_service.get_client()
         await qdrant.delete(
             collection_name=DOCUMENTS_COLLECTION,
@@ -175,8 +638,11 @@ class DocumentService:
                 must=[
                     FieldCondition(
                         key="identifier",
-                        match=MatchValue(value=identifier)
+                        match=MatchAny(any=identifiers)
                     )
                 ]
             )
-        )
\ No newline at end of file
+        )
+        if self._text_store is not None:
+            for identifier in identifiers:
+                self._text_store.delete_identifier(identifier)
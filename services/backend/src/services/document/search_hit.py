@@ -0,0 +1,25 @@
+from typing import Optional
+
+
+class SearchHit:
+    """Compact chunk hit of a batch search, payload only holds the projected fields."""
+    __slots__ = ("identifier", "chunk_sequence", "score", "payload")
+
+    identifier: str
+    chunk_sequence: int
+    score: float
+    payload: Optional[dict]
+
+    def __init__(self, identifier: str, chunk_sequence: int, score: float, payload: Optional[dict]):
+        self.identifier = identifier
+        self.chunk_sequence = chunk_sequence
+        self.score = score
+        self.payload = payload
+
+    def to_dict(self) -> dict:
+        return {
+            "identifier": self.identifier,
+            "chunk_sequence": self.chunk_sequence,
+            "score": self.score,
+            **(self.payload or {}),
+        }
@@ -0,0 +1,48 @@
+import os
+import re
+import zlib
+from collections import Counter
+from typing import List
+
+from qdrant_client.models import SparseVector
+
+# BM25 term frequency saturation and length normalisation, IDF is applied by Qdrant (Modifier.IDF)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Expected word count of an assembled chunk, the length normalisation pivot
+BM25_AVG_CHUNK_TOKENS = float(os.getenv("BM25_AVG_CHUNK_TOKENS", 200))
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have how i if in into is it its
+me my no not of on or our so than that the their them then there these they this to was we were
+what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _term_index(term: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def encode_document(text: str) -> SparseVector:
+    """BM25 term weights of a chunk, without the IDF factor."""
+    tokens = tokenize(text)
+    length_norm = 1 - BM25_B + BM25_B * len(tokens) / BM25_AVG_CHUNK_TOKENS
+    weights = {}
+    for term, frequency in Counter(tokens).items():
+        index = _term_index(term)
+        weights[index] = weights.get(index, 0.0) + \
+            frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+    return SparseVector(indices=list(weights.keys()), values=list(weights.values()))
+
+
+def encode_query(text: str) -> SparseVector:
+    """Every distinct query term weighs one, so the dot product sums the matched document weights."""
+    indices = sorted({_term_index(term) for term in tokenize(text)})
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
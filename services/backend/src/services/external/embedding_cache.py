@@ -0,0 +1,178 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with an in-memory LRU tier backed by SQLite.
+
+    Keys are sha256(model name + text), vectors are stored as float32 blobs. The store remembers
+    the model it was filled with and is cleared when a different model is activated.
+    """
+
+    def __init__(self, path: str, memory_entries: int, max_entries: int):
+        self._memory_entries = memory_entries
+        self._max_entries = max_entries
+        # float32 arrays take a fraction of the memory of Python float lists
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._model: Optional[str] = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._db.commit()
+        self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def model(self) -> Optional[str]:
+        return self._model
+
+    async def activate_model(self, model: str):
+        """Select the embedding model, dropping all entries if the store was built with another one."""
+        if self._model == model:
+            return
+        await asyncio.to_thread(self._activate_model, model)
+
+    def _activate_model(self, model: str):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'model'").fetchone()
+            if row is not None and row[0] != model:
+                print(f"Embedding model changed from {row[0]} to {model}, clearing embedding cache")
+                self._db.execute("DELETE FROM embeddings")
+                self._disk_entries = 0
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model', ?)", (model,))
+            self._db.commit()
+            self._memory.clear()
+            self._model = model
+
+    async def get_many(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """
+        Returns the cached vectors of the given texts as read-only float32 arrays, keyed by their
+        index in the list. The arrays share memory with the cache entries instead of copying them.
+        """
+        keys = [self._key(text) for text in texts]
+        found = {}
+        disk_lookups = {}
+        with self._lock:
+            for index, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[index] = EmbeddingCache._as_ndarray(vector)
+                    self.memory_hits += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(index)
+
+        if disk_lookups:
+            rows = await asyncio.to_thread(self._read_disk, list(disk_lookups.keys()))
+            for key, vector in rows.items():
+                for index in disk_lookups[key]:
+                    found[index] = EmbeddingCache._as_ndarray(vector)
+                    self.disk_hits += 1
+                self._remember(key, vector)
+        self.misses += len(texts) - len(found)
+        return found
+
+    async def put_many(self, texts: List[str], vectors):
+        # Vectors may be lists or float32 rows of a NumPy array, rows are copied as raw bytes
+        entries = {self._key(text): array("f", np.asarray(vector, dtype=np.float32).tobytes())
+                   for text, vector in zip(texts, vectors)}
+        for key, vector in entries.items():
+            self._remember(key, vector)
+        await asyncio.to_thread(self._write_disk, entries)
+
+    def get_metrics(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model": self._model,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+            "disk_entries": self._disk_entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self._model}\0{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _as_ndarray(vector: array) -> np.ndarray:
+        view = np.frombuffer(vector, dtype=np.float32)
+        view.flags.writeable = False
+        return view
+
+    def _remember(self, key: str, vector: array):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self._memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, array]:
+        rows = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch):
+                    rows[key] = array("f", blob)
+                if rows:
+                    self._db.execute(
+                        f"UPDATE embeddings SET last_used = ? WHERE key IN ({placeholders})",
+                        [time.time(), *batch]
+                    )
+            self._db.commit()
+        return rows
+
+    def _write_disk(self, entries: Dict[str, array]):
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                [(key, vector.tobytes(), now) for key, vector in entries.items()]
+            )
+            # Upper bound (replaced keys are counted twice), only recount when it crosses the cap
+            self._disk_entries += len(entries)
+            if self._disk_entries > self._max_entries:
+                self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                overflow = self._disk_entries - self._max_entries
+                if overflow > 0:
+                    self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._disk_entries -= overflow
+                    self.evictions += overflow
+            self._db.commit()
@@ -1,5 +1,14 @@
+import json
 import os
-import httpx 
+import time
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from .embedding_cache import EmbeddingCache
+from .http_client import PooledHttpClient
+from .vector_wire import accept_header, decode_stream_record, decode_vectors, stream_accept_header
 
 
 class EmbeddingService:
@@ -7,21 +16,188 @@ class EmbeddingService:
         self._service_url = os.getenv("EMBEDDING_SERVICE_URL")
         if not self._service_url:
             raise ValueError("EMBEDDING_SERVICE_URL environment variable is not set.")
+        self._http = PooledHttpClient("EMBEDDING_SERVICE", default_timeout=30.0)
+        # Vectors travel as raw float32 (or float16) arrays instead of JSON float text by default
+        wire_format = os.getenv("EMBEDDING_WIRE_FORMAT", "octet-stream").lower()
+        wire_dtype = os.getenv("EMBEDDING_WIRE_DTYPE", "float32").lower()
+        self._accept = accept_header(wire_format, wire_dtype)
+        # embed_stream reads /embed/stream, disable for embeddings services without it
+        self._streaming = os.getenv("EMBEDDING_STREAMING", "true").lower() == "true"
+        self._stream_accept = stream_accept_header(wire_format, wire_dtype)
 
-    async def embed_texts(self, texts: list[str]) -> list[list[float]]:
-        url = f"{self._service_url}/embed/batch"
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, json={"texts": texts})
+        self._cache: Optional[EmbeddingCache] = None
+        if os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true":
+            self._cache = EmbeddingCache(
+                path=os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite3"),
+                memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", 4096)),
+                max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500000))
+            )
+        # Embed responses name their model, /health is rechecked for callers served entirely from cache
+        self._model_check_interval = float(os.getenv("EMBEDDING_MODEL_CHECK_SECONDS", 60))
+        self._model_checked_at = 0.0
+
+    async def embed_texts(self, texts: list[str]) -> np.ndarray:
+        """Embeds the texts, one float32 row per text. Rows can be passed to Qdrant as they are."""
+        if self._cache is None or not await self._activate_cache_model():
+            return await self._request_embeddings(texts)
+
+        embeddings = await self._cache.get_many(texts)
+        missing_texts = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in embeddings))
+        if missing_texts:
+            model = self._cache.model
+            computed_vectors = await self._request_embeddings(missing_texts)
+            await self._cache.put_many(missing_texts, computed_vectors)
+            if len(missing_texts) == len(texts):
+                return computed_vectors
+            if self._cache.model != model:
+                # The service switched models, the cached vectors belong to the old one
+                return await self.embed_texts(texts)
+            computed = dict(zip(missing_texts, computed_vectors))
+            for i, text in enumerate(texts):
+                if i not in embeddings:
+                    embeddings[i] = computed[text]
+        return np.stack([embeddings[i] for i in range(len(texts))])
+
+    async def embed_stream(self, texts: list[str], batch_size: int) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        """
+        Embeds the texts as consecutive mini-batches of batch_size, yielding (start, vectors) in
+        text order as soon as each mini-batch is ready. Cached texts are not sent to the service.
+        The request timeout applies per mini-batch rather than to the whole input.
+        """
+        if not self._streaming:
+            for start in range(0, len(texts), batch_size):
+                yield start, await self.embed_texts(texts[start:start + batch_size])
+            return
+
+        cached = {}
+        if self._cache is not None and await self._activate_cache_model():
+            cached = await self._cache.get_many(texts)
+        model = self._cache.model if self._cache is not None else None
+        missing_texts = list(dict.fromkeys(text for i, text in enumerate(texts) if i not in cached))
+
+        stream = self._stream_embeddings(missing_texts, batch_size)
+        try:
+            if len(missing_texts) == len(texts):
+                # Nothing cached and no duplicates, the service's mini-batches are ours
+                async for start, vectors in stream:
+                    if self._cache is not None:
+                        await self._cache.put_many(missing_texts[start:start + len(vectors)], vectors)
+                    yield start, vectors
+                return
+
+            # The first record tells whether the cached vectors still match the service's model
+            received = [await anext(stream)] if missing_texts else []
+            if cached and self._cache.model != model:
+                await stream.aclose()
+                async for start, vectors in self.embed_stream(texts, batch_size):
+                    yield start, vectors
+                return
+
+            # Vectors of a text are dropped once its last occurrence was yielded
+            last_index = {text: i for i, text in enumerate(texts) if i not in cached}
+            computed = {}
+            for start in range(0, len(texts), batch_size):
+                end = min(start + batch_size, len(texts))
+                needed = [texts[i] for i in range(start, end) if i not in cached]
+                while any(text not in computed for text in needed):
+                    record_start, vectors = received.pop() if received else await anext(stream)
+                    record_texts = missing_texts[record_start:record_start + len(vectors)]
+                    computed.update(zip(record_texts, vectors))
+                    if self._cache is not None:
+                        await self._cache.put_many(record_texts, vectors)
+                yield start, np.stack(
+                    [cached[i] if i in cached else computed[texts[i]] for i in range(start, end)]
+                )
+                for text in needed:
+                    if last_index[text] < end:
+                        computed.pop(text, None)
+        finally:
+            await stream.aclose()
+
+    async def _stream_embeddings(self, texts: list[str], batch_size: int) -> AsyncIterator[Tuple[int, np.ndarray]]:
+        if not texts:
+            return
+        async with self._http.client.stream("POST", f"{self._service_url}/embed/stream",
+                                            json={"texts": texts, "batch_size": batch_size},
+                                            headers={"Accept": self._stream_accept}) as response:
             response.raise_for_status()
-            return response.json().get("embeddings", [])
+            await self._follow_model(response.headers.get("x-embedding-model"))
+            expected_start = 0
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if "error" in record:
+                    raise RuntimeError(f"Embedding stream failed at text {record.get('start')}: {record['error']}")
+                if record["start"] != expected_start:
+                    raise RuntimeError(f"Embedding stream out of order: expected {expected_start}, got {record['start']}")
+                vectors = decode_stream_record(record)
+                yield record["start"], vectors
+                expected_start += len(vectors)
+            if expected_start != len(texts):
+                raise RuntimeError(f"Embedding stream ended after {expected_start} of {len(texts)} texts")
+
+    async def rerank(self, query: str, passages: list[str]) -> list[float]:
+        """Cross-encoder relevance of every passage to the query, in passage order."""
+        response = await self._http.client.post(f"{self._service_url}/rerank",
+                                                json={"query": query, "passages": passages})
+        response.raise_for_status()
+        return response.json().get("scores", [])
+
+    async def _request_embeddings(self, texts: list[str]) -> np.ndarray:
+        url = f"{self._service_url}/embed/batch"
+        response = await self._http.client.post(url, json={"texts": texts}, headers={"Accept": self._accept})
+        response.raise_for_status()
+        await self._follow_model(response.headers.get("x-embedding-model"))
+        return decode_vectors(response.headers.get("content-type", ""), response.headers, response.content,
+                              "embeddings")
+
+    async def _activate_cache_model(self) -> bool:
+        """
+        Makes sure the cache is keyed by the model the embeddings service is actually running,
+        rechecking /health every EMBEDDING_MODEL_CHECK_SECONDS.
+        The cache is bypassed while the model name cannot be determined.
+        """
+        if self._cache.model is not None and time.monotonic() - self._model_checked_at < self._model_check_interval:
+            return True
+        self._model_checked_at = time.monotonic()
+        try:
+            resp = await self._http.client.get(f"{self._service_url}/health", timeout=5.0)
+            resp.raise_for_status()
+            model = resp.json().get("model")
+        except httpx.HTTPError as e:
+            if self._cache.model is not None:
+                return True
+            print(f"Could not determine embedding model, bypassing cache: {e}")
+            return False
+        if not model:
+            return self._cache.model is not None
+        await self._cache.activate_model(model)
+        return True
+
+    async def _follow_model(self, model: Optional[str]):
+        """Re-keys the cache when the service reports another model than the active one."""
+        if self._cache is not None and self._cache.model is not None and model and model != self._cache.model:
+            await self._cache.activate_model(model)
 
     async def health_check(self) -> bool:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            try:
-                resp = await client.get(f"{self._service_url}/health")
-                return resp.status_code == 200
-            except httpx.RequestError:
-                return False
+        try:
+            resp = await self._http.client.get(f"{self._service_url}/health", timeout=5.0)
+        except httpx.RequestError:
+            return False
+        if resp.status_code != 200:
+            return False
+        # Pick up a model swap on the embeddings service without restarting the backend
+        await self._follow_model(resp.json().get("model"))
+        return True
+
+    def get_metrics(self) -> dict:
+        metrics = {"http": self._http.metrics.to_dict()}
+        if self._cache is not None:
+            metrics["cache"] = self._cache.get_metrics()
+        return metrics
 
     async def dispose(self):
-        pass
\ No newline at end of file
+        await self._http.aclose()
+        if self._cache is not None:
+            self._cache.close()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import weakref
+
+import httpx
+
+# h2 comes with httpx[http2] from requirements.txt, without it the pools fall back to HTTP/1.1
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HttpClientMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.errors = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "connections_reused": max(0, self.requests - self.connections_opened),
+            "errors": self.errors,
+        }
+
+
+class PooledHttpClient:
+    """
+    Long-lived httpx connection pool shared by all calls of one external service.
+
+    Pool limits and timeouts are read from environment variables prefixed with `env_prefix`,
+    e.g. EMBEDDING_SERVICE_TIMEOUT or EMBEDDING_SERVICE_MAX_CONNECTIONS. httpx connections are
+    bound to the event loop that opened them, so one client is kept per running loop.
+    """
+
+    def __init__(self, env_prefix: str, default_timeout: float):
+        self._timeout = httpx.Timeout(
+            float(os.getenv(f"{env_prefix}_TIMEOUT", default_timeout)),
+            connect=float(os.getenv(f"{env_prefix}_CONNECT_TIMEOUT", 5.0))
+        )
+        self._limits = httpx.Limits(
+            max_connections=int(os.getenv(f"{env_prefix}_MAX_CONNECTIONS", 20)),
+            max_keepalive_connections=int(os.getenv(f"{env_prefix}_MAX_KEEPALIVE_CONNECTIONS", 10)),
+            keepalive_expiry=float(os.getenv(f"{env_prefix}_KEEPALIVE_EXPIRY", 30.0))
+        )
+        self._http2 = HTTP2_AVAILABLE and os.getenv(f"{env_prefix}_HTTP2", "true").lower() == "true"
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = \
+            weakref.WeakKeyDictionary()
+        self.metrics = HttpClientMetrics()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=self._timeout,
+                limits=self._limits,
+                http2=self._http2,
+                event_hooks={"request": [self._on_request], "response": [self._on_response]}
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _on_request(self, request: httpx.Request):
+        self.metrics.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _on_response(self, response: httpx.Response):
+        if response.is_error:
+            self.metrics.errors += 1
+
+    async def _trace(self, event_name: str, info: dict):
+        if event_name == "connection.connect_tcp.complete":
+            self.metrics.connections_opened += 1
+
+    async def aclose(self):
+        current_loop = asyncio.get_running_loop()
+        for loop, client in list(self._clients.items()):
+            # Clients of other loops cannot be awaited from here; their loop owns the sockets.
+            if loop is current_loop:
+                await client.aclose()
+        self._clients.clear()
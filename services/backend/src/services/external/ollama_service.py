@@ -1,12 +1,15 @@
 import os
 import httpx
 
+from .http_client import PooledHttpClient
+
 
 class OllamaService:
     def __init__(self):
         self._service_url = os.getenv("OLLAMA_SERVICE_URL")
         if not self._service_url:
             raise ValueError("OLLAMA_SERVICE_URL environment variable is not set.")
+        self._http = PooledHttpClient("OLLAMA_SERVICE", default_timeout=120.0)
 
     async def generate_response(self, model: str, prompt: str, stream: bool = False) -> str:
         url = f"{self._service_url}/api/generate"
@@ -16,23 +19,24 @@ class OllamaService:
             "stream": stream
         }
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            try:
-                response = await client.post(url, json=payload)
-                response.raise_for_status() 
-                response_json = response.json()
-                return response_json.get("response", "")
-            except Exception as e:
-                print(f"Error calling Ollama: {e}")
-                raise
+        try:
+            response = await self._http.client.post(url, json=payload)
+            response.raise_for_status() 
+            response_json = response.json()
+            return response_json.get("response", "")
+        except Exception as e:
+            print(f"Error calling Ollama: {e}")
+            raise
 
     async def health_check(self) -> bool:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            try:
-                resp = await client.get(f"{self._service_url}/api/tags")
-                return resp.status_code == 200
-            except httpx.RequestError:
-                return False
+        try:
+            resp = await self._http.client.get(f"{self._service_url}/api/tags", timeout=5.0)
+            return resp.status_code == 200
+        except httpx.RequestError:
+            return False
+
+    def get_metrics(self) -> dict:
+        return {"http": self._http.metrics.to_dict()}
 
     async def dispose(self):
-        pass
\ No newline at end of file
+        await self._http.aclose()
@@ -1,22 +1,130 @@
+import json
 import os
+from typing import Optional
 
+import httpx
 from qdrant_client import AsyncQdrantClient
-from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
+from qdrant_client.models import Distance, VectorParams, PayloadSchemaType, SparseVectorParams, Modifier, \
+    SparseIndexParams, HnswConfigDiff, ScalarQuantization, ScalarQuantizationConfig, ScalarType, \
+    BinaryQuantization, BinaryQuantizationConfig, SearchParams, QuantizationSearchParams
 
 
 DOCUMENTS_COLLECTION = "documents"
 EMBEDDING_VECTOR_SIZE = 1024 
 DOCUMENT_IDENTIFIER_FIELD = "identifier" 
 DOCUMENT_HASH_FIELD = "hash"
+CHUNK_SEQUENCE_FIELD = "chunk_sequence"
+# The dense vector is the collection's unnamed default vector
+DENSE_VECTOR_NAME = ""
+# BM25 term weights for hybrid retrieval, Qdrant applies the IDF factor at query time
+SPARSE_VECTOR_NAME = "text-sparse"
+
+# gRPC (port 6334) sends vectors as packed floats instead of JSON, REST stays the default
+QDRANT_PREFER_GRPC = os.getenv("QDRANT_PREFER_GRPC", "false").lower() == "true"
+QDRANT_GRPC_PORT = int(os.getenv("QDRANT_GRPC_PORT", 6334))
+# Request timeout in seconds, applies to both transports
+QDRANT_TIMEOUT = int(os.getenv("QDRANT_TIMEOUT", 30))
+# REST connection pool, by default qdrant-client disables keep-alive for localhost
+QDRANT_MAX_CONNECTIONS = int(os.getenv("QDRANT_MAX_CONNECTIONS", 20))
+QDRANT_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("QDRANT_MAX_KEEPALIVE_CONNECTIONS", 10))
+QDRANT_KEEPALIVE_EXPIRY = float(os.getenv("QDRANT_KEEPALIVE_EXPIRY", 30.0))
+# gRPC channel options, QDRANT_GRPC_OPTIONS (a JSON object) is merged over these defaults
+QDRANT_GRPC_CHANNEL_OPTIONS = {
+    "grpc.keepalive_time_ms": int(os.getenv("QDRANT_GRPC_KEEPALIVE_MS", 30000)),
+    "grpc.keepalive_timeout_ms": 10000,
+    "grpc.keepalive_permit_without_calls": 1,
+    # Scrolls with vectors easily exceed the 4 MB default
+    "grpc.max_receive_message_length": int(os.getenv("QDRANT_GRPC_MAX_MESSAGE_MB", 64)) * 1024 * 1024,
+    "grpc.max_send_message_length": int(os.getenv("QDRANT_GRPC_MAX_MESSAGE_MB", 64)) * 1024 * 1024,
+    **json.loads(os.getenv("QDRANT_GRPC_OPTIONS", "{}")),
+}
+
+# Compression of the dense vectors: "none", "scalar" (int8, 4x smaller) or "binary" (1 bit, 32x smaller)
+QDRANT_QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "none")
+QUANTIZATION_MODES = ("none", "scalar", "binary")
+# Keep the quantized vectors in RAM even when the original vectors are stored on disk
+QDRANT_QUANTIZATION_ALWAYS_RAM = os.getenv("QDRANT_QUANTIZATION_ALWAYS_RAM", "true").lower() == "true"
+# Memory-map the original vectors and the HNSW graph from disk instead of holding them in RAM
+QDRANT_VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "false").lower() == "true"
+QDRANT_HNSW_ON_DISK = os.getenv("QDRANT_HNSW_ON_DISK", "false").lower() == "true"
+# Query time: fetch oversampling * limit candidates from the quantized index and rescore them
+# with the original vectors. Binary quantization loses more precision and needs more candidates.
+QDRANT_SEARCH_OVERSAMPLING = float(os.environ["QDRANT_SEARCH_OVERSAMPLING"]) \
+    if os.getenv("QDRANT_SEARCH_OVERSAMPLING") else None
+QDRANT_SEARCH_RESCORE = os.getenv("QDRANT_SEARCH_RESCORE", "true").lower() == "true"
+QDRANT_SEARCH_HNSW_EF = int(os.environ["QDRANT_SEARCH_HNSW_EF"]) if os.getenv("QDRANT_SEARCH_HNSW_EF") else None
+DEFAULT_OVERSAMPLING = {"scalar": 2.0, "binary": 3.0}
+
+# Payload indexes every documents collection needs, created for new and existing collections
+PAYLOAD_INDEXES = {
+    DOCUMENT_IDENTIFIER_FIELD: PayloadSchemaType.KEYWORD,  # grouping and neighbour lookups
+    DOCUMENT_HASH_FIELD: PayloadSchemaType.KEYWORD,  # duplicate checks
+    CHUNK_SEQUENCE_FIELD: PayloadSchemaType.INTEGER,  # exact neighbour sequence matching
+}
+
+
+def build_collection_config(quantization: str = QDRANT_QUANTIZATION, vectors_on_disk: bool = QDRANT_VECTORS_ON_DISK,
+                            hnsw_on_disk: bool = QDRANT_HNSW_ON_DISK) -> dict:
+    """Keyword arguments of create_collection for a documents collection with the given storage settings."""
+    if quantization not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization {quantization}, expected one of {QUANTIZATION_MODES}")
+    quantization_config = None
+    if quantization == "scalar":
+        quantization_config = ScalarQuantization(scalar=ScalarQuantizationConfig(
+            type=ScalarType.INT8, quantile=0.99, always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    elif quantization == "binary":
+        quantization_config = BinaryQuantization(binary=BinaryQuantizationConfig(
+            always_ram=QDRANT_QUANTIZATION_ALWAYS_RAM
+        ))
+    return {
+        "vectors_config": VectorParams(size=EMBEDDING_VECTOR_SIZE, distance=Distance.COSINE, on_disk=vectors_on_disk),
+        "sparse_vectors_config": {SPARSE_VECTOR_NAME: SparseVectorParams(
+            index=SparseIndexParams(on_disk=vectors_on_disk), modifier=Modifier.IDF
+        )},
+        "quantization_config": quantization_config,
+        "hnsw_config": HnswConfigDiff(on_disk=hnsw_on_disk),
+    }
+
+
+def build_search_params(quantization: str = QDRANT_QUANTIZATION) -> Optional[SearchParams]:
+    """Search params matching the quantization of the collection, None searches with the server defaults."""
+    quantization_params = None
+    if quantization != "none":
+        quantization_params = QuantizationSearchParams(
+            rescore=QDRANT_SEARCH_RESCORE,
+            oversampling=QDRANT_SEARCH_OVERSAMPLING or DEFAULT_OVERSAMPLING[quantization]
+        )
+    if quantization_params is None and QDRANT_SEARCH_HNSW_EF is None:
+        return None
+    return SearchParams(hnsw_ef=QDRANT_SEARCH_HNSW_EF, quantization=quantization_params)
+
+
+def build_client_options(prefer_grpc: bool = QDRANT_PREFER_GRPC) -> dict:
+    """Keyword arguments of AsyncQdrantClient for the configured host, transport, timeouts and pooling."""
+    return {
+        "host": os.getenv("QDRANT_HOST", "qdrant"),
+        "port": int(os.getenv("QDRANT_PORT", 6333)),
+        "grpc_port": QDRANT_GRPC_PORT,
+        "prefer_grpc": prefer_grpc,
+        "timeout": QDRANT_TIMEOUT,
+        "grpc_options": dict(QDRANT_GRPC_CHANNEL_OPTIONS),
+        "limits": httpx.Limits(
+            max_connections=QDRANT_MAX_CONNECTIONS,
+            max_keepalive_connections=QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=QDRANT_KEEPALIVE_EXPIRY
+        ),
+    }
 
 
 class QdrantService:
     def __init__(self):
         self._initialized = False
-        self._client = AsyncQdrantClient(
-            host=os.getenv("QDRANT_HOST", "qdrant"),
-            port=int(os.getenv("QDRANT_PORT", 6333))
-        )
+        self.sparse_vectors_enabled = False
+        # Matches the quantization the collection actually uses, set up during initialization
+        self.search_params: Optional[SearchParams] = None
+        # gRPC channels bind to the event loop of their first call, like the pooled HTTP clients
+        self._client = AsyncQdrantClient(**build_client_options())
 
     async def get_client(self) -> AsyncQdrantClient:
         await self._validate_initialized()
@@ -26,6 +134,9 @@ class QdrantService:
         response = await self._client.get_collections()
         return any(response.collections)
 
+    async def dispose(self):
+        await self._client.close()
+
     async def _validate_initialized(self):
         if not self._initialized:
             await self.initialize()
@@ -37,28 +148,55 @@ class QdrantService:
         await self._setup_db()
         self._initialized = True
 
+    async def create_documents_collection(self, collection_name: str = DOCUMENTS_COLLECTION, **storage_settings):
+        """Creates a documents collection with its payload indexes, storage settings default to the environment."""
+        await self._client.create_collection(
+            collection_name=collection_name,
+            **build_collection_config(**storage_settings)
+        )
+        await self._create_payload_indexes(collection_name, {})
+
     async def _setup_db(self):
         collection_exists = await self._client.collection_exists(DOCUMENTS_COLLECTION)
         
         if not collection_exists:
-            # 1. Create the collection
-            await self._client.create_collection(
-                collection_name=DOCUMENTS_COLLECTION,
-                vectors_config=VectorParams(size=EMBEDDING_VECTOR_SIZE, distance=Distance.COSINE)
-            )
-            
-            # 2. Create the payload index for grouping
-            print(f"Creating payload index for: {DOCUMENT_IDENTIFIER_FIELD}")
+            await self.create_documents_collection()
+            self.sparse_vectors_enabled = True
+            self.search_params = build_search_params()
+            return
+
+        collection_info = await self._client.get_collection(DOCUMENTS_COLLECTION)
+        # Vectors cannot be added to an existing collection, older ones keep dense-only retrieval
+        sparse_vectors = collection_info.config.params.sparse_vectors or {}
+        self.sparse_vectors_enabled = SPARSE_VECTOR_NAME in sparse_vectors
+        if not self.sparse_vectors_enabled:
+            print(f"Collection {DOCUMENTS_COLLECTION} has no {SPARSE_VECTOR_NAME} vectors, "
+                  f"hybrid retrieval falls back to dense search until it is rebuilt "
+                  f"(python -m src.migrations.rebuild_documents_collection)")
+        quantization = QdrantService._quantization_of(collection_info.config)
+        self.search_params = build_search_params(quantization)
+        if quantization != QDRANT_QUANTIZATION:
+            print(f"Collection {DOCUMENTS_COLLECTION} does not use {QDRANT_QUANTIZATION} quantization, "
+                  f"rebuild it to apply (python -m src.migrations.rebuild_documents_collection)")
+
+        await self._create_payload_indexes(DOCUMENTS_COLLECTION, collection_info.payload_schema or {})
+
+    async def _create_payload_indexes(self, collection_name: str, existing_indexes: dict):
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name in existing_indexes:
+                continue
+            print(f"Creating payload index for: {field_name}")
             await self._client.create_payload_index(
-                collection_name=DOCUMENTS_COLLECTION,
-                field_name=DOCUMENT_IDENTIFIER_FIELD,
-                field_schema=PayloadSchemaType.KEYWORD
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema
             )
-            
-            # 3. Create the payload index for duplicate checks
-            print(f"Creating payload index for: {DOCUMENT_HASH_FIELD}")
-            await self._client.create_payload_index(
-                collection_name=DOCUMENTS_COLLECTION,
-                field_name=DOCUMENT_HASH_FIELD,
-                field_schema=PayloadSchemaType.KEYWORD 
-            )
\ No newline at end of file
+
+    @staticmethod
+    def _quantization_of(collection_config) -> str:
+        quantization_config = collection_config.quantization_config
+        if isinstance(quantization_config, ScalarQuantization):
+            return "scalar"
+        if isinstance(quantization_config, BinaryQuantization):
+            return "binary"
+        return "none"
@@ -1,29 +1,33 @@
 import os
 import httpx
 
+from .http_client import PooledHttpClient
+
 
 class UnstructuredService:
     def __init__(self):
         self._service_url = os.getenv("UNSTRUCTURED_SERVICE_URL")
         if not self._service_url:
             raise ValueError("UNSTRUCTURED_SERVICE_URL environment variable is not set.")
+        self._http = PooledHttpClient("UNSTRUCTURED_SERVICE", default_timeout=30.0)
 
     async def parse_document(self, filename: str, content_type: str, content: bytes) -> dict:
         url = f"{self._service_url}/parse"
         files = {"file": (filename, content, content_type)}
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(url, files=files)
-            response.raise_for_status()
-            return response.json()
+        response = await self._http.client.post(url, files=files)
+        response.raise_for_status()
+        return response.json()
 
     async def health_check(self) -> bool:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            try:
-                resp = await client.get(f"{self._service_url}/health")
-                return resp.status_code == 200
-            except httpx.RequestError:
-                return False
+        try:
+            resp = await self._http.client.get(f"{self._service_url}/health", timeout=5.0)
+            return resp.status_code == 200
+        except httpx.RequestError:
+            return False
+
+    def get_metrics(self) -> dict:
+        return {"http": self._http.metrics.to_dict()}
 
     async def dispose(self):
-        pass
\ No newline at end of file
+        await self._http.aclose()
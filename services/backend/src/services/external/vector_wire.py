@@ -0,0 +1,65 @@
+import base64
+import json
+from typing import Mapping
+
+import numpy as np
+
+WIRE_FORMATS = ("json", "octet-stream", "msgpack")
+WIRE_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+def accept_header(wire_format: str, dtype: str) -> str:
+    """Accept header asking the embeddings service for the given format, JSON stays acceptable."""
+    if wire_format not in WIRE_FORMATS:
+        raise ValueError(f"Unknown embedding wire format {wire_format!r}, expected one of {', '.join(WIRE_FORMATS)}")
+    if dtype not in WIRE_DTYPES:
+        raise ValueError(f"Unknown embedding wire dtype {dtype!r}, expected one of {', '.join(WIRE_DTYPES)}")
+    if wire_format == "json":
+        return "application/json"
+    return f"application/{wire_format}; dtype={dtype}, application/json;q=0.5"
+
+
+def stream_accept_header(wire_format: str, dtype: str) -> str:
+    """Accept header for the NDJSON stream, binary wire formats ask for base64 array records."""
+    accept_header(wire_format, dtype)
+    if wire_format == "json":
+        return "application/x-ndjson"
+    return f"application/x-ndjson; dtype={dtype}"
+
+
+def decode_stream_record(record: dict) -> np.ndarray:
+    """Vectors of one NDJSON stream record, either base64 array data or JSON float lists."""
+    if "data" in record:
+        return _from_buffer(base64.b64decode(record["data"]), record["dtype"], tuple(record["shape"]))
+    return np.asarray(record["embeddings"], dtype=np.float32)
+
+
+def decode_vectors(content_type: str, headers: Mapping[str, str], content: bytes, json_key: str) -> np.ndarray:
+    """
+    Decodes an embeddings response into a float32 array with one row per text.
+
+    float32 payloads are wrapped without copying (the array is read-only and shares the response
+    buffer), float16 payloads are widened to float32. Older services that only speak JSON are
+    decoded from their JSON body.
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type == "application/octet-stream":
+        shape = tuple(int(size) for size in headers["x-embedding-shape"].split(","))
+        return _from_buffer(content, headers.get("x-embedding-dtype", "float32"), shape)
+    if media_type in ("application/msgpack", "application/x-msgpack"):
+        # Only needed for the msgpack wire format
+        import msgpack
+
+        payload = msgpack.unpackb(content)
+        return _from_buffer(payload["data"], payload["dtype"], tuple(payload["shape"]))
+
+    return np.asarray(json.loads(content)[json_key], dtype=np.float32)
+
+
+def _from_buffer(data: bytes, dtype: str, shape: tuple) -> np.ndarray:
+    if dtype not in WIRE_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype {dtype!r}")
+    vectors = np.frombuffer(data, dtype=WIRE_DTYPES[dtype]).reshape(shape)
+    if dtype != "float32":
+        vectors = vectors.astype(np.float32)
+    return vectors
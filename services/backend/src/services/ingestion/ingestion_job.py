@@ -0,0 +1,63 @@
+import time
+import uuid
+from typing import Callable, Optional
+
+# Lower values are picked first, deletes free space and make stale results disappear quickly.
+# Priorities only order jobs of different documents, jobs of one document run in submission order
+ACTION_PRIORITIES = {"delete": 0, "reingest": 1, "insert": 1}
+
+
+class IngestionJob:
+    id: str
+    action: str
+    identifier: str
+    path: Optional[str]
+    content_type: str
+    size: int
+    status: str
+    attempts: int
+    error: Optional[str]
+    result: Optional[bool]
+
+    def __init__(self, action: str, identifier: str, path: Optional[str] = None,
+                 content_type: str = "application/octet-stream", size: int = 0,
+                 remove_file_when_done: bool = False,
+                 on_failed: Optional[Callable[["IngestionJob"], None]] = None):
+        if action not in ACTION_PRIORITIES:
+            raise ValueError(f"Unknown ingestion action: {action}")
+        self.id = str(uuid.uuid4())
+        self.action = action
+        self.identifier = identifier
+        self.path = path
+        self.content_type = content_type
+        self.size = size
+        self.remove_file_when_done = remove_file_when_done
+        self.on_failed = on_failed
+
+        self.status = "queued"
+        self.attempts = 0
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def priority(self) -> tuple:
+        # Deletes first, then smaller files before larger ones
+        return ACTION_PRIORITIES[self.action], self.size
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "action": self.action,
+            "identifier": self.identifier,
+            "status": self.status,
+            "attempts": self.attempts,
+            "size": self.size,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
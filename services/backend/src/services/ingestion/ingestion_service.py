@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .ingestion_job import IngestionJob
+from ..document.document_service import DocumentService
+
+INGESTION_WORKERS = int(os.getenv("INGESTION_WORKERS", 4))
+# Submitting blocks once this many jobs are waiting to start, which slows producers down (backpressure)
+INGESTION_QUEUE_SIZE = int(os.getenv("INGESTION_QUEUE_SIZE", 1000))
+INGESTION_MAX_RETRIES = int(os.getenv("INGESTION_MAX_RETRIES", 3))
+INGESTION_RETRY_DELAY = float(os.getenv("INGESTION_RETRY_DELAY", 2.0))
+# Number of finished jobs whose status can still be looked up
+FINISHED_JOBS_KEPT = 1000
+
+
+class IngestionService:
+    def __init__(self, document_service: DocumentService):
+        self._document_service = document_service
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._free_slots: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._sequence = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._worker_states: List[dict] = []
+        self._retry_tasks = set()
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._finished_job_ids = deque()
+        # Unfinished jobs per document in submission order. Only the oldest one is in the priority
+        # queue, so jobs for the same document never run concurrently or out of order, and
+        # priorities only reorder jobs of different documents
+        self._identifier_jobs: Dict[str, deque] = {}
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    async def submit(self, job: IngestionJob) -> IngestionJob:
+        """Queues a job, waiting for a free slot if the queue is full."""
+        self._ensure_workers()
+        await self._free_slots.acquire()
+        self._waiting += 1
+        self._jobs[job.id] = job
+        identifier_jobs = self._identifier_jobs.setdefault(job.identifier, deque())
+        identifier_jobs.append(job)
+        if len(identifier_jobs) == 1:
+            self._enqueue(job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def get_unfinished_jobs(self) -> List[IngestionJob]:
+        """Jobs that are queued, running or waiting for a retry."""
+        return [job for jobs in self._identifier_jobs.values() for job in jobs]
+
+    def get_status(self) -> dict:
+        return {
+            "queue_depth": self._waiting,
+            "queue_capacity": INGESTION_QUEUE_SIZE,
+            "retrying": len(self._retry_tasks),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "workers": [dict(state) for state in self._worker_states],
+        }
+
+    async def dispose(self):
+        tasks = self._workers + list(self._retry_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        self._worker_states.clear()
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.PriorityQueue()
+            self._free_slots = asyncio.Semaphore(INGESTION_QUEUE_SIZE)
+        if self._workers:
+            return
+        for worker_id in range(INGESTION_WORKERS):
+            state = {"worker": worker_id, "state": "idle", "job_id": None, "action": None,
+                     "identifier": None, "started_at": None, "processed": 0}
+            self._worker_states.append(state)
+            self._workers.append(asyncio.create_task(self._work(state)))
+
+    async def _work(self, state: dict):
+        while True:
+            _, _, job = await self._queue.get()
+            if job.attempts == 0:
+                self._waiting -= 1
+                self._free_slots.release()
+            state.update(state="busy", job_id=job.id, action=job.action,
+                         identifier=job.identifier, started_at=time.time())
+            try:
+                await self._run(job)
+            finally:
+                state.update(state="idle", job_id=None, action=None, identifier=None, started_at=None)
+                state["processed"] += 1
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        job.attempts += 1
+        job.started_at = time.time()
+        try:
+            job.result = await self._execute(job)
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts <= INGESTION_MAX_RETRIES:
+                self._schedule_retry(job)
+            else:
+                print(f"Ingestion job {job.id} ({job.action} {job.identifier}) failed: {e}")
+                self.failed += 1
+                self._finish(job, "failed")
+                if job.on_failed:
+                    job.on_failed(job)
+            return
+
+        job.error = None
+        self.completed += 1
+        self._finish(job, "completed")
+
+    async def _execute(self, job: IngestionJob) -> bool:
+        if job.action == "delete":
+            await self._document_service.delete_by_identifier(job.identifier)
+            return True
+
+        raw_content = await asyncio.to_thread(Path(job.path).read_bytes)
+        if job.action == "reingest":
+            return await self._document_service.reingest_document(job.identifier, raw_content, job.content_type)
+        return await self._document_service.insert_document(job.identifier, raw_content, job.content_type)
+
+    def _schedule_retry(self, job: IngestionJob):
+        delay = INGESTION_RETRY_DELAY * 2 ** (job.attempts - 1)
+        print(f"Ingestion job {job.id} ({job.action} {job.identifier}) failed, retrying in {delay}s: {job.error}")
+        job.status = "retrying"
+        self.retried += 1
+        task = asyncio.create_task(self._retry_later(job, delay))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, job: IngestionJob, delay: float):
+        await asyncio.sleep(delay)
+        job.status = "queued"
+        # Still the oldest job of its document, later jobs for it keep waiting
+        self._enqueue(job)
+
+    def _enqueue(self, job: IngestionJob):
+        self._queue.put_nowait((job.priority, next(self._sequence), job))
+
+    def _finish(self, job: IngestionJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        if job.remove_file_when_done and job.path:
+            Path(job.path).unlink(missing_ok=True)
+
+        identifier_jobs = self._identifier_jobs[job.identifier]
+        identifier_jobs.popleft()
+        if identifier_jobs:
+            self._enqueue(identifier_jobs[0])
+        else:
+            del self._identifier_jobs[job.identifier]
+
+        self._finished_job_ids.append(job.id)
+        while len(self._finished_job_ids) > FINISHED_JOBS_KEPT:
+            self._jobs.pop(self._finished_job_ids.popleft(), None)
@@ -0,0 +1,146 @@
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Set
+
+import numpy as np
+
+from ..document.document_service import DocumentService
+
+# Opt-in: a paraphrase that differs in one detail ("2023" vs "2024") can still be above the threshold
+# and get the other question's answer, so the threshold should be tuned on real traffic first
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+# Minimum cosine similarity between two queries for the cached answer to be reused
+SEMANTIC_CACHE_SIMILARITY = float(os.getenv("SEMANTIC_CACHE_SIMILARITY", 0.95))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 3600))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1000))
+
+
+class SemanticCacheService:
+    """
+    In-process cache of workflow responses looked up by query embedding similarity.
+    Entries expire after a TTL and are dropped as soon as one of the documents they cite changes.
+    A lookup only matches entries stored with equal options (e.g. the retrieval mode), and the
+    cache is cleared when the embedding dimension changes, i.e. after an embedding model swap.
+    """
+
+    def __init__(self, document_service: DocumentService):
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._entry_ids_by_document: Dict[str, Set[str]] = {}
+        # Normalised query vectors stacked in entry order, rebuilt lazily after changes
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_ids: List[str] = []
+        self._matrix_options: List[Hashable] = []
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        document_service.add_change_listener(self.invalidate_document)
+
+    @property
+    def enabled(self) -> bool:
+        return SEMANTIC_CACHE_ENABLED
+
+    def lookup(self, query_vector: List[float], options: Hashable = None) -> Optional[dict]:
+        """
+        Returns the cached response of the most similar recent query stored with the same options,
+        if it is similar enough.
+        """
+        self._expire()
+        query = self._normalise(query_vector)
+        if self._entries and self._get_matrix().shape[1] != query.shape[0]:
+            print(f"Embedding dimension changed to {query.shape[0]}, clearing the semantic cache")
+            self.clear()
+        if not self._entries:
+            self.misses += 1
+            return None
+
+        similarities = self._get_matrix() @ query
+        # Entries of other options can never be reused
+        similarities[[entry_options != options for entry_options in self._matrix_options]] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] < SEMANTIC_CACHE_SIMILARITY:
+            self.misses += 1
+            return None
+
+        entry_id = self._matrix_ids[best]
+        self._entries.move_to_end(entry_id)
+        self.hits += 1
+        return self._entries[entry_id]["response"]
+
+    def store(self, query_vector: List[float], response: dict, cited_documents: Iterable[str],
+              options: Hashable = None):
+        vector = self._normalise(query_vector)
+        if self._entries and self._get_matrix().shape[1] != vector.shape[0]:
+            self.clear()
+        entry_id = str(uuid.uuid4())
+        cited_documents = set(cited_documents)
+        self._entries[entry_id] = {
+            "vector": vector,
+            "options": options,
+            "response": response,
+            "documents": cited_documents,
+            "created_at": time.time(),
+        }
+        for identifier in cited_documents:
+            self._entry_ids_by_document.setdefault(identifier, set()).add(entry_id)
+        while len(self._entries) > SEMANTIC_CACHE_MAX_ENTRIES:
+            self._remove(next(iter(self._entries)))
+        self._matrix = None
+
+    def invalidate_document(self, identifier: str):
+        entry_ids = self._entry_ids_by_document.get(identifier)
+        if not entry_ids:
+            return
+        for entry_id in list(entry_ids):
+            self._remove(entry_id)
+            self.invalidations += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._entry_ids_by_document.clear()
+        self._matrix = None
+
+    def get_metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+        }
+
+    def _expire(self):
+        deadline = time.time() - SEMANTIC_CACHE_TTL_SECONDS
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry["created_at"] < deadline]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def _remove(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        for identifier in entry["documents"]:
+            entry_ids = self._entry_ids_by_document.get(identifier)
+            if entry_ids is not None:
+                entry_ids.discard(entry_id)
+                if not entry_ids:
+                    del self._entry_ids_by_document[identifier]
+        self._matrix = None
+
+    def _get_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix_ids = list(self._entries.keys())
+            self._matrix_options = [self._entries[entry_id]["options"] for entry_id in self._matrix_ids]
+            self._matrix = np.stack([self._entries[entry_id]["vector"] for entry_id in self._matrix_ids])
+        return self._matrix
+
+    @staticmethod
+    def _normalise(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
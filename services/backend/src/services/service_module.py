@@ -3,6 +3,8 @@ from .external.embedding_service import EmbeddingService
 from .external.ollama_service import OllamaService
 from .external.qdrant_service import QdrantService
 from .external.unstructured_service import UnstructuredService
+from .ingestion.ingestion_service import IngestionService
+from .semantic_cache.semantic_cache_service import SemanticCacheService
 from .watcher.watcher_service import WatcherService
 from ..container import Module, Container
 
@@ -14,4 +16,6 @@ class ServiceModule(Module):
         container.register_singleton(UnstructuredService)
         container.register_singleton(QdrantService)
         container.register_singleton(DocumentService)
+        container.register_singleton(SemanticCacheService)
+        container.register_singleton(IngestionService)
         container.register_singleton(WatcherService)
@@ -1,14 +1,15 @@
+import os
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from .watcher import Watcher
-from ..document.document_service import DocumentService
+from ..ingestion.ingestion_service import IngestionService
 
 
 class WatcherService:
-    def __init__(self, document_service: DocumentService):
+    def __init__(self, ingestion_service: IngestionService):
         self._watchers: Dict[str, Watcher] = {}
-        self._document_service = document_service
+        self._ingestion_service = ingestion_service
 
     def start_watching(self, directory: str):
         directory = str(Path(directory).resolve())
@@ -18,31 +19,43 @@ class WatcherService:
 
         Path(directory).mkdir(parents=True, exist_ok=True)
 
-        watcher = Watcher(self._document_service)
+        watcher = Watcher(self._ingestion_service)
         self._watchers[directory] = watcher
 
         watcher.start_watching(directory)
 
         return {"status": "started"}
 
-    def stop_watching(self, directory: str):
-        directory = str(Path(directory).resolve())
-        if directory not in self._watchers:
+    async def stop_watching(self, directory: Optional[str] = None):
+        if directory is None:
+            directories = list(self._watchers.keys())
+        else:
+            directories = [str(Path(directory).resolve())]
+        if not any(d in self._watchers for d in directories):
             return {"status": "not_watching"}
 
-        self._watchers[directory].stop_watching()
-        del self._watchers[directory]
+        for d in directories:
+            if d in self._watchers:
+                await self._watchers[d].stop_watching()
+                del self._watchers[d]
 
         return {"status": "stopped"}
 
     def get_status(self):
+        unfinished_jobs = self._ingestion_service.get_unfinished_jobs()
         watchers = []
         for watcher in self._watchers.values():
+            # Watcher jobs are identified by the absolute file path
+            prefix = os.path.join(watcher.watching_directory, "")
+            jobs = [job for job in unfinished_jobs if job.identifier.startswith(prefix)]
             watchers.append({
                 "directory": watcher.watching_directory,
                 "tracked_files": len(watcher.processed_files),
-                "currently_processing": watcher.currently_processing,
-                "files_being_ingested": watcher.files_being_ingested
+                "currently_processing": sum(job.status != "running" for job in jobs),
+                "files_being_ingested": sum(job.status == "running" for job in jobs)
             })
 
-        return {"watchers": watchers}
+        return {"watchers": watchers, "ingestion": self._ingestion_service.get_status()}
+
+    async def dispose(self):
+        await self.stop_watching()
@@ -1,9 +1,16 @@
+import asyncio
 import json
+import os
+import time
+from typing import List, Optional, Tuple
+
 from ...container import Container
 from ...services.external.embedding_service import EmbeddingService
 from ...services.external.qdrant_service import QdrantService
 from ...services.external.ollama_service import OllamaService
+from ...services.document.context_packer import pack_context
 from ...services.document.document_service import DocumentService 
+from ...services.semantic_cache.semantic_cache_service import SemanticCacheService
 
 # --- Workflow Configuration ---
 OLLAMA_MODEL = "llama3:8b"
@@ -11,6 +18,23 @@ NEIGHBOR_COUNT = 4
 TOP_K_DOCS = 5
 SCORE_THRESHOLD = 0.5
 RETRIEVAL_LIMIT = 20
+# Re-score the retrieved chunks with the cross-encoder of the embeddings service. Reranked hits
+# are precise enough to build the context from fewer documents and neighbours.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANKED_TOP_K_DOCS = int(os.getenv("RERANKED_TOP_K_DOCS", 3))
+RERANKED_NEIGHBOR_COUNT = int(os.getenv("RERANKED_NEIGHBOR_COUNT", 2))
+# Estimated tokens of retrieved context put into the final prompt, leaves room for the
+# instructions, question and answer in llama3:8b's 8k window
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+# "hybrid" fuses dense and BM25 results on the raw question and only falls back to HyDE
+# expansion when nothing is found, "hyde" always expands the question with the LLM and merges
+# the results with a raw-question search run while the expansion is generated
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+RETRIEVAL_MODES = ("hybrid", "hyde")
+# In "hyde" mode the raw question is searched while the LLM expands it. If the expansion takes
+# longer than this (milliseconds, unset waits for it), the raw-question results are used alone.
+QUERY_EXPANSION_BUDGET_MS = float(os.environ["QUERY_EXPANSION_BUDGET_MS"]) \
+    if os.getenv("QUERY_EXPANSION_BUDGET_MS") else None
 
 QUERY_EXPANSION_PROMPT_TEMPLATE = """
 You are an expert search assistant. Your task is to generate a short, hypothetical
@@ -41,40 +65,163 @@ ANSWER:
 # ------------------------------
 
 
-async def default_workflow(container: Container, user_input: str, **kwargs) -> dict:
-    
-    # 1. Resolve services
-    embed_service = container.resolve(EmbeddingService)
-    qdrant_service = container.resolve(QdrantService)
+async def expand_query(container: Container, user_input: str) -> str:
+    """Generates a hypothetical answer passage to search with (HyDE)."""
     ollama_service = container.resolve(OllamaService)
-    document_service = container.resolve(DocumentService) 
 
-    await qdrant_service.initialize()
-
-    # --- Step 1: Query Expansion ---
     print(f"Expanding query: '{user_input}'")
     expansion_prompt = QUERY_EXPANSION_PROMPT_TEMPLATE.format(user_input=user_input)
     generated_search_query = await ollama_service.generate_response(
         model=OLLAMA_MODEL,
         prompt=expansion_prompt
     )
-    generated_search_query = generated_search_query.strip().strip('\"')
+    return generated_search_query.strip().strip('\"')
+
+
+def _retrieval_settings(user_input: str) -> dict:
+    if RERANK_ENABLED:
+        return {"neighbor_count": RERANKED_NEIGHBOR_COUNT, "top_k_docs": RERANKED_TOP_K_DOCS,
+                "rerank_query": user_input}
+    return {"neighbor_count": NEIGHBOR_COUNT, "top_k_docs": TOP_K_DOCS}
+
+
+async def retrieve_expanded_context(container: Container, user_input: str, generated_search_query: str) -> dict:
+    embed_service = container.resolve(EmbeddingService)
+    document_service = container.resolve(DocumentService)
 
-    # --- Step 2: Embed the new search query ---
     print(f"Embedding generated query: '{generated_search_query}'")
     query_vector = (await embed_service.embed_texts([generated_search_query]))[0]
 
-    # --- Step 3: Retrieve and Enrich Context ---
     print(f"Retrieving and enriching context...")
-    context_obj = await document_service.retrieve_and_enrich_context(
+    return await document_service.retrieve_and_enrich_context(
         query_vector=query_vector,
-        neighbor_count=NEIGHBOR_COUNT,
         score_threshold=SCORE_THRESHOLD,
-        top_k_docs=TOP_K_DOCS,
-        retrieval_limit=RETRIEVAL_LIMIT
+        retrieval_limit=RETRIEVAL_LIMIT,
+        **_retrieval_settings(user_input)
     )
 
+
+async def retrieve_hyde_context(container: Container, user_input: str) -> Tuple[dict, str]:
+    """Expands the question into a hypothetical answer with the LLM and retrieves with its embedding."""
+    generated_search_query = await expand_query(container, user_input)
+    return await retrieve_expanded_context(container, user_input, generated_search_query), generated_search_query
+
+
+async def retrieve_hybrid_context(container: Container, user_input: str,
+                                  question_vector: Optional[List[float]] = None) -> dict:
+    """Retrieves with the raw question, fusing dense and sparse (BM25) results, without any LLM call."""
+    embed_service = container.resolve(EmbeddingService)
+    document_service = container.resolve(DocumentService)
+
+    if question_vector is None:
+        question_vector = (await embed_service.embed_texts([user_input]))[0]
+
+    print(f"Retrieving hybrid context for: '{user_input}'")
+    return await document_service.retrieve_and_enrich_context(
+        query_vector=question_vector,
+        score_threshold=SCORE_THRESHOLD,
+        retrieval_limit=RETRIEVAL_LIMIT,
+        query_text=user_input,
+        **_retrieval_settings(user_input)
+    )
+
+
+def merge_contexts(expanded_context: dict, raw_context: dict, top_k: int) -> dict:
+    """
+    Merges two retrievals by reciprocal rank, their scores are not comparable. Documents found by
+    both keep the window of the expanded query.
+    """
+    ranks = {}
+    for context_obj in (expanded_context, raw_context):
+        for rank, doc_id in enumerate(context_obj):
+            ranks[doc_id] = ranks.get(doc_id, 0.0) + 1 / (rank + 1)
+    merged_ids = sorted(ranks, key=ranks.get, reverse=True)[:top_k]
+    return {doc_id: expanded_context.get(doc_id) or raw_context[doc_id] for doc_id in merged_ids}
+
+
+async def retrieve_speculative_context(container: Container, user_input: str,
+                                       question_vector: Optional[List[float]] = None,
+                                       budget_ms: Optional[float] = None) -> Tuple[dict, Optional[str]]:
+    """
+    Searches with the raw question while the LLM expands it, then merges both result sets.
+    Returns the context and the expanded query, which is None when the expansion missed the
+    budget or failed and only the raw-question results were used.
+    """
+    started = time.perf_counter()
+    expansion = asyncio.create_task(expand_query(container, user_input))
+    try:
+        raw_context = await retrieve_hybrid_context(container, user_input, question_vector)
+
+        timeout = None
+        if budget_ms is not None:
+            timeout = max(0.0, budget_ms / 1000 - (time.perf_counter() - started))
+        done, _ = await asyncio.wait({expansion}, timeout=timeout)
+        if not done:
+            print(f"Query expansion exceeded its {budget_ms} ms budget, using raw query results")
+            return raw_context, None
+        try:
+            generated_search_query = expansion.result()
+        except Exception as e:
+            print(f"Query expansion failed, using raw query results: {e}")
+            return raw_context, None
+    finally:
+        expansion.cancel()
+
+    expanded_context = await retrieve_expanded_context(container, user_input, generated_search_query)
+    top_k_docs = _retrieval_settings(user_input)["top_k_docs"]
+    return merge_contexts(expanded_context, raw_context, top_k_docs), generated_search_query
+
+
+async def default_workflow(container: Container, user_input: str, retrieval_mode: Optional[str] = None,
+                           expansion_budget_ms: Optional[float] = None, **kwargs) -> dict:
+    retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+    if expansion_budget_ms is None:
+        expansion_budget_ms = QUERY_EXPANSION_BUDGET_MS
+    if retrieval_mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode {retrieval_mode}, expected one of {RETRIEVAL_MODES}")
+
+    # 1. Resolve services
+    embed_service = container.resolve(EmbeddingService)
+    qdrant_service = container.resolve(QdrantService)
+    ollama_service = container.resolve(OllamaService)
+    semantic_cache = container.resolve(SemanticCacheService)
+
+    await qdrant_service.initialize()
+
+    # --- Step 0: Semantic answer cache ---
+    # Paraphrases of a recent question reuse its answer and skip both LLM calls
+    question_vector = None
+    # The requested options, not the ones retrieval ends up using after a fallback
+    cache_options = (retrieval_mode, expansion_budget_ms)
+    if semantic_cache.enabled:
+        question_vector = (await embed_service.embed_texts([user_input]))[0]
+        cached_response = semantic_cache.lookup(question_vector, options=cache_options)
+        if cached_response is not None:
+            print(f"Semantic cache hit for: '{user_input}'")
+            return {**cached_response, "cache_hit": True}
+
+    # --- Steps 1-3: Retrieve and Enrich Context ---
+    context_obj = {}
+    generated_search_query = user_input
+    if retrieval_mode == "hybrid":
+        context_obj = await retrieve_hybrid_context(container, user_input, question_vector)
+        if not context_obj:
+            print("Hybrid retrieval found nothing, falling back to query expansion")
+            retrieval_mode = "hyde"
+            context_obj, generated_search_query = await retrieve_hyde_context(container, user_input)
+    else:
+        context_obj, expanded_query = await retrieve_speculative_context(
+            container, user_input, question_vector, expansion_budget_ms
+        )
+        if expanded_query is None:
+            retrieval_mode = "hybrid"
+        else:
+            generated_search_query = expanded_query
+
     # --- Step 4: Prepare context for LLM and API ---
+    # Keep the prompt within budget, prefill time grows with every context token
+    context_obj, context_tokens = pack_context(context_obj, CONTEXT_TOKEN_BUDGET)
+    print(f"Packed context: {context_tokens['used']} tokens used, {context_tokens['trimmed']} trimmed")
     if not context_obj:
         print("No context found.")
         context_str = "No information found."
@@ -99,8 +246,14 @@ async def default_workflow(container: Container, user_input: str, **kwargs) -> d
     )
     
     # --- Step 6: Return the full log ---
-    return {
+    response = {
         "final_answer": final_answer,
         "generated_search_query": generated_search_query,
+        "retrieval_mode": retrieval_mode,
+        "context_tokens": context_tokens,
         "retrieved_context": context_obj # Pass the rich object to the API
-    }
\ No newline at end of file
+    }
+    # Answers without context are not worth reusing, newly ingested documents could answer them
+    if question_vector is not None and context_obj:
+        semantic_cache.store(question_vector, response, cited_documents=context_obj.keys(), options=cache_options)
+    return {**response, "cache_hit": False}
\ No newline at end of file
@@ -0,0 +1,53 @@
+from services.backend.src.services.document.chunk_assembler import assemble_chunks
+
+
+def _element(text, element_type="NarrativeText"):
+    return {"text": text, "type": element_type}
+
+
+def test_small_elements_are_merged_up_to_the_token_budget():
+    """
+    Consecutive small elements should be merged until the budget is reached.
+    """
+    elements = [_element("one two"), _element("three four"), _element("five six"), _element("seven")]
+
+    chunks = assemble_chunks(elements, max_tokens=4)
+
+    assert [chunk["text"] for chunk in chunks] == ["one two\nthree four", "five six\nseven"]
+    assert [(chunk["element_start"], chunk["element_end"]) for chunk in chunks] == [(0, 1), (2, 3)]
+
+
+def test_titles_start_a_new_chunk_without_overlap():
+    """
+    A title should close the current chunk and never share a chunk with the previous section.
+    """
+    elements = [_element("intro text"), _element("Setup", "Title"), _element("install it")]
+
+    chunks = assemble_chunks(elements, max_tokens=50, overlap_tokens=10)
+
+    assert [chunk["text"] for chunk in chunks] == ["intro text", "Setup\ninstall it"]
+    assert chunks[1]["element_start"] == 1
+
+
+def test_overlap_repeats_trailing_elements_within_a_section():
+    """
+    Trailing elements of a full chunk should be repeated at the start of the next one.
+    """
+    elements = [_element("a b c"), _element("d e"), _element("f g h")]
+
+    chunks = assemble_chunks(elements, max_tokens=5, overlap_tokens=2)
+
+    assert [chunk["text"] for chunk in chunks] == ["a b c\nd e", "d e\nf g h"]
+    assert [(chunk["element_start"], chunk["element_end"]) for chunk in chunks] == [(0, 1), (1, 2)]
+
+
+def test_oversized_elements_are_split_and_empty_elements_skipped():
+    """
+    Elements above the budget should be split into word windows, empty ones dropped.
+    """
+    elements = [_element(""), _element("w1 w2 w3 w4 w5 w6 w7")]
+
+    chunks = assemble_chunks(elements, max_tokens=3, overlap_tokens=1)
+
+    assert [chunk["text"] for chunk in chunks] == ["w1 w2 w3", "w3 w4 w5", "w5 w6 w7"]
+    assert all(chunk["element_start"] == 1 and chunk["element_end"] == 1 for chunk in chunks)
@@ -0,0 +1,50 @@
+import uuid
+
+from services.backend.src.services.document import chunk_text_store as store_module
+from services.backend.src.services.document.chunk_text_store import ChunkTextStore
+
+
+def _point_id(number):
+    return str(uuid.UUID(int=number))
+
+
+def test_texts_survive_reopening_and_latest_write_wins(tmp_path):
+    """
+    Reopening the store should rebuild the index, with replaced and deleted texts resolved.
+    """
+    path = str(tmp_path / "chunks.bin")
+    store = ChunkTextStore(path)
+    store.put_many([(_point_id(1), "/docs/a.txt", "first"), (_point_id(2), "/docs/a.txt", "second")])
+    store.put_many([(_point_id(1), "/docs/a.txt", "first, edited"), (_point_id(3), "/docs/b.txt", "third")])
+    store.delete([_point_id(2)])
+    assert store.get_many([_point_id(1), _point_id(2)]) == {_point_id(1): "first, edited"}
+    store.close()
+
+    reopened = ChunkTextStore(path)
+    assert reopened.get_many([_point_id(i) for i in range(1, 4)]) == {
+        _point_id(1): "first, edited", _point_id(3): "third"
+    }
+    reopened.delete_identifier("/docs/b.txt")
+    assert reopened.get_many([_point_id(3)]) == {}
+    reopened.close()
+
+
+def test_torn_record_is_dropped_and_garbage_compacted(tmp_path, monkeypatch):
+    """
+    A partially written record should be truncated on open, and dead records compacted away.
+    """
+    monkeypatch.setattr(store_module, "COMPACT_MIN_GARBAGE_BYTES", 0)
+    path = tmp_path / "chunks.bin"
+    store = ChunkTextStore(str(path))
+    store.put_many([(_point_id(1), "/docs/a.txt", "x" * 100)])
+    store.put_many([(_point_id(1), "/docs/a.txt", "kept")])
+    store.close()
+    with open(path, "ab") as file:
+        file.write(b"\x00" * 10)
+
+    reopened = ChunkTextStore(str(path))
+    assert reopened.get_many([_point_id(1)]) == {_point_id(1): "kept"}
+    assert reopened.get_metrics()["garbage_bytes"] == 0
+    reopened.put_many([(_point_id(2), "/docs/a.txt", "appended")])
+    assert reopened.get_many([_point_id(2)]) == {_point_id(2): "appended"}
+    reopened.close()
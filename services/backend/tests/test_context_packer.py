@@ -0,0 +1,62 @@
+from services.backend.src.services.document.context_packer import pack_context
+
+
+def _chunk(sequence, text, element_start, element_end, score=None):
+    return {"chunk_sequence": sequence, "text_content": text,
+            "element_start": element_start, "element_end": element_end, "score": score}
+
+
+def _document(best_score, chunks):
+    return {"text_content": "\n".join(chunk["text_content"] for chunk in chunks),
+            "best_score": best_score, "retrieved_chunks": len(chunks), "chunks": chunks}
+
+
+def test_overlap_between_consecutive_chunks_and_duplicates_are_removed():
+    """
+    Text carried over from the previous chunk and chunks already packed should not be repeated.
+    """
+    context = {
+        "/docs/a.txt": _document(0.9, [
+            _chunk(0, "alpha beta\ngamma delta", 0, 1, score=0.9),
+            _chunk(1, "gamma delta\nepsilon zeta", 1, 2),
+        ]),
+        "/docs/copy-of-a.txt": _document(0.8, [_chunk(0, "alpha  beta\ngamma delta", 0, 1, score=0.8)]),
+    }
+
+    packed, tokens = pack_context(context, token_budget=100)
+
+    assert packed["/docs/a.txt"]["text_content"] == "alpha beta\ngamma delta\nepsilon zeta"
+    assert "/docs/copy-of-a.txt" not in packed
+    assert (tokens["retrieved"], tokens["used"], tokens["trimmed"]) == (12, 6, 6)
+
+
+def test_budget_keeps_hits_and_their_closest_neighbours():
+    """
+    Under a tight budget, hits and the neighbours closest to them should be packed first.
+    """
+    chunks = [_chunk(sequence, f"chunk {sequence}", sequence, sequence) for sequence in range(7)]
+    chunks[1]["score"] = 0.9
+    chunks[5]["score"] = 0.6
+    context = {"/docs/a.txt": _document(0.9, chunks)}
+
+    packed, tokens = pack_context(context, token_budget=8)
+
+    assert packed["/docs/a.txt"]["text_content"] == "chunk 0\nchunk 1\nchunk 2\n[...]\nchunk 5"
+    assert packed["/docs/a.txt"]["packed_chunks"] == 4
+    assert (tokens["used"], tokens["trimmed"]) == (8, 6)
+
+
+def test_chunk_packed_without_its_predecessor_keeps_its_leading_text():
+    """
+    Overlap should only be stripped against a predecessor that is packed as well.
+    """
+    context = {"/docs/a.txt": _document(0.9, [
+        _chunk(0, "the question asked\nthe answer", 0, 1),
+        _chunk(1, "the answer\nis 42", 1, 2, score=0.9),
+    ])}
+
+    packed, tokens = pack_context(context, token_budget=4)
+
+    assert packed["/docs/a.txt"]["text_content"] == "the answer\nis 42"
+    assert packed["/docs/a.txt"]["packed_chunks"] == 1
+    assert tokens["used"] == 4
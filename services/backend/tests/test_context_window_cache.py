@@ -0,0 +1,39 @@
+import sys
+
+from services.backend.src.services.document.context_window_cache import ContextWindowCache
+
+
+def _window(text):
+    return {"text_content": text, "retrieved_chunks": 1}
+
+
+def test_cache_evicts_least_recently_used_windows_over_the_byte_budget():
+    """
+    Windows beyond the memory budget should be evicted oldest first.
+    """
+    text = "x" * 100
+    cache = ContextWindowCache(max_bytes=2 * sys.getsizeof(text))
+    cache.put("a", "h1", [1, 2], _window(text))
+    cache.put("b", "h1", [1], _window(text))
+    assert cache.get("a", "h1", [2, 1]) is not None
+    cache.put("c", "h1", [1], _window(text))
+
+    assert cache.get("b", "h1", [1]) is None
+    assert cache.get("a", "h1", [1, 2]) is not None
+    assert cache.get_metrics()["evictions"] == 1
+
+
+def test_invalidate_drops_every_window_of_a_document():
+    """
+    Invalidating an identifier should remove all of its windows and release their bytes.
+    """
+    cache = ContextWindowCache(max_bytes=10_000)
+    cache.put("a", "h1", [1], _window("one"))
+    cache.put("a", "h2", [1, 2], _window("two"))
+    cache.put("b", "h1", [1], _window("three"))
+
+    cache.invalidate("a")
+
+    assert cache.get("a", "h1", [1]) is None
+    assert cache.get("a", "h2", [1, 2]) is None
+    assert cache.get_metrics()["bytes"] == sys.getsizeof("three")
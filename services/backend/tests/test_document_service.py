@@ -0,0 +1,527 @@
+import asyncio
+import hashlib
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.models import Filter
+
+from services.backend.src.services.document import document_service as document_module
+from services.backend.src.services.document.document_service import DocumentService, chunk_point_id
+
+
+class FakeQdrantClient:
+    """In-memory stand-in for AsyncQdrantClient supporting the calls DocumentService makes."""
+
+    def __init__(self):
+        self.points = {}
+        self.upserted = []
+        self.deleted = []
+        self.scroll_calls = 0
+        self.retrieve_calls = 0
+        self.query_batch_calls = 0
+        # Scores stored points for search(), given the payload
+        self.scorer = lambda payload: 0.0
+
+    @classmethod
+    def _matches(cls, payload, query_filter):
+        if query_filter is None:
+            return True
+        if not all(cls._matches_condition(payload, condition) for condition in query_filter.must or []):
+            return False
+        if query_filter.should and not any(cls._matches_condition(payload, c) for c in query_filter.should):
+            return False
+        return True
+
+    @classmethod
+    def _matches_condition(cls, payload, condition):
+        if isinstance(condition, Filter):
+            return cls._matches(payload, condition)
+        if condition.match is None:
+            return True
+        allowed = getattr(condition.match, "any", None) or [condition.match.value]
+        return payload.get(condition.key) in allowed
+
+    @staticmethod
+    def _select(payload, with_payload):
+        if with_payload is True:
+            return dict(payload)
+        return {key: payload[key] for key in with_payload or [] if key in payload}
+
+    async def query_points(self, collection_name, query=None, query_filter=None, limit=10, prefetch=None, **kwargs):
+        if prefetch:
+            return SimpleNamespace(points=self._fuse(prefetch)[:limit])
+        hits = [SimpleNamespace(id=point_id, payload=dict(payload), score=1.0)
+                for point_id, (payload, _) in self.points.items() if self._matches(payload, query_filter)]
+        return SimpleNamespace(points=hits[:limit])
+
+    async def search(self, collection_name, query_vector, limit=10, score_threshold=None, **kwargs):
+        hits = [SimpleNamespace(id=point_id, payload=dict(payload), score=self.scorer(payload))
+                for point_id, (payload, _) in self.points.items()]
+        hits = [hit for hit in hits if score_threshold is None or hit.score >= score_threshold]
+        return sorted(hits, key=lambda hit: hit.score, reverse=True)[:limit]
+
+    async def query_batch_points(self, collection_name, requests, **kwargs):
+        self.query_batch_calls += 1
+        responses = []
+        for request in requests:
+            hits = sorted(((point_id, payload, self.scorer(payload)) for point_id, (payload, _) in self.points.items()),
+                          key=lambda hit: hit[2], reverse=True)[:request.limit]
+            responses.append(SimpleNamespace(points=[
+                SimpleNamespace(id=point_id, payload=self._select(payload, request.with_payload), score=score)
+                for point_id, payload, score in hits
+            ]))
+        return responses
+
+    def _fuse(self, prefetch):
+        # Reciprocal rank fusion of the dense (scorer) and sparse (dot product) rankings
+        fused = {}
+        for arm in prefetch:
+            if arm.using is None:
+                scored = [(point_id, self.scorer(payload)) for point_id, (payload, _) in self.points.items()]
+                scored = [(point_id, score) for point_id, score in scored
+                          if arm.score_threshold is None or score >= arm.score_threshold]
+            else:
+                query_weights = dict(zip(arm.query.indices, arm.query.values))
+                scored = []
+                for point_id, (_, vector) in self.points.items():
+                    sparse = vector[arm.using]
+                    score = sum(query_weights.get(index, 0.0) * value
+                                for index, value in zip(sparse.indices, sparse.values))
+                    if score > 0 and (arm.score_threshold is None or score >= arm.score_threshold):
+                        scored.append((point_id, score))
+            ranking = sorted(scored, key=lambda item: item[1], reverse=True)[:arm.limit]
+            for rank, (point_id, _) in enumerate(ranking):
+                fused[point_id] = fused.get(point_id, 0.0) + 1 / (rank + 2)
+        return [SimpleNamespace(id=point_id, payload=dict(self.points[point_id][0]), score=score)
+                for point_id, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
+
+    async def scroll(self, collection_name, scroll_filter=None, with_payload=True, limit=10, offset=None, **kwargs):
+        self.scroll_calls += 1
+        matches = [SimpleNamespace(id=point_id, payload=self._select(payload, with_payload))
+                   for point_id, (payload, _) in self.points.items() if self._matches(payload, scroll_filter)]
+        start = offset or 0
+        next_offset = start + limit if start + limit < len(matches) else None
+        return matches[start:start + limit], next_offset
+
+    async def retrieve(self, collection_name, ids, with_payload=True, with_vectors=False, **kwargs):
+        self.retrieve_calls += 1
+        return [SimpleNamespace(id=point_id, payload=self._select(self.points[point_id][0], with_payload),
+                                vector=self.points[point_id][1] if with_vectors else None)
+                for point_id in ids if point_id in self.points]
+
+    async def upsert(self, collection_name, points, **kwargs):
+        await asyncio.sleep(0)
+        self.upserted.extend(points)
+        for point in points:
+            self.points[point.id] = (dict(point.payload), point.vector)
+
+    async def batch_update_points(self, collection_name, update_operations, **kwargs):
+        for operation in update_operations:
+            for point_id in operation.set_payload.points:
+                self.points[point_id][0].update(operation.set_payload.payload)
+
+    async def delete(self, collection_name, points_selector, **kwargs):
+        self.deleted.append(points_selector)
+        if hasattr(points_selector, "points"):
+            doomed = list(points_selector.points)
+        else:
+            doomed = [point_id for point_id, (payload, _) in self.points.items()
+                      if self._matches(payload, points_selector)]
+        for point_id in doomed:
+            self.points.pop(point_id, None)
+
+
+class FakeQdrantService:
+    def __init__(self):
+        self.client = FakeQdrantClient()
+        self.sparse_vectors_enabled = True
+        self.search_params = None
+
+    async def get_client(self):
+        return self.client
+
+
+class FakeEmbeddingService:
+    def __init__(self, fail_on_call=None):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._fail_on_call = fail_on_call
+
+    async def embed_texts(self, texts):
+        self.calls.append(list(texts))
+        if self._fail_on_call is not None and len(self.calls) == self._fail_on_call:
+            raise RuntimeError("embedding failed")
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return [[float(len(text))] for text in texts]
+
+    async def embed_stream(self, texts, batch_size):
+        for start in range(0, len(texts), batch_size):
+            yield start, await self.embed_texts(texts[start:start + batch_size])
+
+    async def rerank(self, query, passages):
+        # Passages sharing more words with the query score higher
+        return [len(set(query.split()) & set(passage.split())) / 10 for passage in passages]
+
+
+class FakeUnstructuredService:
+    def __init__(self, chunk_count=0, texts=None):
+        self.texts = texts if texts is not None else [f"chunk {i}" for i in range(chunk_count)]
+
+    async def parse_document(self, filename, content_type, content):
+        return {"chunks": [{"text": text, "type": "NarrativeText"} for text in self.texts]}
+
+
+@pytest.fixture(autouse=True)
+def one_element_per_chunk(monkeypatch):
+    """Fixture that sizes chunk assembly so every two-word test element stays its own chunk."""
+    monkeypatch.setattr(document_module, "CHUNK_MAX_TOKENS", 2)
+    monkeypatch.setattr(document_module, "CHUNK_OVERLAP_TOKENS", 0)
+
+
+@pytest.fixture
+def small_batches(monkeypatch):
+    """Fixture that shrinks the ingestion batch size and concurrency."""
+    monkeypatch.setattr(document_module, "INGEST_BATCH_SIZE", 10)
+    monkeypatch.setattr(document_module, "INGEST_MAX_CONCURRENCY", 2)
+
+
+def test_insert_document_embeds_in_bounded_micro_batches(small_batches):
+    """
+    Chunks should be embedded and upserted batch by batch with bounded concurrency.
+    """
+    qdrant_service = FakeQdrantService()
+    embedding_service = FakeEmbeddingService()
+    service = DocumentService(qdrant_service, embedding_service, FakeUnstructuredService(45))
+
+    inserted = asyncio.run(service.insert_document("/docs/manual.txt", b"content"))
+
+    assert inserted is True
+    assert [len(call) for call in embedding_service.calls] == [10, 10, 10, 10, 5]
+    assert embedding_service.max_in_flight <= 2
+    sequences = sorted(point.payload["chunk_sequence"] for point in qdrant_service.client.upserted)
+    assert sequences == list(range(45))
+
+
+def test_insert_document_cleans_up_after_failed_batch(small_batches):
+    """
+    A failing batch should abort the ingestion and remove the partially written points.
+    """
+    qdrant_service = FakeQdrantService()
+    service = DocumentService(qdrant_service, FakeEmbeddingService(fail_on_call=3), FakeUnstructuredService(45))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(service.insert_document("/docs/manual.txt", b"content"))
+
+    assert len(qdrant_service.client.deleted) == 1
+
+
+def test_reingest_document_only_embeds_changed_chunks():
+    """
+    Re-ingesting a modified document should keep unchanged chunks and only embed new ones.
+    """
+    qdrant_service = FakeQdrantService()
+    embedding_service = FakeEmbeddingService()
+    unstructured_service = FakeUnstructuredService(texts=["intro text", "old paragraph", "outro text"])
+    service = DocumentService(qdrant_service, embedding_service, unstructured_service)
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    embedding_service.calls.clear()
+
+    unstructured_service.texts = ["new title", "intro text", "outro text"]
+    reingested = asyncio.run(service.reingest_document("/docs/manual.txt", b"v2"))
+
+    assert reingested is True
+    assert embedding_service.calls == [["new title"]]
+    stored = sorted(payload["chunk_sequence"] for payload, _ in qdrant_service.client.points.values())
+    assert stored == [0, 1, 2]
+    texts_by_sequence = {payload["chunk_sequence"]: payload["text_content"]
+                         for payload, _ in qdrant_service.client.points.values()}
+    assert texts_by_sequence == {0: "new title", 1: "intro text", 2: "outro text"}
+    assert all(payload["hash"] == hashlib.sha256(b"v2").hexdigest()
+               for payload, _ in qdrant_service.client.points.values())
+
+
+def test_reingest_document_skips_unchanged_content():
+    """
+    Re-ingesting identical content should not parse or embed anything.
+    """
+    qdrant_service = FakeQdrantService()
+    embedding_service = FakeEmbeddingService()
+    service = DocumentService(qdrant_service, embedding_service, FakeUnstructuredService(3))
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    embedding_service.calls.clear()
+
+    assert asyncio.run(service.reingest_document("/docs/manual.txt", b"v1")) is False
+    assert embedding_service.calls == []
+
+
+def test_duplicate_check_uses_the_local_hash_index():
+    """
+    Known hashes should be loaded once and duplicates skipped without querying Qdrant.
+    """
+    qdrant_service = FakeQdrantService()
+    qdrant_service.client.points["existing"] = ({"identifier": "/docs/a.txt", "hash": hashlib.sha256(b"a").hexdigest(),
+                                                 "chunk_sequence": 0}, [0.0])
+    embedding_service = FakeEmbeddingService()
+    service = DocumentService(qdrant_service, embedding_service, FakeUnstructuredService(1))
+
+    async def query_points_not_expected(*args, **kwargs):
+        raise AssertionError("duplicate check should not query Qdrant")
+    qdrant_service.client.query_points = query_points_not_expected
+
+    async def run():
+        assert await service.insert_document("/docs/copy-of-a.txt", b"a") is False
+        assert await service.insert_document("/docs/b.txt", b"b") is True
+        assert await service.insert_document("/docs/b-again.txt", b"b") is False
+        await service.delete_by_identifier("/docs/b.txt")
+        assert await service.insert_document("/docs/b-again.txt", b"b") is True
+
+    asyncio.run(run())
+    assert service.get_metrics()["hash_index"]["documents"] == 2
+
+
+def test_neighbours_of_distant_hits_are_fetched_in_one_request():
+    """
+    Neighbours of hits far apart in a long document should all be fetched by ID in one request.
+    """
+    qdrant_service = FakeQdrantService()
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService(200))
+    asyncio.run(service.insert_document("/docs/long.txt", b"long"))
+    hits = {"chunk 2": 0.9, "chunk 150": 0.8}
+    qdrant_service.client.scorer = lambda payload: hits.get(payload["text_content"], 0.0)
+    qdrant_service.client.scroll_calls = 0
+
+    context = asyncio.run(service.retrieve_and_enrich_context(
+        query_vector=[1.0], neighbor_count=1, score_threshold=0.5, top_k_docs=5
+    ))
+
+    assert (qdrant_service.client.scroll_calls, qdrant_service.client.retrieve_calls) == (0, 1)
+    assert context["/docs/long.txt"]["text_content"] == "\n".join(
+        f"chunk {i}" for i in [1, 2, 3, 149, 150, 151]
+    )
+    assert context["/docs/long.txt"]["best_score"] == 0.9
+    scores = {chunk["chunk_sequence"]: chunk["score"] for chunk in context["/docs/long.txt"]["chunks"]}
+    assert scores == {1: None, 2: 0.9, 3: None, 149: None, 150: 0.8, 151: None}
+
+
+def test_neighbours_of_legacy_points_with_random_ids_are_found_by_sequence():
+    """
+    Documents ingested before point IDs were derived should still get their neighbours.
+    """
+    qdrant_service = FakeQdrantService()
+    for sequence in range(5):
+        qdrant_service.client.points[str(uuid.uuid4())] = ({
+            "identifier": "/docs/old.txt", "hash": "old", "chunk_sequence": sequence,
+            "element_start": sequence, "element_end": sequence, "text_content": f"chunk {sequence}"
+        }, [0.0])
+    qdrant_service.client.scorer = lambda payload: 0.9 if payload["text_content"] == "chunk 2" else 0.0
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService())
+
+    context = asyncio.run(service.retrieve_and_enrich_context(
+        query_vector=[1.0], neighbor_count=1, score_threshold=0.5, top_k_docs=5
+    ))
+
+    assert context["/docs/old.txt"]["text_content"] == "chunk 1\nchunk 2\nchunk 3"
+
+
+def test_reingest_copies_vectors_of_moved_chunks_to_their_new_ids():
+    """
+    Chunks shifted by an insertion should keep their stored vector under their new deterministic ID.
+    """
+    qdrant_service = FakeQdrantService()
+    embedding_service = FakeEmbeddingService()
+    unstructured_service = FakeUnstructuredService(texts=["aa aa", "bbb bbb", "c c"])
+    service = DocumentService(qdrant_service, embedding_service, unstructured_service)
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    stored_vector_of_b = qdrant_service.client.points[chunk_point_id("/docs/manual.txt", 1)][1]
+    embedding_service.calls.clear()
+
+    unstructured_service.texts = ["new title", "aa aa", "bbb bbb", "c c"]
+    asyncio.run(service.reingest_document("/docs/manual.txt", b"v2"))
+
+    assert embedding_service.calls == [["new title"]]
+    points = qdrant_service.client.points
+    assert set(points) == {chunk_point_id("/docs/manual.txt", i) for i in range(4)}
+    payload, vector = points[chunk_point_id("/docs/manual.txt", 2)]
+    assert (payload["text_content"], payload["chunk_sequence"]) == ("bbb bbb", 2)
+    assert vector == stored_vector_of_b
+
+
+def test_stitched_windows_are_cached_until_the_document_changes():
+    """
+    Repeated retrievals should be served from the window cache until the document is re-ingested.
+    """
+    qdrant_service = FakeQdrantService()
+    unstructured_service = FakeUnstructuredService(10)
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), unstructured_service)
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    qdrant_service.client.scorer = lambda payload: 0.9 if payload["text_content"] == "chunk 5" else 0.0
+
+    def retrieve():
+        return asyncio.run(service.retrieve_and_enrich_context(
+            query_vector=[1.0], neighbor_count=1, score_threshold=0.5, top_k_docs=5
+        ))
+
+    first = retrieve()
+    second = retrieve()
+    assert first == second
+    assert qdrant_service.client.retrieve_calls == 1
+    assert service.get_metrics()["context_cache"]["hits"] == 1
+
+    unstructured_service.texts[5] = "chunk 5"
+    unstructured_service.texts[4] = "edited 4"
+    asyncio.run(service.reingest_document("/docs/manual.txt", b"v2"))
+    third = retrieve()
+    assert third["/docs/manual.txt"]["text_content"] == "edited 4\nchunk 5\nchunk 6"
+    assert service.get_metrics()["context_cache"]["entries"] == 1
+
+
+def test_windows_cached_during_ingestion_are_dropped_once_it_finishes(monkeypatch):
+    """
+    A query arriving between two batch upserts should not leave its partial window cached.
+    """
+    monkeypatch.setattr(document_module, "INGEST_BATCH_SIZE", 2)
+    monkeypatch.setattr(document_module, "INGEST_MAX_CONCURRENCY", 1)
+    qdrant_service = FakeQdrantService()
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService(5))
+    qdrant_service.client.scorer = lambda payload: 0.9 if payload["text_content"] == "chunk 0" else 0.0
+    upsert = qdrant_service.client.upsert
+    mid_ingest = []
+
+    def retrieve():
+        return service.retrieve_and_enrich_context(
+            query_vector=[1.0], neighbor_count=4, score_threshold=0.5, top_k_docs=5
+        )
+
+    async def upsert_then_query(collection_name, points, **kwargs):
+        await upsert(collection_name, points, **kwargs)
+        if not mid_ingest:
+            mid_ingest.append(await retrieve())
+
+    qdrant_service.client.upsert = upsert_then_query
+
+    async def run():
+        await service.insert_document("/docs/manual.txt", b"v1")
+        return await retrieve()
+
+    after_ingest = asyncio.run(run())
+
+    assert mid_ingest[0]["/docs/manual.txt"]["retrieved_chunks"] == 2
+    assert after_ingest["/docs/manual.txt"]["retrieved_chunks"] == 5
+
+
+def test_change_listeners_are_notified_after_the_writes_finish(small_batches):
+    """
+    Listeners such as the semantic cache should hear about a document again once all its chunks are stored,
+    so answers built from a half-written document are dropped.
+    """
+    qdrant_service = FakeQdrantService()
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService(25))
+    stored_at_notification = []
+    service.add_change_listener(lambda identifier: stored_at_notification.append(len(qdrant_service.client.points)))
+
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+
+    assert stored_at_notification == [0, 25]
+
+
+def test_hybrid_retrieval_finds_lexical_matches_the_dense_search_misses(monkeypatch):
+    """
+    With the query text, chunks sharing rare terms should be retrieved even below the dense threshold,
+    weak lexical matches should not be.
+    """
+    # The fake scores sparse vectors without IDF, a matched term contributes about 1.7
+    monkeypatch.setattr(document_module, "HYBRID_SPARSE_SCORE_THRESHOLD", 2.0)
+    qdrant_service = FakeQdrantService()
+    unstructured_service = FakeUnstructuredService(texts=["general overview", "error E4012", "closing notes"])
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), unstructured_service)
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    qdrant_service.client.scorer = lambda payload: 0.0
+
+    def retrieve(query_text):
+        return asyncio.run(service.retrieve_and_enrich_context(
+            query_vector=[1.0], neighbor_count=0, score_threshold=0.5, top_k_docs=5, query_text=query_text
+        ))
+
+    assert retrieve(None) == {}
+    context = retrieve("what does error e4012 mean")
+    assert context["/docs/manual.txt"]["text_content"] == "error E4012"
+    assert retrieve("general question") == {}
+
+
+def test_points_are_dense_only_without_sparse_vector_support():
+    """
+    Collections created before sparse vectors existed should keep receiving plain dense vectors.
+    """
+    qdrant_service = FakeQdrantService()
+    qdrant_service.sparse_vectors_enabled = False
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService(2))
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+
+    assert all(isinstance(vector, list) for _, vector in qdrant_service.client.points.values())
+
+
+def test_rerank_reorders_hits_before_documents_are_picked():
+    """
+    With a rerank query, the cross-encoder scores should decide which documents are kept.
+    """
+    qdrant_service = FakeQdrantService()
+    unstructured_service = FakeUnstructuredService(texts=["pump maintenance"])
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), unstructured_service)
+    asyncio.run(service.insert_document("/docs/pump.txt", b"pump"))
+    unstructured_service.texts = ["valve overview"]
+    asyncio.run(service.insert_document("/docs/valve.txt", b"valve"))
+    qdrant_service.client.scorer = lambda payload: 0.9 if payload["identifier"] == "/docs/valve.txt" else 0.8
+
+    context = asyncio.run(service.retrieve_and_enrich_context(
+        query_vector=[1.0], neighbor_count=0, score_threshold=0.5, top_k_docs=1,
+        rerank_query="how often is pump maintenance due"
+    ))
+
+    assert list(context) == ["/docs/pump.txt"]
+    assert context["/docs/pump.txt"]["best_score"] == 0.2
+
+
+def test_search_batch_embeds_and_queries_once_with_payload_projection():
+    """
+    A batch of queries should need one embedding call, one Qdrant call and load only projected fields.
+    """
+    qdrant_service = FakeQdrantService()
+    embedding_service = FakeEmbeddingService()
+    service = DocumentService(qdrant_service, embedding_service, FakeUnstructuredService(3))
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    embedding_service.calls.clear()
+    qdrant_service.client.scorer = lambda payload: payload["chunk_sequence"] / 10
+
+    results = asyncio.run(service.search_batch(["first", "second", "third"], limit=2, payload_fields=["hash"]))
+
+    assert len(embedding_service.calls) == 1
+    assert qdrant_service.client.query_batch_calls == 1
+    assert [[hit.chunk_sequence for hit in hits] for hits in results] == [[2, 1]] * 3
+    assert results[0][0].to_dict() == {"identifier": "/docs/manual.txt", "chunk_sequence": 2, "score": 0.2,
+                                       "hash": hashlib.sha256(b"v1").hexdigest()}
+
+
+def test_chunk_texts_live_in_the_text_store_when_configured(monkeypatch, tmp_path):
+    """
+    With a chunk text store, Qdrant payloads should carry no text and context should still be stitched.
+    """
+    monkeypatch.setattr(document_module, "CHUNK_TEXT_STORE_PATH", str(tmp_path / "chunks.bin"))
+    qdrant_service = FakeQdrantService()
+    service = DocumentService(qdrant_service, FakeEmbeddingService(), FakeUnstructuredService(5))
+    asyncio.run(service.insert_document("/docs/manual.txt", b"v1"))
+    qdrant_service.client.scorer = lambda payload: 0.9 if payload["chunk_sequence"] == 2 else 0.0
+
+    assert all("text_content" not in payload for payload, _ in qdrant_service.client.points.values())
+    context = asyncio.run(service.retrieve_and_enrich_context(
+        query_vector=[1.0], neighbor_count=1, score_threshold=0.5, top_k_docs=5
+    ))
+    assert context["/docs/manual.txt"]["text_content"] == "chunk 1\nchunk 2\nchunk 3"
+
+    asyncio.run(service.delete_by_identifier("/docs/manual.txt"))
+    assert service.get_metrics()["text_store"]["points"] == 0
+    service.dispose()
@@ -0,0 +1,69 @@
+import asyncio
+
+import numpy as np
+
+from services.backend.src.services.external.embedding_cache import EmbeddingCache
+
+
+def _open_cache(tmp_path, memory_entries=10, max_entries=100):
+    return EmbeddingCache(str(tmp_path / "embeddings.sqlite3"), memory_entries, max_entries)
+
+
+def test_cache_serves_repeated_texts_from_memory_and_disk(tmp_path):
+    """
+    Stored vectors should come back from memory and, after a restart, from disk.
+    """
+    async def run():
+        cache = _open_cache(tmp_path)
+        await cache.activate_model("bge")
+        assert await cache.get_many(["a", "b"]) == {}
+        await cache.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+        found = await cache.get_many(["b", "c", "a"])
+        assert {index: vector.tolist() for index, vector in found.items()} == {0: [3.0, 4.0], 2: [1.0, 2.0]}
+        assert found[0].dtype == np.float32 and not found[0].flags.writeable
+        assert (cache.memory_hits, cache.misses) == (2, 3)
+        cache.close()
+
+        reopened = _open_cache(tmp_path)
+        await reopened.activate_model("bge")
+        assert (await reopened.get_many(["a"]))[0].tolist() == [1.0, 2.0]
+        assert reopened.disk_hits == 1
+        reopened.close()
+
+    asyncio.run(run())
+
+
+def test_cache_is_cleared_when_the_model_changes(tmp_path):
+    """
+    Switching the embedding model should invalidate every stored vector.
+    """
+    async def run():
+        cache = _open_cache(tmp_path)
+        await cache.activate_model("bge")
+        await cache.put_many(["a"], [[1.0]])
+        cache.close()
+
+        reopened = _open_cache(tmp_path)
+        await reopened.activate_model("minilm")
+        await reopened.activate_model("bge")
+        assert await reopened.get_many(["a"]) == {}
+        reopened.close()
+
+    asyncio.run(run())
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    """
+    The disk store should be capped at max_entries, evicting the oldest entries first.
+    """
+    async def run():
+        cache = _open_cache(tmp_path, memory_entries=1, max_entries=2)
+        await cache.activate_model("bge")
+        for text in ["a", "b", "c"]:
+            await cache.put_many([text], [[1.0]])
+        assert cache.evictions == 1
+        assert cache.get_metrics()["disk_entries"] == 2
+        assert await cache.get_many(["a"]) == {}
+        cache.close()
+
+    asyncio.run(run())
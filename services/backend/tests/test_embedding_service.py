@@ -0,0 +1,163 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import numpy as np
+import pytest
+
+from services.backend.src.services.external.embedding_service import EmbeddingService
+
+
+class FakeEmbeddingsServer:
+    """
+    Answers /embed/stream with float32 records, the vector of a text is [len(text), start of its batch].
+    /embed/batch vectors are [len(text), marker], so vectors of a swapped model can be told apart.
+    """
+
+    def __init__(self, fail_at=None):
+        self.requests = []
+        self.model = "bge"
+        self.marker = -1
+        self._fail_at = fail_at
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/health":
+            return httpx.Response(200, json={"model": self.model})
+        body = json.loads(request.content)
+        if request.url.path == "/embed/batch":
+            self.requests.append(body)
+            vectors = np.array([[len(text), self.marker] for text in body["texts"]], dtype="<f4")
+            return httpx.Response(200, content=vectors.tobytes(), headers={
+                "content-type": "application/octet-stream", "x-embedding-shape": "%d,2" % len(vectors),
+                "x-embedding-model": self.model
+            })
+        self.requests.append(body)
+        assert request.headers["accept"] == "application/x-ndjson; dtype=float32"
+        texts, batch_size = body["texts"], body["batch_size"]
+        lines = []
+        for start in range(0, len(texts), batch_size):
+            if start == self._fail_at:
+                lines.append(json.dumps({"start": start, "error": "queue full"}))
+                break
+            vectors = np.array([[len(text), start] for text in texts[start:start + batch_size]], dtype="<f4")
+            lines.append(json.dumps({"start": start, "shape": list(vectors.shape), "dtype": "float32",
+                                     "data": base64.b64encode(vectors.tobytes()).decode()}))
+        return httpx.Response(200, content="\n".join(lines) + "\n",
+                              headers={"content-type": "application/x-ndjson", "x-embedding-model": self.model})
+
+
+@pytest.fixture
+def make_service(monkeypatch, tmp_path):
+    monkeypatch.setenv("EMBEDDING_SERVICE_URL", "http://embeddings")
+    monkeypatch.setenv("EMBEDDING_CACHE_PATH", str(tmp_path / "embeddings.sqlite3"))
+
+    def make(server, cache_enabled):
+        monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "true" if cache_enabled else "false")
+        service = EmbeddingService()
+        clients = {}
+
+        def client(_):
+            loop = asyncio.get_running_loop()
+            if loop not in clients:
+                clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(server.handle))
+            return clients[loop]
+
+        monkeypatch.setattr(type(service._http), "client", property(client))
+        return service
+
+    return make
+
+
+async def _collect(service, texts, batch_size):
+    return [(start, vectors.tolist()) async for start, vectors in service.embed_stream(texts, batch_size)]
+
+
+def test_embed_stream_yields_mini_batches_in_order(make_service):
+    """
+    Without cache hits, every mini-batch of the service should be passed on as it arrives.
+    """
+    server = FakeEmbeddingsServer()
+    service = make_service(server, cache_enabled=False)
+
+    batches = asyncio.run(_collect(service, ["a", "bb", "ccc", "dddd", "e"], 2))
+
+    assert batches == [(0, [[1, 0], [2, 0]]), (2, [[3, 2], [4, 2]]), (4, [[1, 4]])]
+    assert server.requests == [{"texts": ["a", "bb", "ccc", "dddd", "e"], "batch_size": 2}]
+
+
+def test_embed_stream_only_sends_uncached_texts(make_service):
+    """
+    Cached and repeated texts should not be streamed again, batches still follow the input order.
+    """
+    server = FakeEmbeddingsServer()
+    service = make_service(server, cache_enabled=True)
+
+    async def run():
+        await service.embed_texts(["bb"])
+        return await _collect(service, ["a", "bb", "a", "ccc"], 2)
+
+    batches = asyncio.run(run())
+
+    assert server.requests[-1] == {"texts": ["a", "ccc"], "batch_size": 2}
+    assert [start for start, _ in batches] == [0, 2]
+    assert [row[0] for _, vectors in batches for row in vectors] == [1, 2, 1, 3]
+
+
+def test_embed_stream_raises_on_error_record(make_service):
+    service = make_service(FakeEmbeddingsServer(fail_at=2), cache_enabled=False)
+
+    with pytest.raises(RuntimeError, match="queue full"):
+        asyncio.run(_collect(service, ["a", "bb", "ccc"], 2))
+
+
+def test_embed_texts_follows_a_model_swap(make_service):
+    """
+    A response from a new model should re-key the cache at once, so old vectors are never mixed in.
+    """
+    server = FakeEmbeddingsServer()
+    service = make_service(server, cache_enabled=True)
+
+    async def run():
+        await service.embed_texts(["bb"])
+        server.model, server.marker = "e5", -2
+        return await service.embed_texts(["a", "bb"])
+
+    vectors = asyncio.run(run())
+
+    assert vectors.tolist() == [[1, -2], [2, -2]]
+    assert service.get_metrics()["cache"]["model"] == "e5"
+
+
+def test_embed_stream_follows_a_model_swap(make_service):
+    """
+    When the stream reveals a new model, texts served from the old model's cache should be streamed again.
+    """
+    server = FakeEmbeddingsServer()
+    service = make_service(server, cache_enabled=True)
+
+    async def run():
+        await service.embed_texts(["bb"])
+        server.model = "e5"
+        return await _collect(service, ["a", "bb"], 2)
+
+    batches = asyncio.run(run())
+
+    assert server.requests[-2:] == [{"texts": ["a"], "batch_size": 2}, {"texts": ["a", "bb"], "batch_size": 2}]
+    assert batches == [(0, [[1, 0], [2, 0]])]
+
+
+def test_fully_cached_calls_recheck_the_model(make_service, monkeypatch):
+    """
+    Calls that never reach the service should still notice a swap once the check interval passed.
+    """
+    monkeypatch.setenv("EMBEDDING_MODEL_CHECK_SECONDS", "0")
+    server = FakeEmbeddingsServer()
+    service = make_service(server, cache_enabled=True)
+
+    async def run():
+        await service.embed_texts(["bb"])
+        server.model, server.marker = "e5", -2
+        return await service.embed_texts(["bb"])
+
+    assert asyncio.run(run()).tolist() == [[2, -2]]
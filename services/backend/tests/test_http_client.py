@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.backend.src.container import Container
+from services.backend.src.services.external.http_client import PooledHttpClient
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200 if self.path == "/ok" else 500)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    """Fixture that serves a tiny keep-alive HTTP server on a random port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_pooled_client_reuses_connections(local_server):
+    """
+    Several sequential requests should share one keep-alive connection.
+    """
+    http = PooledHttpClient("TEST_SERVICE", default_timeout=5.0)
+
+    async def run():
+        for _ in range(5):
+            response = await http.client.get(f"{local_server}/ok")
+            assert response.status_code == 200
+        await http.client.get(f"{local_server}/fail")
+        await http.aclose()
+
+    asyncio.run(run())
+
+    metrics = http.metrics.to_dict()
+    assert metrics["requests"] == 6
+    assert metrics["connections_opened"] == 1
+    assert metrics["connections_reused"] == 5
+    assert metrics["errors"] == 1
+
+
+def test_container_dispose_calls_singleton_hooks():
+    """
+    Container.dispose should await the dispose() hook of every created singleton.
+    """
+    disposed = []
+
+    class Disposable:
+        async def dispose(self):
+            disposed.append(self)
+
+    container = Container()
+    container.register_singleton(Disposable)
+    instance = container.resolve(Disposable)
+
+    asyncio.run(container.dispose())
+
+    assert disposed == [instance]
+    assert container.resolve(Disposable) is not instance
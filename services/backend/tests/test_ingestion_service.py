@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+
+from services.backend.src.services.ingestion import ingestion_service as ingestion_module
+from services.backend.src.services.ingestion.ingestion_job import IngestionJob
+from services.backend.src.services.ingestion.ingestion_service import IngestionService
+from services.backend.src.services.watcher.watcher import Watcher
+from services.backend.src.services.watcher.watcher_service import WatcherService
+
+
+class RecordingDocumentService:
+    def __init__(self, failures=0, gate=None):
+        self.calls = []
+        self._failures = failures
+        self._gate = gate
+
+    async def insert_document(self, identifier, raw_content, content_type):
+        self.calls.append(("insert", identifier))
+        if self._failures:
+            self._failures -= 1
+            raise RuntimeError("embedding service unavailable")
+        return True
+
+    async def reingest_document(self, identifier, raw_content, content_type):
+        self.calls.append(("reingest", identifier))
+        return True
+
+    async def delete_by_identifier(self, identifier):
+        self.calls.append(("delete", identifier))
+        if self._gate is not None:
+            await self._gate.wait()
+
+
+@pytest.fixture
+def single_worker(monkeypatch):
+    """Fixture that runs one worker without retry delays."""
+    monkeypatch.setattr(ingestion_module, "INGESTION_WORKERS", 1)
+    monkeypatch.setattr(ingestion_module, "INGESTION_RETRY_DELAY", 0)
+
+
+async def _wait_until_finished(service, jobs):
+    while not all(job.finished_at for job in jobs):
+        await asyncio.sleep(0.01)
+
+
+def test_jobs_run_deletes_first_then_smaller_files(single_worker, tmp_path):
+    """
+    Queued jobs should be picked by priority: deletes, then files by ascending size.
+    """
+    document_service = RecordingDocumentService()
+    (tmp_path / "big.txt").write_text("x" * 100)
+    (tmp_path / "small.txt").write_text("x")
+
+    async def run():
+        service = IngestionService(document_service)
+        # Occupy the only worker so the remaining jobs are ordered by the queue
+        blocker = IngestionJob("delete", "blocker")
+        jobs = [
+            blocker,
+            IngestionJob("insert", "big", path=str(tmp_path / "big.txt"), size=100),
+            IngestionJob("insert", "small", path=str(tmp_path / "small.txt"), size=1),
+            IngestionJob("delete", "gone"),
+        ]
+        for job in jobs:
+            await service.submit(job)
+        await _wait_until_finished(service, jobs)
+        await service.dispose()
+
+    asyncio.run(run())
+
+    assert document_service.calls == [("delete", "blocker"), ("delete", "gone"), ("insert", "small"), ("insert", "big")]
+
+
+def test_jobs_for_one_document_keep_their_submission_order(single_worker, tmp_path):
+    """
+    A delete submitted after an insert of the same document must not overtake it.
+    """
+    document_service = RecordingDocumentService()
+    (tmp_path / "doc.txt").write_text("content")
+
+    async def run():
+        service = IngestionService(document_service)
+        jobs = [
+            IngestionJob("delete", "blocker"),
+            IngestionJob("insert", "doc", path=str(tmp_path / "doc.txt"), size=7),
+            IngestionJob("delete", "doc"),
+            IngestionJob("delete", "other"),
+        ]
+        for job in jobs:
+            await service.submit(job)
+        await _wait_until_finished(service, jobs)
+        await service.dispose()
+
+    asyncio.run(run())
+
+    assert document_service.calls == [("delete", "blocker"), ("delete", "other"), ("insert", "doc"), ("delete", "doc")]
+
+
+def test_failed_jobs_are_retried_then_reported(single_worker, monkeypatch, tmp_path):
+    """
+    Failing jobs should be retried and, once retries are exhausted, marked failed.
+    """
+    monkeypatch.setattr(ingestion_module, "INGESTION_MAX_RETRIES", 1)
+    (tmp_path / "doc.txt").write_text("content")
+    failed_jobs = []
+
+    async def run(failures):
+        service = IngestionService(RecordingDocumentService(failures=failures))
+        job = IngestionJob("insert", "doc", path=str(tmp_path / "doc.txt"), on_failed=failed_jobs.append)
+        await service.submit(job)
+        await _wait_until_finished(service, [job])
+        await service.dispose()
+        return job, service.get_status()
+
+    recovered, status = asyncio.run(run(failures=1))
+    assert (recovered.status, recovered.attempts, status["retried"]) == ("completed", 2, 1)
+
+    failed, status = asyncio.run(run(failures=5))
+    assert (failed.status, failed.attempts, status["failed"]) == ("failed", 2, 1)
+    assert failed_jobs == [failed]
+
+
+def test_submit_waits_while_the_queue_is_full(single_worker, monkeypatch):
+    """
+    Producers should be held back once the bounded queue is full.
+    """
+    monkeypatch.setattr(ingestion_module, "INGESTION_QUEUE_SIZE", 1)
+
+    async def run():
+        gate = asyncio.Event()
+        service = IngestionService(RecordingDocumentService(gate=gate))
+        await service.submit(IngestionJob("delete", "a"))
+        await asyncio.sleep(0.01)  # the only worker is now stuck on "a"
+        await service.submit(IngestionJob("delete", "b"))
+        blocked = asyncio.create_task(service.submit(IngestionJob("delete", "c")))
+        await asyncio.sleep(0.01)
+        was_blocked = not blocked.done()
+        gate.set()
+        await blocked
+        await service.dispose()
+        return was_blocked
+
+    assert asyncio.run(run())
+
+
+def test_watcher_status_counts_queued_and_running_jobs_of_its_directory(single_worker, tmp_path):
+    """
+    The per-watcher counters shown by the frontend should come from the ingestion queue.
+    """
+    watched = tmp_path / "watched"
+
+    async def run():
+        gate = asyncio.Event()
+        ingestion_service = IngestionService(RecordingDocumentService(gate=gate))
+        watcher_service = WatcherService(ingestion_service)
+        watcher = Watcher(ingestion_service)
+        watcher.watching_directory = str(watched)
+        watcher_service._watchers[str(watched)] = watcher
+
+        jobs = [IngestionJob("delete", str(watched / name)) for name in ("a.txt", "b.txt", "c.txt")]
+        jobs.append(IngestionJob("delete", str(tmp_path / "elsewhere.txt")))
+        for job in jobs:
+            await ingestion_service.submit(job)
+        await asyncio.sleep(0.01)
+        status = watcher_service.get_status()["watchers"][0]
+        gate.set()
+        await _wait_until_finished(ingestion_service, jobs)
+        await ingestion_service.dispose()
+        return status
+
+    status = asyncio.run(run())
+    assert (status["currently_processing"], status["files_being_ingested"]) == (2, 1)
@@ -0,0 +1,40 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from qdrant_client.models import SparseVector
+
+from services.backend.src.migrations.rebuild_documents_collection import rebuild_points
+from services.backend.src.services.document.chunk_text_store import ChunkTextStore
+from services.backend.src.services.external.qdrant_service import DENSE_VECTOR_NAME, SPARSE_VECTOR_NAME
+
+
+def _record(number, vector, **payload):
+    return SimpleNamespace(id=str(uuid.UUID(int=number)), vector=vector,
+                           payload={"identifier": "/docs/a.txt", **payload})
+
+
+def test_sparse_vectors_come_from_existing_vectors_payload_or_text_store(tmp_path):
+    """
+    Existing sparse vectors should be kept, missing ones encoded from the payload or the text store.
+    """
+    store = ChunkTextStore(str(tmp_path / "chunks.bin"))
+    store.put_many([(str(uuid.UUID(int=3)), "/docs/a.txt", "stored chunk text")])
+    existing = SparseVector(indices=[7], values=[0.5])
+    records = [
+        _record(1, {DENSE_VECTOR_NAME: [1.0], SPARSE_VECTOR_NAME: existing}),
+        _record(2, [2.0], text_content="payload chunk text"),
+        _record(3, {DENSE_VECTOR_NAME: [3.0]}),
+    ]
+
+    points = rebuild_points(records, store)
+
+    assert [point.vector[DENSE_VECTOR_NAME] for point in points] == [[1.0], [2.0], [3.0]]
+    assert points[0].vector[SPARSE_VECTOR_NAME] == existing
+    assert all(points[i].vector[SPARSE_VECTOR_NAME].indices for i in (1, 2))
+    store.close()
+
+
+def test_point_without_any_text_aborts_the_rebuild():
+    with pytest.raises(RuntimeError, match="No text for point"):
+        rebuild_points([_record(1, [1.0])], None)
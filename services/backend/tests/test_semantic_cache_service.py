@@ -0,0 +1,93 @@
+from services.backend.src.services.semantic_cache import semantic_cache_service
+from services.backend.src.services.semantic_cache.semantic_cache_service import SemanticCacheService
+
+
+class FakeDocumentService:
+    def __init__(self):
+        self.listeners = []
+
+    def add_change_listener(self, listener):
+        self.listeners.append(listener)
+
+    def document_changed(self, identifier):
+        for listener in self.listeners:
+            listener(identifier)
+
+
+def _response(answer):
+    return {"final_answer": answer, "generated_search_query": "q", "retrieved_context": {}}
+
+
+def test_similar_queries_reuse_the_cached_response():
+    """
+    A query above the similarity threshold should hit, an unrelated one should miss.
+    """
+    cache = SemanticCacheService(FakeDocumentService())
+    cache.store([1.0, 0.0, 0.0], _response("a"), cited_documents=["doc"])
+
+    assert cache.lookup([0.99, 0.01, 0.0])["final_answer"] == "a"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    metrics = cache.get_metrics()
+    assert (metrics["hits"], metrics["misses"]) == (1, 1)
+
+
+def test_changing_a_cited_document_invalidates_its_entries():
+    """
+    Re-ingesting or deleting a document should drop every answer that cited it.
+    """
+    documents = FakeDocumentService()
+    cache = SemanticCacheService(documents)
+    cache.store([1.0, 0.0], _response("a"), cited_documents=["doc-a"])
+    cache.store([0.0, 1.0], _response("b"), cited_documents=["doc-b"])
+
+    documents.document_changed("doc-a")
+
+    assert cache.lookup([1.0, 0.0]) is None
+    assert cache.lookup([0.0, 1.0])["final_answer"] == "b"
+    assert cache.get_metrics()["invalidations"] == 1
+
+
+def test_entries_expire_and_are_evicted_oldest_first(monkeypatch):
+    """
+    Entries past the TTL should miss, and the cache should not grow past its entry cap.
+    """
+    monkeypatch.setattr(semantic_cache_service, "SEMANTIC_CACHE_MAX_ENTRIES", 2)
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_service.time, "time", lambda: now[0])
+    cache = SemanticCacheService(FakeDocumentService())
+    cache.store([1.0, 0.0, 0.0], _response("a"), cited_documents=[])
+    cache.store([0.0, 1.0, 0.0], _response("b"), cited_documents=[])
+    cache.store([0.0, 0.0, 1.0], _response("c"), cited_documents=[])
+
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.get_metrics()["entries"] == 2
+
+    now[0] += semantic_cache_service.SEMANTIC_CACHE_TTL_SECONDS + 1
+    assert cache.lookup([0.0, 0.0, 1.0]) is None
+    assert cache.get_metrics()["entries"] == 0
+
+
+def test_entries_are_only_reused_for_the_same_options():
+    """
+    An answer retrieved in one mode or budget should not be served for a request asking for another.
+    """
+    cache = SemanticCacheService(FakeDocumentService())
+    cache.store([1.0, 0.0], _response("hybrid"), cited_documents=[], options=("hybrid", 150.0))
+
+    assert cache.lookup([1.0, 0.0], options=("speculative", 150.0)) is None
+    assert cache.lookup([1.0, 0.0], options=("hybrid", 50.0)) is None
+    assert cache.lookup([1.0, 0.0], options=("hybrid", 150.0))["final_answer"] == "hybrid"
+
+
+def test_a_new_embedding_dimension_clears_the_cache():
+    """
+    After an embedding model swap old vectors cannot be compared, the lookup should miss and start over.
+    """
+    cache = SemanticCacheService(FakeDocumentService())
+    cache.store([1.0, 0.0], _response("old"), cited_documents=["doc"])
+
+    assert cache.lookup([1.0, 0.0, 0.0]) is None
+    assert cache.get_metrics()["entries"] == 0
+
+    cache.store([1.0, 0.0, 0.0], _response("new"), cited_documents=["doc"])
+    assert cache.lookup([1.0, 0.0, 0.0])["final_answer"] == "new"
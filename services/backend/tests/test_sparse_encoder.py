@@ -0,0 +1,28 @@
+from services.backend.src.services.document.sparse_encoder import encode_document, encode_query, tokenize
+
+
+def test_tokenize_lowercases_and_drops_stopwords():
+    """
+    Tokens should be lowercased words without common stopwords.
+    """
+    assert tokenize("What is the Error-Code E4012?") == ["error", "code", "e4012"]
+
+
+def test_document_weights_saturate_with_term_frequency():
+    """
+    Repeated terms should weigh more, but less than linearly (BM25 saturation).
+    """
+    once = encode_document("pump")
+    thrice = encode_document("pump pump pump")
+    assert once.indices == thrice.indices
+    assert once.values[0] < thrice.values[0] < 3 * once.values[0]
+
+
+def test_query_terms_share_indices_with_documents():
+    """
+    Query and document encodings should map the same term to the same index.
+    """
+    document = encode_document("replace the pump filter")
+    query = encode_query("how to replace a filter")
+    assert set(query.indices) <= set(document.indices)
+    assert query.values == [1.0] * len(query.indices)
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+import pytest
+
+from services.backend.src.services.external.vector_wire import accept_header, decode_vectors
+
+
+def test_octet_stream_float32_is_wrapped_without_copying():
+    """
+    Raw float32 payloads should become a read-only view over the response bytes.
+    """
+    vectors = np.arange(6, dtype="<f4").reshape(2, 3)
+    content = vectors.tobytes()
+    headers = {"x-embedding-shape": "2,3", "x-embedding-dtype": "float32"}
+
+    decoded = decode_vectors("application/octet-stream", headers, content, "embeddings")
+    assert decoded.dtype == np.float32 and decoded.shape == (2, 3)
+    assert np.array_equal(decoded, vectors)
+    assert not decoded.flags.writeable and np.shares_memory(decoded, np.frombuffer(content, dtype="<f4"))
+
+
+def test_float16_and_json_payloads_decode_to_float32():
+    """
+    float16 payloads should be widened and JSON answers of older services still understood.
+    """
+    vectors = np.array([[0.5, -1.0], [2.0, 0.25]], dtype="<f2")
+    decoded = decode_vectors("application/octet-stream",
+                             {"x-embedding-shape": "2,2", "x-embedding-dtype": "float16"},
+                             vectors.tobytes(), "embeddings")
+    assert decoded.dtype == np.float32 and decoded.tolist() == [[0.5, -1.0], [2.0, 0.25]]
+
+    body = json.dumps({"embeddings": [[0.5, -1.0]]}).encode()
+    decoded = decode_vectors("application/json", {}, body, "embeddings")
+    assert decoded.dtype == np.float32 and decoded.tolist() == [[0.5, -1.0]]
+
+
+def test_msgpack_payload_carries_its_shape():
+    msgpack = pytest.importorskip("msgpack")
+    vectors = np.ones((3, 4), dtype="<f4")
+    content = msgpack.packb({"shape": [3, 4], "dtype": "float32", "data": vectors.tobytes()})
+    assert np.array_equal(decode_vectors("application/msgpack", {}, content, "embeddings"), vectors)
+
+
+def test_accept_header_keeps_json_as_fallback():
+    assert accept_header("json", "float32") == "application/json"
+    assert accept_header("octet-stream", "float16") == "application/octet-stream; dtype=float16, application/json;q=0.5"
+    with pytest.raises(ValueError):
+        accept_header("protobuf", "float32")
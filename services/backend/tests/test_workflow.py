@@ -0,0 +1,110 @@
+import asyncio
+import typing
+
+import pytest
+from pydantic import ValidationError
+
+from services.backend.src.api.routers.generate import GenerateRequest
+from services.backend.src.services.document.document_service import DocumentService
+from services.backend.src.services.external.embedding_service import EmbeddingService
+from services.backend.src.services.external.ollama_service import OllamaService
+from services.backend.src.workflows.default.workflow import RETRIEVAL_MODES, merge_contexts, \
+    retrieve_speculative_context
+
+
+class FakeContainer:
+    def __init__(self, services):
+        self._services = services
+
+    def resolve(self, cls):
+        return self._services[cls]
+
+
+class SlowOllamaService:
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def generate_response(self, model, prompt):
+        await asyncio.sleep(self.delay)
+        return "expanded passage"
+
+
+class FakeEmbeddingService:
+    async def embed_texts(self, texts):
+        return [[1.0] for _ in texts]
+
+
+class RecordingDocumentService:
+    """Returns one document per retrieval, named after the kind of query used."""
+
+    def __init__(self):
+        self.started = []
+
+    async def retrieve_and_enrich_context(self, query_vector, query_text=None, **kwargs):
+        kind = "raw" if query_text is not None else "expanded"
+        self.started.append(kind)
+        return {f"/docs/{kind}.txt": {"text_content": kind, "best_score": 1.0, "retrieved_chunks": 1}}
+
+
+def _container(expansion_delay):
+    document_service = RecordingDocumentService()
+    return FakeContainer({
+        OllamaService: SlowOllamaService(expansion_delay),
+        EmbeddingService: FakeEmbeddingService(),
+        DocumentService: document_service,
+    }), document_service
+
+
+def test_raw_query_is_searched_while_the_query_is_expanded():
+    """
+    The raw-query search should not wait for expansion, and both result sets should be merged.
+    """
+    container, document_service = _container(expansion_delay=0.05)
+
+    context, expanded_query = asyncio.run(retrieve_speculative_context(container, "question"))
+
+    assert expanded_query == "expanded passage"
+    assert document_service.started == ["raw", "expanded"]
+    assert set(context) == {"/docs/raw.txt", "/docs/expanded.txt"}
+
+
+def test_expansion_over_budget_falls_back_to_raw_results():
+    """
+    If the expansion misses the latency budget, only the raw-query results should be returned.
+    """
+    container, document_service = _container(expansion_delay=5)
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        result = await retrieve_speculative_context(container, "question", budget_ms=50)
+        return result, asyncio.get_running_loop().time() - started
+
+    (context, expanded_query), elapsed = asyncio.run(run())
+
+    assert expanded_query is None
+    assert list(context) == ["/docs/raw.txt"]
+    assert elapsed < 1
+
+
+def test_merge_contexts_ranks_by_reciprocal_rank_and_prefers_expanded_windows():
+    """
+    Documents found by both retrievals should rank first and keep the expanded window.
+    """
+    expanded = {"a": {"text_content": "a expanded"}, "b": {"text_content": "b expanded"}}
+    raw = {"b": {"text_content": "b raw"}, "c": {"text_content": "c raw"}}
+
+    merged = merge_contexts(expanded, raw, top_k=2)
+
+    assert list(merged) == ["b", "a"]
+    assert merged["b"]["text_content"] == "b expanded"
+
+
+def test_unknown_retrieval_modes_are_rejected_by_request_validation():
+    """
+    The API should answer an unknown retrieval mode with a 422, and accept exactly the workflow's modes.
+    """
+    mode_type = typing.get_args(GenerateRequest.model_fields["retrieval_mode"].annotation)[0]
+    assert typing.get_args(mode_type) == RETRIEVAL_MODES
+    assert GenerateRequest(query="q").retrieval_mode is None
+    with pytest.raises(ValidationError):
+        GenerateRequest(query="q", retrieval_mode="fast")
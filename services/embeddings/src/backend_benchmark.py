@@ -0,0 +1,94 @@
+"""
+Compares throughput and output agreement of the embedding inference backends.
+
+Every backend encodes the same fixed corpus, throughput is reported in texts per second and
+agreement as the cosine similarity between each backend's vectors and the torch vectors.
+
+    python -m src.backend_benchmark --backends torch,onnx,onnx-int8 --texts 2000
+    python -m src.backend_benchmark --corpus corpus.txt   # one text per line
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from .encoder_pool import configure_torch_threads
+from .model_loader import BACKENDS, DEFAULT_QUANTIZATION_CONFIG, load_model, prepare_model
+
+WORDS = (
+    "retrieval embedding vector document query index search model token context answer "
+    "section paragraph network latency memory cluster storage throughput quantization batch "
+    "server client request response cache database table schema migration release version "
+    "deep learning training inference accuracy recall precision evaluation benchmark dataset"
+).split()
+
+
+def build_corpus(count: int, seed: int = 0) -> list:
+    """Deterministic pseudo-sentences of mixed length, close enough to chunk-sized passages."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        length = rng.choice((8, 16, 32, 64, 128, 256))
+        corpus.append(" ".join(rng.choice(WORDS) for _ in range(length)).capitalize() + ".")
+    return corpus
+
+
+def run_backend(model_name: str, backend: str, corpus: list, batch_size: int, cache_dir: str,
+                quantization_config: str) -> tuple:
+    model = load_model(prepare_model(model_name, backend, cache_dir, quantization_config))
+    model.encode(corpus[:batch_size], batch_size=batch_size)  # warm up
+    started = time.perf_counter()
+    vectors = model.encode(corpus, batch_size=batch_size, convert_to_numpy=True)
+    elapsed = time.perf_counter() - started
+    return vectors.astype(np.float32), len(corpus) / elapsed
+
+
+def cosine_agreement(vectors: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    return np.sum(vectors * reference, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "BAAI/bge-large-en-v1.5"))
+    parser.add_argument("--backends", default=",".join(BACKENDS),
+                        help="Comma separated backends, torch is always run as the reference")
+    parser.add_argument("--corpus", help="File with one text per line, a generated corpus is used otherwise")
+    parser.add_argument("--texts", type=int, default=1000, help="Size of the generated corpus")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBED_MAX_BATCH_SIZE", 64)))
+    parser.add_argument("--cache-dir", default=os.getenv("EMBED_ONNX_CACHE_DIR", "models/onnx"))
+    parser.add_argument("--quantization-config",
+                        default=os.getenv("EMBED_ONNX_QUANTIZATION_CONFIG", DEFAULT_QUANTIZATION_CONFIG))
+    parser.add_argument("--torch-threads", type=int, default=int(os.getenv("TORCH_NUM_THREADS", 0)))
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as file:
+            corpus = [line.strip() for line in file if line.strip()]
+    else:
+        corpus = build_corpus(args.texts)
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    if "torch" in backends:
+        backends.remove("torch")
+    backends.insert(0, "torch")
+    configure_torch_threads(args.torch_threads, 0)
+
+    print(f"{args.model}: {len(corpus)} texts, batch size {args.batch_size}")
+    print(f"{'backend':<10} {'texts/s':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>8}")
+    reference = None
+    reference_rate = None
+    for backend in backends:
+        vectors, rate = run_backend(args.model, backend, corpus, args.batch_size, args.cache_dir,
+                                    args.quantization_config)
+        if reference is None:
+            reference, reference_rate = vectors, rate
+        agreement = cosine_agreement(vectors, reference)
+        print(f"{backend:<10} {rate:>9.1f} {rate / reference_rate:>7.2f}x "
+              f"{agreement.mean():>9.5f} {agreement.min():>8.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, List
+
+import numpy as np
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class RequestTooLargeError(Exception):
+    """The request has more texts than the queue can ever hold, retrying cannot help."""
+
+
+class _PendingRequest:
+    __slots__ = ("texts", "future", "results", "next_index", "remaining", "queued_at")
+
+    def __init__(self, texts: List[str], future: asyncio.Future):
+        self.texts = texts
+        self.future = future
+        # (start, vectors) pieces, one per batch the request was spread over
+        self.results = []
+        self.next_index = 0
+        self.remaining = len(texts)
+        self.queued_at = time.perf_counter()
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces texts from concurrent requests into shared encode calls.
+
+    A batch is run as soon as max_batch_size texts are waiting, or max_wait_ms after the first
+    text arrived. Requests larger than a batch are spread over several batches, and every
+    request gets its vectors back in its own order. Up to max_concurrent_batches batches are
+    encoded at once (one per model replica); texts keep queueing while all of them are busy.
+    """
+
+    def __init__(self, encode: Callable[[List[str]], Awaitable[np.ndarray]], max_batch_size: int,
+                 max_wait_ms: float, max_queue_size: int, max_concurrent_batches: int = 1):
+        self._encode = encode
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._max_queue_size = max_queue_size
+        self._pending: "deque[_PendingRequest]" = deque()
+        self._queued_texts = 0
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._encode_slots = asyncio.Semaphore(max_concurrent_batches)
+        self._batch_tasks = set()
+
+        self.requests = 0
+        self.rejected = 0
+        self.batches = 0
+        self.texts = 0
+        self.full_batches = 0
+        self.encode_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for task in list(self._batch_tasks):
+            task.cancel()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        for request in self._pending:
+            if not request.future.done():
+                request.future.set_exception(RuntimeError("Embedding batcher stopped"))
+        self._pending.clear()
+        self._queued_texts = 0
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Queues the texts and waits for their vectors, one row per text.
+        Raises QueueFullError when the queue is full, RequestTooLargeError when the texts exceed its capacity.
+        """
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        if len(texts) > self._max_queue_size:
+            self.rejected += 1
+            raise RequestTooLargeError(f"{len(texts)} texts exceed the queue capacity of {self._max_queue_size}")
+        if self._queued_texts + len(texts) > self._max_queue_size:
+            self.rejected += 1
+            raise QueueFullError(f"{self._queued_texts} texts already queued")
+
+        request = _PendingRequest(texts, asyncio.get_running_loop().create_future())
+        self._pending.append(request)
+        self._queued_texts += len(texts)
+        self.requests += 1
+        self._wakeup.set()
+        return await request.future
+
+    def get_metrics(self) -> dict:
+        return {
+            "max_batch_size": self._max_batch_size,
+            "max_wait_ms": self._max_wait * 1000,
+            "queue_depth": self._queued_texts,
+            "queue_capacity": self._max_queue_size,
+            "batches_in_flight": len(self._batch_tasks),
+            "requests": self.requests,
+            "rejected": self.rejected,
+            "batches": self.batches,
+            "texts": self.texts,
+            "full_batches": self.full_batches,
+            "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+            "avg_encode_ms": self.encode_seconds * 1000 / self.batches if self.batches else 0.0,
+            "avg_queue_wait_ms": self.wait_seconds * 1000 / self.requests if self.requests else 0.0,
+        }
+
+    async def _run(self):
+        while True:
+            await self._encode_slots.acquire()
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Give concurrent requests a moment to join the batch
+            deadline = self._pending[0].queued_at + self._max_wait
+            while self._queued_texts < self._max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            slices = self._take_batch()
+            if not slices:
+                self._encode_slots.release()
+                continue
+            task = asyncio.create_task(self._run_batch(slices))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_done)
+
+    def _batch_done(self, task: asyncio.Task):
+        self._batch_tasks.discard(task)
+        self._encode_slots.release()
+
+    def _take_batch(self) -> list:
+        """Takes up to max_batch_size texts off the queue, as (request, start, end) slices."""
+        slices = []
+        size = 0
+        while self._pending and size < self._max_batch_size:
+            request = self._pending[0]
+            if request.future.done():
+                # The caller went away, e.g. the client disconnected
+                self._pending.popleft()
+                self._queued_texts -= len(request.texts) - request.next_index
+                continue
+            if request.next_index == 0:
+                self.wait_seconds += time.perf_counter() - request.queued_at
+            start = request.next_index
+            end = min(len(request.texts), start + self._max_batch_size - size)
+            slices.append((request, start, end))
+            size += end - start
+            request.next_index = end
+            if end == len(request.texts):
+                self._pending.popleft()
+        self._queued_texts -= size
+        return slices
+
+    async def _run_batch(self, slices: list):
+        texts = [text for request, start, end in slices for text in request.texts[start:end]]
+        started = time.perf_counter()
+        try:
+            vectors = await self._encode(texts)
+        except asyncio.CancelledError:
+            for request, _, _ in slices:
+                self._fail(request, RuntimeError("Embedding batcher stopped"))
+            raise
+        except Exception as e:
+            for request, _, _ in slices:
+                self._fail(request, e)
+            return
+        self.encode_seconds += time.perf_counter() - started
+        self.batches += 1
+        self.texts += len(texts)
+        if len(texts) >= self._max_batch_size:
+            self.full_batches += 1
+
+        offset = 0
+        for request, start, end in slices:
+            request.results.append((start, vectors[offset:offset + end - start]))
+            offset += end - start
+            request.remaining -= end - start
+            if request.remaining == 0 and not request.future.done():
+                request.future.set_result(_join(request.results))
+
+    def _fail(self, request: _PendingRequest, error: Exception):
+        if request.future.done():
+            return
+        request.future.set_exception(error)
+        # Drop the rest of a partially batched request
+        if request.next_index < len(request.texts):
+            self._queued_texts -= len(request.texts) - request.next_index
+            request.next_index = len(request.texts)
+            self._pending.remove(request)
+
+
+def _join(pieces: list) -> np.ndarray:
+    if len(pieces) == 1:
+        return pieces[0][1]
+    return np.concatenate([vectors for _, vectors in sorted(pieces, key=lambda piece: piece[0])])
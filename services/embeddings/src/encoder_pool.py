@@ -0,0 +1,126 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+
+from .model_loader import load_model
+
+
+def configure_torch_threads(num_threads: int, interop_threads: int):
+    """Applies explicit torch thread counts, 0 keeps the torch defaults."""
+    if num_threads > 0:
+        torch.set_num_threads(num_threads)
+    if interop_threads > 0:
+        # Only allowed before the first parallel op ran in this process
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            print(f"Could not set torch interop threads: {e}")
+
+
+class ThreadEncoder:
+    """Runs the in-process model on a dedicated thread, so encoding never blocks the event loop."""
+
+    def __init__(self, model: SentenceTransformer, batch_size: int):
+        self.model = model
+        self._batch_size = batch_size
+        # One thread, torch already parallelises a single encode across cores
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+
+    @property
+    def replicas(self) -> int:
+        return 1
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._encode, texts)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(texts, batch_size=self._batch_size, convert_to_numpy=True)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# State of a process pool worker
+_worker_model: Optional[SentenceTransformer] = None
+_worker_batch_size = 32
+
+
+def _init_worker(model_spec: dict, batch_size: int, num_threads: int, interop_threads: int,
+                 cpu_slices: Optional[List[List[int]]], next_slice):
+    global _worker_model, _worker_batch_size
+    if cpu_slices:
+        with next_slice.get_lock():
+            index = next_slice.value
+            next_slice.value += 1
+        cores = cpu_slices[index % len(cpu_slices)]
+        os.sched_setaffinity(0, cores)
+        print(f"Encoder worker {os.getpid()} pinned to cores {cores}")
+    configure_torch_threads(num_threads, interop_threads)
+    _worker_model = load_model(model_spec)
+    _worker_batch_size = batch_size
+
+
+def _encode_in_worker(texts: List[str]):
+    # float32 arrays pickle far smaller and faster than nested float lists
+    return _worker_model.encode(texts, batch_size=_worker_batch_size, convert_to_numpy=True)
+
+
+def _worker_ready() -> int:
+    return os.getpid()
+
+
+class ProcessEncoderPool:
+    """
+    Runs several model replicas in worker processes, optionally pinned to disjoint CPU core sets.
+
+    Each replica loads its own copy of the model, so memory grows with the replica count. Torch
+    threads per replica should be set so replicas x threads does not exceed the pinned cores.
+    """
+
+    def __init__(self, model_spec: dict, replicas: int, batch_size: int, num_threads: int,
+                 interop_threads: int, pin_cpus: bool):
+        cpu_slices = _split_cores(replicas) if pin_cpus else None
+        # Forking a process that already initialised torch threads can deadlock
+        context = multiprocessing.get_context("spawn")
+        self._replicas = replicas
+        self._executor = ProcessPoolExecutor(
+            max_workers=replicas, mp_context=context, initializer=_init_worker,
+            initargs=(model_spec, batch_size, num_threads, interop_threads, cpu_slices, context.Value("i", 0))
+        )
+
+    @property
+    def replicas(self) -> int:
+        return self._replicas
+
+    async def start(self):
+        """Waits until every replica has loaded its model."""
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _worker_ready) for _ in range(self._replicas)
+        ])
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, _encode_in_worker, texts)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _split_cores(replicas: int) -> Optional[List[List[int]]]:
+    if not hasattr(os, "sched_getaffinity"):
+        print("CPU pinning is not supported on this platform")
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    if len(cores) < replicas:
+        print(f"Only {len(cores)} cores available for {replicas} replicas, not pinning")
+        return None
+    per_replica = len(cores) // replicas
+    return [cores[i * per_replica:(i + 1) * per_replica] for i in range(replicas)]
@@ -1,19 +1,99 @@
-from fastapi import FastAPI, HTTPException
-from sentence_transformers import SentenceTransformer
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sentence_transformers import CrossEncoder
 from pydantic import BaseModel
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
+import json
 import os
+from collections import deque
+
+import numpy as np
+
+from .batcher import EmbeddingBatcher, QueueFullError, RequestTooLargeError
+from .encoder_pool import ProcessEncoderPool, ThreadEncoder, configure_torch_threads
+from .model_loader import DEFAULT_QUANTIZATION_CONFIG, load_model, model_identity, prepare_model
+from .wire_format import NDJSON, stream_dtype, stream_record, vectors_response
 
 app = FastAPI(title="Embedding Service")
 
 model_name = os.getenv("EMBEDDING_MODEL", "BAAI/bge-large-en-v1.5")
-model = None
+encoder = None
+
+# Inference backend: torch, onnx (ONNX Runtime) or onnx-int8 (dynamically quantized ONNX).
+# ONNX exports are created on first start and cached in EMBED_ONNX_CACHE_DIR
+embed_backend = os.getenv("EMBED_BACKEND", "torch").lower()
+embed_onnx_cache_dir = os.getenv("EMBED_ONNX_CACHE_DIR", "models/onnx")
+embed_quantization_config = os.getenv("EMBED_ONNX_QUANTIZATION_CONFIG", DEFAULT_QUANTIZATION_CONFIG)
+reported_model_name = model_identity(model_name, embed_backend, embed_quantization_config)
+
+# Encoding never runs on the event loop: 0 replicas encodes on a dedicated thread of this process,
+# N > 0 runs N model replicas in worker processes (optionally pinned to disjoint core sets)
+embed_replicas = int(os.getenv("EMBED_REPLICAS", 0))
+embed_pin_cpus = os.getenv("EMBED_PIN_CPUS", "false").lower() == "true"
+# Explicit torch thread counts (per replica), 0 keeps the torch defaults
+torch_threads = int(os.getenv("TORCH_NUM_THREADS", 0))
+torch_interop_threads = int(os.getenv("TORCH_NUM_INTEROP_THREADS", 0))
+
+# Texts from concurrent /embed and /embed/batch calls are coalesced into shared encode calls
+embed_max_batch_size = int(os.getenv("EMBED_MAX_BATCH_SIZE", 64))
+embed_max_wait_ms = float(os.getenv("EMBED_MAX_WAIT_MS", 5))
+embed_max_queue_size = int(os.getenv("EMBED_MAX_QUEUE_SIZE", 10000))
+# /embed/stream keeps this many mini-batches queued ahead of the one being sent
+embed_stream_prefetch = int(os.getenv("EMBED_STREAM_PREFETCH", 2))
+batcher = None
+
+# Cross-encoder scoring (query, passage) pairs for /rerank, e.g. BAAI/bge-reranker-base. Opt-in like the
+# backend's RERANK_ENABLED, empty (the default) neither downloads nor loads a model and disables the endpoint
+rerank_model_name = os.getenv("RERANK_MODEL", "")
+rerank_batch_size = int(os.getenv("RERANK_BATCH_SIZE", 32))
+rerank_model = None
+rerank_executor = None
 
 @app.on_event("startup")
-async def load_model():
-    global model
-    model = SentenceTransformer(model_name)
-    print(f"Loaded embedding model: {model_name}")
+async def startup():
+    global encoder, rerank_model, rerank_executor, batcher
+    configure_torch_threads(torch_threads, torch_interop_threads)
+    model_spec = await asyncio.to_thread(
+        prepare_model, model_name, embed_backend, embed_onnx_cache_dir, embed_quantization_config
+    )
+    if embed_replicas > 0:
+        pool = ProcessEncoderPool(model_spec, embed_replicas, embed_max_batch_size,
+                                  torch_threads, torch_interop_threads, embed_pin_cpus)
+        await pool.start()
+        encoder = pool
+        print(f"Loaded embedding model: {model_name} ({embed_backend}, {embed_replicas} process replicas)")
+    else:
+        encoder = ThreadEncoder(load_model(model_spec), embed_max_batch_size)
+        print(f"Loaded embedding model: {model_name} ({embed_backend})")
+    batcher = EmbeddingBatcher(encoder.encode, embed_max_batch_size, embed_max_wait_ms, embed_max_queue_size,
+                               max_concurrent_batches=encoder.replicas)
+    batcher.start()
+    if rerank_model_name:
+        # Single-label cross-encoders apply a sigmoid, scores are in [0, 1]
+        rerank_model = CrossEncoder(rerank_model_name)
+        rerank_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        print(f"Loaded rerank model: {rerank_model_name}")
+
+@app.on_event("shutdown")
+async def stop_encoding():
+    if batcher is not None:
+        await batcher.stop()
+    if encoder is not None:
+        encoder.close()
+    if rerank_executor is not None:
+        rerank_executor.shutdown(wait=False, cancel_futures=True)
+
+async def embed_queued(texts: List[str]) -> np.ndarray:
+    if not encoder:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    try:
+        return await batcher.embed(texts)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=f"Embedding queue is full: {e}", headers={"Retry-After": "1"})
+    except RequestTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
 class EmbedRequest(BaseModel):
     text: str
@@ -21,22 +101,108 @@ class EmbedRequest(BaseModel):
 class BatchEmbedRequest(BaseModel):
     texts: List[str]
 
+class StreamEmbedRequest(BaseModel):
+    texts: List[str]
+    batch_size: Optional[int] = None
+
+class RerankRequest(BaseModel):
+    query: str
+    passages: List[str]
+
+# Clients keying caches by model see a model swap on the very next response
+@app.middleware("http")
+async def add_model_header(request: Request, call_next):
+    response = await call_next(request)
+    response.headers["X-Embedding-Model"] = reported_model_name
+    return response
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "model": model_name, "loaded": model is not None}
+    return {"status": "healthy", "model": reported_model_name, "backend": embed_backend,
+            "loaded": encoder is not None,
+            "replicas": encoder.replicas if encoder is not None else 0,
+            "rerank_model": rerank_model_name or None, "rerank_loaded": rerank_model is not None}
 
-@app.post("/embed")
-async def embed_text(request: EmbedRequest):
-    if not model:
+@app.get("/ready")
+async def ready():
+    if encoder is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    
-    embedding = model.encode(request.text).tolist()
-    return {"embedding": embedding}
+    return {"status": "ready"}
+
+@app.get("/metrics")
+async def metrics():
+    return {"batching": batcher.get_metrics() if batcher is not None else None}
+
+# Both embed endpoints answer with JSON by default, or with raw little-endian float32/float16
+# arrays when the Accept header asks for application/octet-stream or application/msgpack
+@app.post("/embed")
+async def embed_text(request: EmbedRequest, accept: Optional[str] = Header(None)):
+    embedding = (await embed_queued([request.text]))[0]
+    return vectors_response(embedding, accept, "embedding")
 
 @app.post("/embed/batch")
-async def embed_batch(request: BatchEmbedRequest):
-    if not model:
+async def embed_batch(request: BatchEmbedRequest, accept: Optional[str] = Header(None)):
+    if not request.texts:
+        return {"embeddings": []}
+    embeddings = await embed_queued(request.texts)
+    return vectors_response(embeddings, accept, "embeddings")
+
+@app.post("/embed/stream")
+async def embed_stream(request: StreamEmbedRequest, accept: Optional[str] = Header(None)):
+    """
+    Streams the vectors as newline-delimited JSON records, one per mini-batch and in text order:
+    {"start", "embeddings"} or, when the Accept header carries a dtype parameter,
+    {"start", "shape", "dtype", "data"} with data as base64 encoded little-endian floats.
+    A failure after the first record is reported as a final {"error"} record.
+    """
+    if not encoder:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    
-    embeddings = model.encode(request.texts).tolist()
-    return {"embeddings": embeddings}
+    # A mini-batch larger than the queue could never be accepted
+    batch_size = min(max(1, request.batch_size or embed_max_batch_size), embed_max_queue_size)
+    dtype = stream_dtype(accept)
+    texts = request.texts
+
+    async def records():
+        pending = deque()
+        starts = iter(range(0, len(texts), batch_size))
+        try:
+            for _ in range(embed_stream_prefetch + 1):
+                start = next(starts, None)
+                if start is not None:
+                    pending.append((start, asyncio.create_task(batcher.embed(texts[start:start + batch_size]))))
+            while pending:
+                start, task = pending.popleft()
+                try:
+                    vectors = await task
+                except Exception as e:
+                    yield json.dumps({"start": start, "error": str(e)}).encode("utf-8") + b"\n"
+                    return
+                # Queue the next mini-batch before sending this one
+                next_start = next(starts, None)
+                if next_start is not None:
+                    pending.append((next_start, asyncio.create_task(
+                        batcher.embed(texts[next_start:next_start + batch_size])
+                    )))
+                yield stream_record(start, vectors, dtype)
+        finally:
+            # The client went away or the stream failed, drop the queued mini-batches
+            for _, task in pending:
+                task.cancel()
+
+    return StreamingResponse(records(), media_type=NDJSON)
+
+@app.post("/rerank")
+async def rerank(request: RerankRequest):
+    """Scores every passage against the query, scores are returned in passage order."""
+    if not rerank_model_name:
+        raise HTTPException(status_code=404, detail="No rerank model configured, set RERANK_MODEL")
+    if not rerank_model:
+        raise HTTPException(status_code=503, detail="Rerank model not loaded")
+    if not request.passages:
+        return {"scores": []}
+
+    pairs = [(request.query, passage) for passage in request.passages]
+    scores = await asyncio.get_running_loop().run_in_executor(
+        rerank_executor, lambda: rerank_model.predict(pairs, batch_size=rerank_batch_size).tolist()
+    )
+    return {"scores": scores}
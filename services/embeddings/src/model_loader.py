@@ -0,0 +1,60 @@
+import os
+import shutil
+from pathlib import Path
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+# Dynamic int8 quantization presets of sentence-transformers: arm64, avx2, avx512, avx512_vnni
+DEFAULT_QUANTIZATION_CONFIG = "avx2"
+
+
+def prepare_model(model_name: str, backend: str, cache_dir: str,
+                  quantization_config: str = DEFAULT_QUANTIZATION_CONFIG) -> dict:
+    """
+    Makes sure the model is available for the given backend and returns the spec to load it with.
+
+    ONNX backends export the model once into cache_dir (and quantize it for onnx-int8), later
+    starts and every replica load the cached export. Call this once before starting replicas so
+    they do not export concurrently.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+    if backend == "torch":
+        return {"path": model_name, "backend": "torch", "model_kwargs": None}
+
+    export_dir = Path(cache_dir) / model_name.replace("/", "--")
+    if not (export_dir / "onnx" / "model.onnx").exists():
+        print(f"Exporting {model_name} to ONNX in {export_dir}")
+        # Export next to the target and swap it in, an interrupted export is never picked up
+        staging_dir = export_dir.with_name(export_dir.name + ".partial")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        SentenceTransformer(model_name, backend="onnx").save_pretrained(str(staging_dir))
+        shutil.rmtree(export_dir, ignore_errors=True)
+        os.replace(staging_dir, export_dir)
+
+    file_name = "onnx/model.onnx"
+    if backend == "onnx-int8":
+        file_name = f"onnx/model_qint8_{quantization_config}.onnx"
+        if not (export_dir / file_name).exists():
+            print(f"Quantizing the ONNX export of {model_name} to int8 ({quantization_config})")
+            model = SentenceTransformer(str(export_dir), backend="onnx")
+            export_dynamic_quantized_onnx_model(model, quantization_config, str(export_dir))
+
+    return {"path": str(export_dir), "backend": "onnx", "model_kwargs": {"file_name": file_name}}
+
+
+def load_model(spec: dict) -> SentenceTransformer:
+    return SentenceTransformer(spec["path"], backend=spec["backend"], model_kwargs=spec["model_kwargs"])
+
+
+def model_identity(model_name: str, backend: str, quantization_config: str = DEFAULT_QUANTIZATION_CONFIG) -> str:
+    """
+    Name reported to clients. Vectors of different backends differ slightly, so clients that
+    cache embeddings by model name must see a different name per backend.
+    """
+    if backend == "torch":
+        return model_name
+    if backend == "onnx-int8":
+        return f"{model_name}+onnx-int8-{quantization_config}"
+    return f"{model_name}+{backend}"
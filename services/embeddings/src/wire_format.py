@@ -0,0 +1,85 @@
+import base64
+import json
+from typing import Optional, Tuple
+
+import msgpack
+import numpy as np
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+OCTET_STREAM = "application/octet-stream"
+NDJSON = "application/x-ndjson"
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+# Little-endian on the wire, whatever the host byte order
+DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+
+def negotiate(accept: Optional[str]) -> Tuple[str, str]:
+    """
+    Picks the response format from the Accept header, the first supported media range wins.
+
+    Binary formats take a dtype parameter, e.g. "application/octet-stream; dtype=float16".
+    Returns (media type, dtype), JSON when nothing binary was asked for.
+    """
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        media_type = media_type.lower()
+        if media_type != OCTET_STREAM and media_type not in MSGPACK_TYPES:
+            continue
+        dtype = "float32"
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "dtype" and value.strip().strip('"') in DTYPES:
+                dtype = value.strip().strip('"')
+        return media_type, dtype
+    return "application/json", "float32"
+
+
+def vectors_response(vectors: np.ndarray, accept: Optional[str], json_key: str) -> Response:
+    """
+    Serialises vectors in the negotiated format.
+
+    octet-stream: the raw row-major array, its shape and dtype in the X-Embedding-Shape and
+    X-Embedding-Dtype headers. msgpack: {"shape", "dtype", "data"} with data as raw bytes.
+    """
+    media_type, dtype = negotiate(accept)
+    if media_type == "application/json":
+        return JSONResponse({json_key: vectors.tolist()})
+
+    data = np.ascontiguousarray(vectors, dtype=DTYPES[dtype]).tobytes()
+    shape = list(vectors.shape)
+    if media_type == OCTET_STREAM:
+        return Response(content=data, media_type=OCTET_STREAM, headers={
+            "X-Embedding-Shape": ",".join(str(size) for size in shape),
+            "X-Embedding-Dtype": dtype,
+        })
+    return Response(content=msgpack.packb({"shape": shape, "dtype": dtype, "data": data}),
+                    media_type=media_type)
+
+
+def stream_dtype(accept: Optional[str]) -> Optional[str]:
+    """
+    Record encoding of the NDJSON stream: a dtype when the Accept header asks for
+    "application/x-ndjson; dtype=float32|float16" (base64 array records), None for JSON float lists.
+    """
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        if media_type.lower() != NDJSON:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "dtype" and value.strip().strip('"') in DTYPES:
+                return value.strip().strip('"')
+        return None
+    return None
+
+
+def stream_record(start: int, vectors: np.ndarray, dtype: Optional[str]) -> bytes:
+    """One NDJSON line carrying the vectors of the texts starting at index start."""
+    if dtype is None:
+        record = {"start": start, "embeddings": vectors.tolist()}
+    else:
+        data = np.ascontiguousarray(vectors, dtype=DTYPES[dtype]).tobytes()
+        record = {"start": start, "shape": list(vectors.shape), "dtype": dtype,
+                  "data": base64.b64encode(data).decode("ascii")}
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
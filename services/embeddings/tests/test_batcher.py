@@ -0,0 +1,156 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from services.embeddings.src.batcher import EmbeddingBatcher, QueueFullError, RequestTooLargeError
+
+
+class FakeEncoder:
+    """Encodes a text as [len(text)], optionally holding every batch until the gate opens."""
+
+    def __init__(self, gate=None, fail=False):
+        self.batches = []
+        self._gate = gate
+        self._fail = fail
+
+    async def encode(self, texts):
+        self.batches.append(list(texts))
+        if self._gate is not None:
+            await self._gate.wait()
+        if self._fail:
+            raise RuntimeError("encode failed")
+        return np.array([[float(len(text))] for text in texts], dtype=np.float32)
+
+
+def _batcher(encoder, max_batch_size=4, max_wait_ms=20, max_queue_size=100):
+    batcher = EmbeddingBatcher(encoder.encode, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                               max_queue_size=max_queue_size)
+    batcher.start()
+    return batcher
+
+
+def test_concurrent_requests_share_one_encode_call():
+    """
+    Requests arriving within the wait window should be coalesced, each getting its own rows back.
+    """
+    encoder = FakeEncoder()
+
+    async def run():
+        batcher = _batcher(encoder)
+        results = await asyncio.gather(batcher.embed(["a"]), batcher.embed(["bb", "ccc"]))
+        await batcher.stop()
+        return results, batcher.get_metrics()
+
+    (first, second), metrics = asyncio.run(run())
+
+    assert encoder.batches == [["a", "bb", "ccc"]]
+    assert (first.tolist(), second.tolist()) == ([[1.0]], [[2.0], [3.0]])
+    assert (metrics["requests"], metrics["batches"], metrics["texts"]) == (2, 1, 3)
+
+
+def test_requests_larger_than_a_batch_are_split_and_rejoined_in_order():
+    """
+    A request over max_batch_size should be spread over several batches and returned in input order.
+    """
+    encoder = FakeEncoder()
+    texts = ["x" * length for length in range(1, 11)]
+
+    async def run():
+        batcher = _batcher(encoder, max_batch_size=4)
+        vectors = await batcher.embed(texts)
+        await batcher.stop()
+        return vectors, batcher.get_metrics()
+
+    vectors, metrics = asyncio.run(run())
+
+    assert [len(batch) for batch in encoder.batches] == [4, 4, 2]
+    assert vectors[:, 0].tolist() == list(range(1, 11))
+    assert metrics["full_batches"] == 2
+
+
+def test_full_queue_and_oversized_requests_are_rejected():
+    """
+    A full queue should be retryable, a request the queue can never hold should not.
+    """
+    gate = asyncio.Event()
+    encoder = FakeEncoder(gate)
+
+    async def run():
+        batcher = _batcher(encoder, max_batch_size=2, max_wait_ms=0, max_queue_size=3)
+        # The first batch occupies the only encode slot, the next texts stay queued
+        running = asyncio.create_task(batcher.embed(["a", "b"]))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(batcher.embed(["c", "d", "e"]))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.embed(["f"])
+        with pytest.raises(RequestTooLargeError):
+            await batcher.embed(["g", "h", "i", "j"])
+        gate.set()
+        results = await asyncio.gather(running, queued)
+        await batcher.stop()
+        return results, batcher.get_metrics()
+
+    (running, queued), metrics = asyncio.run(run())
+
+    assert (running.shape, queued.shape) == ((2, 1), (3, 1))
+    assert metrics["rejected"] == 2
+
+
+def test_cancelled_requests_are_not_encoded():
+    """
+    Texts of a caller that went away before its batch was taken should be dropped from the queue.
+    """
+    gate = asyncio.Event()
+    encoder = FakeEncoder(gate)
+
+    async def run():
+        batcher = _batcher(encoder, max_batch_size=2, max_wait_ms=0)
+        running = asyncio.create_task(batcher.embed(["a", "b"]))
+        await asyncio.sleep(0.01)
+        abandoned = asyncio.create_task(batcher.embed(["gone"]))
+        kept = asyncio.create_task(batcher.embed(["kept"]))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        gate.set()
+        await asyncio.gather(running, kept)
+        await batcher.stop()
+        return batcher.get_metrics()
+
+    metrics = asyncio.run(run())
+
+    assert encoder.batches == [["a", "b"], ["kept"]]
+    assert metrics["queue_depth"] == 0
+
+
+def test_encode_errors_fail_every_request_of_the_batch():
+    encoder = FakeEncoder(fail=True)
+
+    async def run():
+        batcher = _batcher(encoder)
+        results = await asyncio.gather(batcher.embed(["a"]), batcher.embed(["b"]), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    assert [str(result) for result in asyncio.run(run())] == ["encode failed", "encode failed"]
+
+
+def test_stop_fails_running_and_queued_requests():
+    """
+    Stopping should release every waiting caller instead of leaving it hanging.
+    """
+    encoder = FakeEncoder(asyncio.Event())
+
+    async def run():
+        batcher = _batcher(encoder, max_batch_size=1, max_wait_ms=0)
+        running = asyncio.create_task(batcher.embed(["a"]))
+        queued = asyncio.create_task(batcher.embed(["b"]))
+        await asyncio.sleep(0.01)
+        await batcher.stop()
+        return await asyncio.gather(running, queued, return_exceptions=True), batcher.get_metrics()
+
+    results, metrics = asyncio.run(run())
+
+    assert [str(result) for result in results] == ["Embedding batcher stopped"] * 2
+    assert (metrics["queue_depth"], metrics["batches_in_flight"]) == (0, 0)
@@ -0,0 +1,90 @@
+import importlib
+import sys
+import types
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+class FakeModel:
+    def encode(self, texts, batch_size=32, convert_to_numpy=True):
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+def _stub_missing_modules(monkeypatch):
+    """The model libraries are only needed to load real models, which the tests replace."""
+    stubs = {
+        "torch": {"set_num_threads": lambda n: None, "set_num_interop_threads": lambda n: None},
+        "sentence_transformers": {"SentenceTransformer": object, "CrossEncoder": object,
+                                  "export_dynamic_quantized_onnx_model": lambda *args: None},
+        "msgpack": {"packb": lambda obj: b""},
+    }
+    for name, attributes in stubs.items():
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            monkeypatch.setitem(sys.modules, name, types.SimpleNamespace(**attributes))
+
+
+@pytest.fixture
+def main(monkeypatch):
+    _stub_missing_modules(monkeypatch)
+    module = importlib.import_module("services.embeddings.src.main")
+    monkeypatch.setattr(module, "prepare_model", lambda *args: {"path": "fake", "backend": "torch",
+                                                                "model_kwargs": None})
+    monkeypatch.setattr(importlib.import_module("services.embeddings.src.model_loader"), "SentenceTransformer",
+                        lambda *args, **kwargs: FakeModel())
+    monkeypatch.setattr(module, "rerank_model_name", "")
+    monkeypatch.setattr(module, "rerank_model", None)
+    monkeypatch.setattr(module, "rerank_executor", None)
+    monkeypatch.setattr(module, "embed_replicas", 0)
+    return module
+
+
+def test_startup_loads_the_model_and_serves_embeddings(main):
+    """
+    The startup handler should load the in-process model and start the batcher.
+    """
+    with TestClient(main.app) as client:
+        assert client.get("/ready").status_code == 200
+        assert client.get("/health").json()["loaded"] is True
+
+        response = client.post("/embed/batch", json={"texts": ["a", "bbb"]})
+        assert response.json() == {"embeddings": [[1.0, 1.0], [3.0, 1.0]]}
+        assert response.headers["x-embedding-model"] == main.reported_model_name
+        assert client.get("/metrics").json()["batching"]["texts"] == 2
+
+
+def test_requests_larger_than_the_queue_are_rejected_for_good(main, monkeypatch):
+    """
+    A batch the queue can never hold should get a 413 rather than a retryable 503.
+    """
+    monkeypatch.setattr(main, "embed_max_queue_size", 2)
+    with TestClient(main.app) as client:
+        response = client.post("/embed/batch", json={"texts": ["a", "b", "c"]})
+        assert response.status_code == 413
+        assert "retry-after" not in response.headers
+
+
+class FakeCrossEncoder:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def predict(self, pairs, batch_size=32):
+        return np.array([len(passage) / 10 for _, passage in pairs])
+
+
+def test_rerank_is_opt_in(main, monkeypatch):
+    """
+    Without RERANK_MODEL nothing is loaded and /rerank is not found, with it passages are scored in order.
+    """
+    with TestClient(main.app) as client:
+        assert client.get("/health").json()["rerank_loaded"] is False
+        assert client.post("/rerank", json={"query": "q", "passages": ["a"]}).status_code == 404
+
+    monkeypatch.setattr(main, "rerank_model_name", "fake-reranker")
+    monkeypatch.setattr(main, "CrossEncoder", FakeCrossEncoder)
+    with TestClient(main.app) as client:
+        response = client.post("/rerank", json={"query": "q", "passages": ["a", "bbb"]})
+        assert response.json() == {"scores": [0.1, 0.3]}